@@ -16,6 +16,97 @@ ALGORITHM = os.getenv("ALGORITHM")
 # Be tolerant if the value is missing or not an int
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Admin endpoints (/admin/*, GET /users). Comma-separated emails, or set
+# is_admin: true on the user document
+ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+# Background jobs
+LEASE_TTL_SECONDS = int(os.getenv("LEASE_TTL_SECONDS", "30"))
+RUN_WORKER_IN_APP = os.getenv("RUN_WORKER_IN_APP", "true").lower() == "true"
+JOB_QUEUE_POLL_SECONDS = float(os.getenv("JOB_QUEUE_POLL_SECONDS", "2"))
+JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "300"))
+# e.g. "default=4,email=2,ocr=2": queue name -> max jobs running at once per worker
+JOB_QUEUE_CONCURRENCY = {
+    queue.strip(): int(limit)
+    for queue, limit in (
+        item.split("=")
+        for item in os.getenv("JOB_QUEUE_CONCURRENCY", "default=4,email=2,ocr=2").split(",")
+        if item.strip()
+    )
+}
+SUBSCRIPTION_QUEUE_BATCH_SIZE = int(os.getenv("SUBSCRIPTION_QUEUE_BATCH_SIZE", "500"))
+
+# Loans
+LOAN_BATCH_MAX_SCENARIOS = int(os.getenv("LOAN_BATCH_MAX_SCENARIOS", "200"))
+# Batches at least this large are spread over a process pool
+LOAN_BATCH_PROCESS_THRESHOLD = int(os.getenv("LOAN_BATCH_PROCESS_THRESHOLD", "16"))
+LOAN_BATCH_WORKERS = int(os.getenv("LOAN_BATCH_WORKERS", str(os.cpu_count() or 2)))
+LOAN_CACHE_SIZE = int(os.getenv("LOAN_CACHE_SIZE", "1024"))
+# Shares computed schedules between workers through Mongo
+LOAN_CACHE_MONGO = os.getenv("LOAN_CACHE_MONGO", "false").lower() == "true"
+LOAN_CACHE_TTL_SECONDS = int(os.getenv("LOAN_CACHE_TTL_SECONDS", "86400"))
+
+# Optional subsystems; a disabled one has its routes left out. Enabled or
+# not, their heavy dependencies are only imported on first use
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+PAYMENTS_ENABLED = os.getenv("PAYMENTS_ENABLED", "true").lower() == "true"
+
+# Receipt OCR
+# Path to the tesseract binary when it is not on PATH
+TESSERACT_CMD = os.getenv("TESSERACT_CMD", "tesseract")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2)))
+# Requests allowed to wait for a free worker before new ones get 429
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "8"))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "30"))
+# Comma-separated, run in this order; empty disables preprocessing
+OCR_PREPROCESS_STAGES = [
+    stage.strip()
+    for stage in os.getenv("OCR_PREPROCESS_STAGES", "grayscale,crop,downscale,deskew,threshold").split(",")
+    if stage.strip()
+]
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+# Typical thermal receipt paper; used to turn a pixel width into a DPI
+OCR_RECEIPT_WIDTH_MM = float(os.getenv("OCR_RECEIPT_WIDTH_MM", "80"))
+# JPEGs are decoded at 1/2, 1/4 or 1/8 scale while the shorter side stays
+# at least this long; 1500 keeps a receipt filling 60% of a 12 MP frame
+# near OCR_TARGET_DPI
+OCR_DECODE_MIN_SIDE = int(os.getenv("OCR_DECODE_MIN_SIDE", "1500"))
+# Uploads over either limit get 413 before they are decoded
+OCR_MAX_UPLOAD_BYTES = int(os.getenv("OCR_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "50000000"))
+OCR_THRESHOLD_BLOCK_SIZE = int(os.getenv("OCR_THRESHOLD_BLOCK_SIZE", "31"))
+OCR_THRESHOLD_C = int(os.getenv("OCR_THRESHOLD_C", "15"))
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))
+OCR_CACHE_TTL_SECONDS = int(os.getenv("OCR_CACHE_TTL_SECONDS", str(30 * 86400)))
+# POST /utils/extract_receipts: images per request, and how many of one
+# request's images may be in the OCR pool at once
+OCR_BATCH_MAX_IMAGES = int(os.getenv("OCR_BATCH_MAX_IMAGES", "20"))
+OCR_BATCH_CONCURRENCY = int(os.getenv("OCR_BATCH_CONCURRENCY", str(max(1, OCR_WORKERS // 2))))
+# Background receipt jobs (POST /utils/receipts)
+OCR_JOB_MAX_ATTEMPTS = int(os.getenv("OCR_JOB_MAX_ATTEMPTS", "3"))
+RECEIPT_EVENTS_POLL_SECONDS = float(os.getenv("RECEIPT_EVENTS_POLL_SECONDS", "1"))
+RECEIPT_EVENTS_TIMEOUT_SECONDS = float(os.getenv("RECEIPT_EVENTS_TIMEOUT_SECONDS", "120"))
+
+# Users written before indexed search existed get its fields in batches
+USER_SEARCH_BACKFILL_BATCH_SIZE = int(os.getenv("USER_SEARCH_BACKFILL_BATCH_SIZE", "500"))
+
+# Social graph (mutual friends, suggestions). Each worker keeps its own copy
+# and sees its own accept/remove calls at once; changes made through other
+# workers show up after the next rebuild
+SOCIAL_GRAPH_REFRESH_SECONDS = float(os.getenv("SOCIAL_GRAPH_REFRESH_SECONDS", "300"))
+
+# Stripe
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+# Point at a local stripe-mock (http://localhost:12111) in development and tests
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+STRIPE_TIMEOUT_SECONDS = float(os.getenv("STRIPE_TIMEOUT_SECONDS", "20"))
+# Retried with the same idempotency key, so a retried create is not doubled
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv("STRIPE_MAX_NETWORK_RETRIES", "2"))
+# Threads running the blocking Stripe SDK; each keeps its own pooled connection
+STRIPE_WORKERS = int(os.getenv("STRIPE_WORKERS", "4"))
+
 bearer_scheme = HTTPBearer()
 
 collection = db["users"]
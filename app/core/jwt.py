@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import jwt, JWTError
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -7,6 +8,7 @@ from app.db.mongo import db
 
 collection = db["users"]
 bearer_scheme = HTTPBearer()
+optional_bearer_scheme = HTTPBearer(auto_error=False)
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -48,3 +50,13 @@ async def get_current_user(
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer_scheme),
+):
+    """The signed-in user, or None without a token. A token that is present
+    but invalid is still rejected with 401."""
+    if credentials is None:
+        return None
+    return await get_current_user(credentials)
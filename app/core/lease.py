@@ -0,0 +1,170 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import LEASE_TTL_SECONDS
+from app.db.mongo import db
+
+collection = db["leases"]
+
+# Unique per process, so two uvicorn workers on one host are distinct owners
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Returned by run_exclusive when another run already holds the job lease
+SKIPPED = object()
+
+
+class Lease:
+    """A named, expiring lock document in Mongo.
+
+    Every takeover increments `token`. Renew and release only match the
+    token they were granted, so a holder that stalled past its expiry cannot
+    extend or drop a lease someone else now owns. The token is not checked
+    by the work the lease guards: a holder that stalls mid-run can still
+    write after losing the lease, so that work must tolerate an overlap.
+    Leader-only jobs are enqueued with a dedupe key, and job results are
+    written under the job's own claim.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int = LEASE_TTL_SECONDS, owner: str = WORKER_ID):
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.owner = owner
+        self.token: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def held(self) -> bool:
+        return self.token is not None
+
+    async def acquire(self) -> bool:
+        now = datetime.utcnow()
+        if self.held and await self.renew():
+            return True
+        try:
+            doc = await collection.find_one_and_update(
+                {"_id": self.name, "expiresAt": {"$lte": now}},
+                {
+                    "$set": {
+                        "owner": self.owner,
+                        "acquiredAt": now,
+                        "expiresAt": now + self.ttl,
+                    },
+                    "$inc": {"token": 1},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Lease exists and has not expired: someone else holds it
+            self.token = None
+            return False
+        self.token = doc["token"]
+        return True
+
+    async def renew(self) -> bool:
+        if not self.held:
+            return False
+        doc = await collection.find_one_and_update(
+            {"_id": self.name, "owner": self.owner, "token": self.token},
+            {"$set": {"expiresAt": datetime.utcnow() + self.ttl}},
+        )
+        if doc is None:
+            self.token = None
+            return False
+        return True
+
+    async def release(self):
+        self._stop_heartbeat()
+        if not self.held:
+            return
+        await collection.update_one(
+            {"_id": self.name, "owner": self.owner, "token": self.token},
+            {"$set": {"expiresAt": datetime.utcnow()}},
+        )
+        self.token = None
+
+    def start_heartbeat(self):
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._renew_loop())
+
+    def _stop_heartbeat(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    async def _renew_loop(self):
+        interval = self.ttl.total_seconds() / 3
+        while self.held:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.renew():
+                    print(f"Lease {self.name} lost by {self.owner}")
+            except Exception as e:
+                print(f"Error renewing lease {self.name}: {e}")
+
+
+class LeaderElector:
+    """Keeps trying to hold one lease; the holder is the leader."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: int = LEASE_TTL_SECONDS,
+        on_elected: Optional[Callable[[], Awaitable[None]]] = None,
+        owner: str = WORKER_ID,
+    ):
+        self.lease = Lease(name, ttl_seconds, owner)
+        self.on_elected = on_elected
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.lease.held
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.lease.release()
+
+    async def _run(self):
+        interval = self.lease.ttl.total_seconds() / 3
+        while True:
+            was_leader = self.is_leader
+            try:
+                await self.lease.acquire()
+            except Exception as e:
+                print(f"Error in leader election for {self.lease.name}: {e}")
+                self.lease.token = None
+
+            if self.is_leader and not was_leader:
+                print(f"{self.lease.owner} elected leader (token {self.lease.token})")
+                if self.on_elected:
+                    asyncio.create_task(self.on_elected())
+            elif was_leader and not self.is_leader:
+                print(f"{self.lease.owner} is no longer leader")
+
+            await asyncio.sleep(interval)
+
+
+async def run_exclusive(name: str, job: Callable[[], Awaitable], ttl_seconds: int = LEASE_TTL_SECONDS):
+    """Run `job` under a job-level lease, skipping if a previous run is still going."""
+    lease = Lease(f"job:{name}", ttl_seconds)
+    if not await lease.acquire():
+        print(f"Skipping {name}: previous run still in progress")
+        return SKIPPED
+    lease.start_heartbeat()
+    try:
+        return await job()
+    finally:
+        await lease.release()
+
@@ -1,4 +1,4 @@
-﻿from fastapi import FastAPI, UploadFile, File, HTTPException
+﻿from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import (
     payments,
@@ -10,14 +10,17 @@ from app.routes import (
     subscriptions,
     connections,
     loans,
-    utils
+    utils,
+    admin,
 )
 from fastapi.responses import JSONResponse
 from datetime import datetime
-from PIL import Image
-import pytesseract
-import io
-from app.scheduler import start_scheduler
+from app.scheduler import start_scheduler, stop_scheduler
+from app.tasks import job_queue, ocr_receipts, queue_upcoming_subscriptions, telemetry
+from app.core.config import OCR_ENABLED, PAYMENTS_ENABLED, RUN_WORKER_IN_APP
+from app.worker import worker
+from app.utils import ocr, ocr_cache, social_graph, stripe_client, user_search
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 
 app = FastAPI()
@@ -38,13 +41,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
 @app.on_event("startup")
 async def on_startup():
+    await queue_upcoming_subscriptions.ensure_indexes()
+    await job_queue.ensure_indexes()
+    await telemetry.ensure_collection()
+    await loans.ensure_indexes()
+    await connections.ensure_indexes()
+    await social_graph.graph.build()
+    await user_search.ensure_indexes()
+    # No-op once every user has current search fields
+    await job_queue.enqueue("backfill_user_search", dedupe_key="backfill_user_search")
+    if OCR_ENABLED:
+        await ocr_receipts.ensure_indexes()
+        await ocr_cache.ensure_indexes()
     start_scheduler()
     print("Scheduler started.")
+    if RUN_WORKER_IN_APP:
+        worker.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Hand the leader lease over straight away instead of waiting for expiry
+    await stop_scheduler()
+    loans.shutdown_pool()
+    ocr.pool.shutdown()
+    stripe_client.shutdown()
+    if RUN_WORKER_IN_APP:
+        await worker.stop()
 
 
 @app.get("/health")
@@ -55,11 +84,6 @@ async def health_check():
     )
 
 
-# Set tesseract path on Windows
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-
-
-
 # Include the authentication router
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(users.router, prefix="/users", tags=["users"])
@@ -73,5 +97,8 @@ app.include_router(
 )
 app.include_router(connections.router, prefix="/connections", tags=["connections"])
 app.include_router(loans.router, prefix="/loans", tags=["loans"])
-app.include_router(payments.router, prefix="/payments", tags=["payments"])
-app.include_router(utils.router, prefix="/utils", tags=["utils"])
+if PAYMENTS_ENABLED:
+    app.include_router(payments.router, prefix="/payments", tags=["payments"])
+if OCR_ENABLED:
+    app.include_router(utils.router, prefix="/utils", tags=["utils"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
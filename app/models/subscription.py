@@ -58,6 +58,7 @@ class SubscriptionResponse(SubscriptionBase):
     id: str
     createdAt: datetime
     updatedAt: datetime
+    nextDueAt: Optional[datetime] = None
 
 
 class SubscriptionRequest(BaseModel):
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Depends
+from app.core.config import ADMIN_EMAILS
+from app.routes.auth import get_current_user
+from app.tasks import telemetry
+from app.utils.social_graph import graph
+
+router = APIRouter()
+
+
+def require_admin(current_user: dict = Depends(get_current_user)):
+    """The signed-in user, if they are an admin. Admins are provisioned
+    outside the app: list their email in ADMIN_EMAILS, or set
+    is_admin: true on their user document."""
+    email = (current_user.get("email") or "").lower()
+    if not (current_user.get("is_admin") or email in ADMIN_EMAILS):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+
+@router.get("/jobs")
+async def get_job_stats(current_user: dict = Depends(require_admin)):
+    return {
+        # Across all workers, from the capped job_runs collection
+        "jobs": await telemetry.job_stats(),
+        # Histograms held by the worker serving this request
+        "local": telemetry.local_stats(),
+    }
+
+
+@router.get("/social_graph")
+async def get_social_graph_stats(current_user: dict = Depends(require_admin)):
+    # Size of the mutual-friends index held by the worker serving this request
+    return graph.stats()
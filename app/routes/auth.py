@@ -11,11 +11,12 @@ from app.core.security import hash_password, verify_password
 from app.core.jwt import create_access_token, get_current_user
 from app.db.mongo import db
 from app.utils.helpers import fix_id  # assuming you use the helper
+from app.utils.lazy import lazy_import
+from app.utils.user_search import search_fields
+from app.tasks.job_queue import enqueue
 from typing import Union, List
 from pydantic import BaseModel, EmailStr
 import httpx
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 import os
 import random
 import smtplib
@@ -25,6 +26,10 @@ from dotenv import load_dotenv
 # Ensure .env is loaded before accessing environment variables below
 load_dotenv()
 
+# Only needed for Google sign-in; loaded on first use
+id_token = lazy_import("google.oauth2.id_token")
+google_requests = lazy_import("google.auth.transport.requests")
+
 router = APIRouter()
 security = HTTPBasic()
 bearer_scheme = HTTPBearer()
@@ -93,6 +98,7 @@ async def register(user: User):
         "phone_verification_code": "",
         "is_phone_verified": False,
     }
+    user_data.update(search_fields(user_data))
 
     await collection.insert_one(user_data)
 
@@ -110,8 +116,16 @@ async def register(user: User):
     </html>
     """
 
-    # Sending verification email (consider running in a background thread/task)
-    send_verification_email(user_data["email"], html, text)
+    # Sent by the job worker so SMTP latency/failures don't block signup
+    await enqueue(
+        "send_verification_email",
+        {
+            "recipient_email": user_data["email"],
+            "email_content": html,
+            "alt_text": text,
+        },
+        queue="email",
+    )
     access_token = create_access_token(data={"sub": user_data["email"]})
 
     # Create response to force email verification step
@@ -154,15 +168,12 @@ async def resend_verification_code(req: ResendReq):
     </html>
     """
 
-    # Send the updated verification code to the user
-    try:
-        send_verification_email(req.email, html, text)
-    except Exception:
-        # Optional: revert code update on failure to send
-        # Keeping it simple: surface a server error
-        raise HTTPException(
-            status_code=500, detail="Failed to send verification email"
-        )
+    # Sent by the job worker, like the first code at signup
+    await enqueue(
+        "send_verification_email",
+        {"recipient_email": req.email, "email_content": html, "alt_text": text},
+        queue="email",
+    )
 
     return {"message": "Verification code resent"}
 
@@ -276,6 +287,7 @@ async def google_login_token(payload: TokenPayload):
             "phone_verification_code": "",
             "is_phone_verified": False,
         }
+        user_data.update(search_fields(user_data))
 
         await collection.insert_one(user_data)
 
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from app.db.mongo import db
 from bson import ObjectId
 from datetime import datetime
+from typing import Dict, List, Optional
 from app.routes.auth import get_current_user
+from app.utils import pagination
+from app.utils.social_graph import graph
 
 router = APIRouter()
 collection = db["connections"]
 users = db["users"]
 
+# What friend lists show of each user
+FRIEND_FIELDS = ["user_name", "first_name", "last_name", "email"]
+
 
 def to_object_id(id_str: str):
     try:
@@ -16,27 +22,56 @@ def to_object_id(id_str: str):
         raise HTTPException(status_code=400, detail=f"Invalid ObjectId: {id_str}")
 
 
+async def ensure_indexes():
+    # Both sides of the $or, in page order
+    await collection.create_index([("requesterId", 1), ("status", 1), ("_id", 1)])
+    await collection.create_index([("recipientId", 1), ("status", 1), ("_id", 1)])
+
+
+async def _connections_page(
+    user_oid: ObjectId, status: str, limit: int, cursor: Optional[str], response: Response
+) -> List[dict]:
+    """One page of the user's connections with `status`, oldest first."""
+    query = {
+        "$or": [{"requesterId": user_oid}, {"recipientId": user_oid}],
+        "status": status,
+        **pagination.after(cursor),
+    }
+    projection = {"requesterId": 1, "recipientId": 1, "status": 1}
+    cursor = collection.find(query, projection).sort("_id", 1).limit(limit + 1)
+    docs, next_cursor = pagination.page(await cursor.to_list(length=limit + 1), limit)
+    response.headers.update(pagination.cursor_headers(next_cursor))
+    return docs
+
+
+def _other_user(doc: dict, user_oid: ObjectId) -> ObjectId:
+    return doc["recipientId"] if doc["requesterId"] == user_oid else doc["requesterId"]
+
+
+async def _users_by_id(user_oids: List[ObjectId], fields: List[str]) -> Dict[ObjectId, dict]:
+    # One query for the whole page instead of a find_one per connection
+    cursor = users.find({"_id": {"$in": user_oids}}, {field: 1 for field in fields})
+    return {user["_id"]: user async for user in cursor}
+
 
 # ----------------------
 # Get Friends List
 # ----------------------
 @router.get("")
-async def get_friends(current_user: dict = Depends(get_current_user)):
+async def get_friends(
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    current_user: dict = Depends(get_current_user),
+):
     user_oid = current_user["_id"]
-
-    cursor = collection.find(
-        {
-            "$or": [{"requesterId": user_oid}, {"recipientId": user_oid}],
-            "status": "accepted",
-        }
-    )
+    docs = await _connections_page(user_oid, "accepted", limit, cursor, response)
+    friend_oids = [_other_user(doc, user_oid) for doc in docs]
+    found = await _users_by_id(friend_oids, FRIEND_FIELDS)
 
     friends = []
-    async for doc in cursor:
-        friend_oid = (
-            doc["recipientId"] if doc["requesterId"] == user_oid else doc["requesterId"]
-        )
-        user = await users.find_one({"_id": friend_oid})
+    for friend_oid in friend_oids:
+        user = found.get(friend_oid)
         if user:
             friends.append(
                 {
@@ -105,6 +140,7 @@ async def accept_friend_request(
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="No matching pending request.")
+    graph.add(requester_oid, recipient_oid)
     return {"message": "Friend request accepted."}
 
 
@@ -155,6 +191,7 @@ async def remove_friend(friend_id: str, current_user: dict = Depends(get_current
     )
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="No active friendship found.")
+    graph.remove(user_oid, friend_oid)
     return {"message": "Friend removed."}
 
 
@@ -163,21 +200,22 @@ async def remove_friend(friend_id: str, current_user: dict = Depends(get_current
 # Get Pending Requests
 # ----------------------
 @router.get("/pending_request")
-async def get_pending_requests(current_user: dict = Depends(get_current_user)):
+async def get_pending_requests(
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    current_user: dict = Depends(get_current_user),
+):
     user_oid = current_user["_id"]
-
-    cursor = collection.find(
-        {
-            "$or": [{"requesterId": user_oid}, {"recipientId": user_oid}],
-            "status": "pending",
-        }
+    docs = await _connections_page(user_oid, "pending", limit, cursor, response)
+    found = await _users_by_id(
+        [_other_user(doc, user_oid) for doc in docs], ["email", "first_name"]
     )
 
     requests = []
-    async for doc in cursor:
+    for doc in docs:
         is_sent = doc["requesterId"] == user_oid
-        other_user_id = doc["recipientId"] if is_sent else doc["requesterId"]
-        other_user = await users.find_one({"_id": other_user_id})
+        other_user = found.get(_other_user(doc, user_oid))
 
         if other_user:
             requests.append(
@@ -191,3 +229,55 @@ async def get_pending_requests(current_user: dict = Depends(get_current_user)):
             )
     return requests
 
+
+# ----------------------
+# Mutual Friends
+# ----------------------
+@router.get("/mutual/{user_id}")
+async def get_mutual_friends(
+    user_id: str,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+):
+    other_oid = to_object_id(user_id)
+    await graph.ensure_fresh()
+    mutual_oids = graph.mutual(current_user["_id"], other_oid)[:limit]
+    found = await _users_by_id(mutual_oids, FRIEND_FIELDS)
+    return [
+        {"userId": str(oid), **{field: found[oid].get(field) for field in FRIEND_FIELDS}}
+        for oid in mutual_oids
+        if oid in found
+    ]
+
+
+# ----------------------
+# People You May Know
+# ----------------------
+@router.get("/suggestions")
+async def get_suggestions(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+):
+    user_oid = current_user["_id"]
+    await graph.ensure_fresh()
+
+    # Skip people with a request already pending either way
+    pending = collection.find(
+        {"$or": [{"requesterId": user_oid}, {"recipientId": user_oid}], "status": "pending"},
+        {"requesterId": 1, "recipientId": 1},
+    )
+    exclude = tuple([_other_user(doc, user_oid) async for doc in pending])
+
+    ranked = graph.suggestions(user_oid, limit, exclude)
+    found = await _users_by_id([oid for oid, _ in ranked], ["user_name", "first_name", "last_name"])
+    return [
+        {
+            "userId": str(oid),
+            "user_name": found[oid].get("user_name"),
+            "first_name": found[oid].get("first_name"),
+            "last_name": found[oid].get("last_name"),
+            "mutual_friends": count,
+        }
+        for oid, count in ranked
+        if oid in found
+    ]
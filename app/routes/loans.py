@@ -1,10 +1,49 @@
-from typing import List, Optional, Literal, Dict
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
-from datetime import date
-from dateutil.relativedelta import relativedelta
+from typing import List, Optional, Literal
+from fastapi import APIRouter, HTTPException, Query, Depends, Body, Path
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, root_validator
+from datetime import date, datetime
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import json
+import math
+import time
+import numpy as np
+from app.core.config import (
+    LOAN_BATCH_MAX_SCENARIOS,
+    LOAN_BATCH_PROCESS_THRESHOLD,
+    LOAN_BATCH_WORKERS,
+    LOAN_CACHE_MONGO,
+    LOAN_CACHE_SIZE,
+    LOAN_CACHE_TTL_SECONDS,
+)
+from app.db.mongo import db
+from app.routes.auth import get_current_user
+from app.utils.amortization import (
+    Amortization,
+    AmortizationError,
+    add_months,
+    amortize,
+    from_document,
+    resume_state,
+    schedule_dates,
+    splice,
+    to_document,
+)
+from app.utils.helpers import fix_id
+from app.utils.lru import LRUCache
+from bson import ObjectId
 
 router = APIRouter()
+cache_collection = db["amortization_cache"]
+collection = db["loans"]
+transactions = db["transactions"]
+
+# Engine results per canonical request; shared read-only between requests
+_cache = LRUCache(LOAN_CACHE_SIZE)
+_mongo_stats = {"hits": 0, "misses": 0}
 
 
 # ─────── Pydantic Models ───────
@@ -47,130 +86,649 @@ class AmortizationEntry(BaseModel):
     remaining_principal: float
 
 
-class AmortizationSchedule(BaseModel):
+class LoanScenario(BaseModel):
+    """Fields to override on the base request; unset fields are inherited."""
+
+    name: Optional[str] = None
+    amount: Optional[float] = None
+    interest: Optional[float] = None
+    tenure_in_months: Optional[int] = None
+    tenure_in_years: Optional[int] = None
+    adjust: Optional[Literal["tenure", "emi"]] = None
+    repayments: Optional[List[Repayment]] = None
+    interest_revision: Optional[List[InterestRevision]] = None
+    adjusted_emi_schedule: Optional[List[AdjustedEMIEntry]] = None
+
+
+class BatchLoanRequest(BaseModel):
+    base: LoanRequest
+    scenarios: List[LoanScenario] = Field(
+        ..., min_items=1, max_items=LOAN_BATCH_MAX_SCENARIOS
+    )
+    include_schedules: bool = False
+
+
+class SolveRequest(BaseModel):
+    loan: LoanRequest
+    prepayment: Literal["recurring", "one_off"]
+    month: int = Field(1, gt=0, description="Lump-sum month, or first month of a recurring prepayment")
+    target_tenure_months: Optional[int] = Field(None, gt=0)
+    target_interest_saving_pct: Optional[float] = Field(None, gt=0, lt=100)
+    tolerance: float = Field(1.0, gt=0, description="Stop when the bracket is this narrow")
+    max_iterations: int = Field(100, gt=0, le=200)
+
+    @root_validator(skip_on_failure=True)
+    def one_target(cls, values):
+        targets = [values.get("target_tenure_months"), values.get("target_interest_saving_pct")]
+        if sum(t is not None for t in targets) != 1:
+            raise ValueError(
+                "Set exactly one of target_tenure_months or target_interest_saving_pct"
+            )
+        return values
+
+
+class LoanCreate(LoanRequest):
+    name: Optional[str] = None
+
+
+class LoanPayment(BaseModel):
+    """An extra payment on top of that month's EMI."""
+
+    month: int = Field(..., gt=0)
+    amount: float = Field(..., gt=0)
+    notes: Optional[str] = None
+
+
+class AmortizationSummary(BaseModel):
     loan_amount: float
     initial_interest_rate: float
     original_tenure_months: int
     final_tenure_months: int
     total_amount_paid: float
     total_interest_paid: float
-    schedule: List[AmortizationEntry]
 
 
-# ─────── Utility ───────
-def _emi(principal: float, rate: float, months: int) -> float:
-    if months <= 0 or principal <= 0:
-        return 0
-    factor = (1 + rate) ** months
-    return principal * rate * factor / (factor - 1)
+class AmortizationSchedule(AmortizationSummary):
+    schedule: List[AmortizationEntry]
 
 
 # ─────── Core Logic ───────
-def calculate_schedule(data: LoanRequest) -> AmortizationSchedule:
-    tenure_months = data.tenure_in_months or (data.tenure_in_years * 12)
-    monthly_rate = data.interest / (12 * 100)
-    remaining = data.amount
-    start_date = data.start_date or date.today()
+def tenure_of(data: LoanRequest) -> int:
+    return data.tenure_in_months or (data.tenure_in_years * 12)
+
+
+def _engine_inputs(data: LoanRequest) -> dict:
+    return {
+        "amount": data.amount,
+        "interest": data.interest,
+        "tenure_months": tenure_of(data),
+        "adjust": data.adjust,
+        "repayments": [(r.month, r.amount, r.recurring) for r in data.repayments or []],
+        "interest_revision": [(r.month, r.interest) for r in data.interest_revision or []],
+        "adjusted_emi_schedule": [(e.month, e.emi) for e in data.adjusted_emi_schedule or []],
+    }
+
 
-    rate_changes: Dict[int, float] = {
-        r.month: r.interest for r in data.interest_revision or []
+def request_key(data: LoanRequest) -> str:
+    """Hash of the normalised request.
+
+    Lists are sorted by month. The sort is stable, so entries for the same
+    month keep their request order, which decides which revision or EMI
+    change wins. start_date is left out: it only shifts the dates, which are
+    derived from the cached columns when the response is built.
+    """
+    inputs = _engine_inputs(data)
+    inputs["repayments"].sort(key=lambda r: (r[0], r[2], r[1]))
+    inputs["interest_revision"].sort(key=lambda r: r[0])
+    inputs["adjusted_emi_schedule"].sort(key=lambda e: e[0])
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _compute(data: LoanRequest, key: str) -> Amortization:
+    try:
+        result = amortize(**_engine_inputs(data))
+    except AmortizationError as e:
+        raise HTTPException(400, str(e))
+    _cache.put(key, result)
+    return result
+
+
+def run_amortization(data: LoanRequest) -> Amortization:
+    key = request_key(data)
+    return _cache.get(key) or _compute(data, key)
+
+
+async def load_amortization(data: LoanRequest) -> Amortization:
+    """run_amortization with the optional Mongo tier shared by all workers."""
+    if not LOAN_CACHE_MONGO:
+        return run_amortization(data)
+
+    key = request_key(data)
+    result = _cache.get(key)
+    if result is not None:
+        return result
+
+    doc = await cache_collection.find_one({"_id": key})
+    if doc:
+        _mongo_stats["hits"] += 1
+        result = from_document(doc)
+        _cache.put(key, result)
+        return result
+
+    _mongo_stats["misses"] += 1
+    result = _compute(data, key)
+    await cache_collection.replace_one(
+        {"_id": key},
+        {**to_document(result), "createdAt": datetime.utcnow()},
+        upsert=True,
+    )
+    return result
+
+
+async def ensure_indexes():
+    await collection.create_index([("userId", 1), ("createdAt", -1)])
+    await transactions.create_index([("linkedLoanId", 1), ("date", 1)])
+    if LOAN_CACHE_MONGO:
+        await cache_collection.create_index(
+            "createdAt", expireAfterSeconds=LOAN_CACHE_TTL_SECONDS
+        )
+
+
+def summarize(data: LoanRequest, result: Amortization) -> dict:
+    return {
+        "loan_amount": data.amount,
+        "initial_interest_rate": data.interest,
+        "original_tenure_months": tenure_of(data),
+        "final_tenure_months": result.months,
+        "total_amount_paid": round(result.total_amount_paid, 2),
+        "total_interest_paid": round(result.total_interest_paid, 2),
     }
 
-    emi_changes: Dict[int, float] = {
-        e.month: e.emi for e in sorted(data.adjusted_emi_schedule or [], key=lambda x: x.month)
+
+def _rounded(values: np.ndarray, digits: int = 2) -> List[float]:
+    return [round(v, digits) for v in values.tolist()]
+
+
+def to_columns(data: LoanRequest, result: Amortization) -> dict:
+    months = result.month.tolist()
+    start_date = data.start_date or date.today()
+    return {
+        **summarize(data, result),
+        "schedule": {
+            "month": months,
+            "date": [d.isoformat() for d in schedule_dates(start_date, months)],
+            "emi": _rounded(result.emi),
+            "interest_rate": _rounded(result.interest_rate, 4),
+            "principal_component": _rounded(result.principal),
+            "interest_component": _rounded(result.interest),
+            "prepayment": _rounded(result.prepayment),
+            "remaining_principal": _rounded(result.remaining),
+        },
     }
 
-    emi = emi_changes.get(1, _emi(remaining, monthly_rate, tenure_months))
-
-    total_interest_paid = 0.0
-    total_amount_paid = 0.0
-    schedule: List[AmortizationEntry] = []
-    current_rate = data.interest
-    month = 1
-    max_months = max(tenure_months * 3, 1500)
-
-    while remaining > 0 and month <= max_months:
-        # Interest revision
-        if month in rate_changes:
-            current_rate = rate_changes[month]
-            monthly_rate = current_rate / (12 * 100)
-            if data.adjust == "emi":
-                rem_term = tenure_months - month + 1
-                emi = _emi(remaining, monthly_rate, rem_term)
-
-        # EMI change
-        if month in emi_changes:
-            emi = emi_changes[month]
-
-        # Calculate interest/principal
-        interest = remaining * monthly_rate
-        principal = emi - interest
-        if principal < 0:
-            raise HTTPException(400, f"EMI {emi:.2f} too low to cover interest {interest:.2f} at month {month}")
-
-        # Calculate prepayment
-        prepayment = 0.0
-        for r in data.repayments or []:
-            if r.recurring and month >= r.month:
-                prepayment += r.amount
-            elif not r.recurring and month == r.month:
-                prepayment += r.amount
-
-        # Prevent overpay
-        if principal + prepayment > remaining:
-            prepayment = max(remaining - principal, 0)
-
-        # Calculate after payment
-        remaining -= (principal + prepayment)
-        total_interest_paid += interest
-        total_amount_paid += emi + prepayment
-        emi_date = start_date + relativedelta(months=month - 1)
-
-        # Final month — stop early
-        if remaining <= 0:
-            # schedule.append(AmortizationEntry(
-            #     month=month,
-            #     date=emi_date,
-            #     emi=round(emi, 2),
-            #     interest_rate=round(current_rate, 4),
-            #     principal_component=round(principal, 2),
-            #     interest_component=round(interest, 2),
-            #     prepayment=round(prepayment, 2),
-            #     remaining_principal=0.0,
-            # ))
-            break
-
-        # Normal case
-        schedule.append(AmortizationEntry(
+
+def calculate_schedule(
+    data: LoanRequest, result: Optional[Amortization] = None
+) -> AmortizationSchedule:
+    result = result or run_amortization(data)
+    start_date = data.start_date or date.today()
+
+    schedule = [
+        AmortizationEntry(
             month=month,
             date=emi_date,
             emi=round(emi, 2),
-            interest_rate=round(current_rate, 4),
+            interest_rate=round(rate, 4),
             principal_component=round(principal, 2),
             interest_component=round(interest, 2),
             prepayment=round(prepayment, 2),
             remaining_principal=round(remaining, 2),
-        ))
-
-        # Recalculate EMI after prepayment if needed
-        if data.adjust == "emi" and prepayment > 0 and remaining > 0:
-            rem_term = max(tenure_months - month, 1)
-            emi = _emi(remaining, monthly_rate, rem_term)
-
-        month += 1
-
-    return AmortizationSchedule(
-        loan_amount=data.amount,
-        initial_interest_rate=data.interest,
-        original_tenure_months=tenure_months,
-        final_tenure_months=len(schedule),
-        total_amount_paid=round(total_amount_paid, 2),
-        total_interest_paid=round(total_interest_paid, 2),
-        schedule=schedule,
-    )
+        )
+        for month, emi_date, emi, rate, principal, interest, prepayment, remaining in zip(
+            result.month.tolist(),
+            schedule_dates(start_date, result.month.tolist()),
+            result.emi.tolist(),
+            result.interest_rate.tolist(),
+            result.principal.tolist(),
+            result.interest.tolist(),
+            result.prepayment.tolist(),
+            result.remaining.tolist(),
+        )
+    ]
+
+    return AmortizationSchedule(**summarize(data, result), schedule=schedule)
+
+
+def apply_scenario(base: LoanRequest, scenario: LoanScenario) -> LoanRequest:
+    overrides = scenario.dict(exclude_unset=True, exclude={"name"})
+    if "tenure_in_years" in overrides and "tenure_in_months" not in overrides:
+        overrides["tenure_in_months"] = None  # years override a base in months
+    return LoanRequest(**{**base.dict(), **overrides})
+
+
+def evaluate_scenarios(requests: List[LoanRequest], include_schedules: bool) -> List[dict]:
+    """Summaries (and optionally columnar schedules) for each request.
+
+    Runs in pool processes for large batches, so errors are returned per
+    scenario rather than raised.
+    """
+    results = []
+    for data in requests:
+        try:
+            amortized = run_amortization(data)
+        except HTTPException as e:
+            results.append({"error": e.detail})
+            continue
+        if include_schedules:
+            results.append(to_columns(data, amortized))
+        else:
+            results.append(summarize(data, amortized))
+    return results
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=LOAN_BATCH_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _evaluate_batch(requests: List[LoanRequest], include_schedules: bool) -> List[dict]:
+    if len(requests) < LOAN_BATCH_PROCESS_THRESHOLD:
+        return evaluate_scenarios(requests, include_schedules)
+
+    # One chunk per worker keeps pickling overhead to a few round trips
+    loop = asyncio.get_running_loop()
+    chunk = -(-len(requests) // LOAN_BATCH_WORKERS)
+    futures = [
+        loop.run_in_executor(
+            _get_pool(), evaluate_scenarios, requests[i : i + chunk], include_schedules
+        )
+        for i in range(0, len(requests), chunk)
+    ]
+    return [result for part in await asyncio.gather(*futures) for result in part]
+
+
+def _comparison_row(name: str, result: dict, base: dict) -> dict:
+    if "error" in result:
+        return {"name": name, "error": result["error"]}
+    return {
+        "name": name,
+        "final_tenure_months": result["final_tenure_months"],
+        "total_amount_paid": result["total_amount_paid"],
+        "total_interest_paid": result["total_interest_paid"],
+        "interest_saved": round(base["total_interest_paid"] - result["total_interest_paid"], 2),
+        "months_saved": base["final_tenure_months"] - result["final_tenure_months"],
+    }
+
+
+def _prepayment_evaluator(payload: SolveRequest):
+    """Summary-only evaluation of the loan with an extra prepayment of x.
+
+    Calls the engine directly so the probes don't churn the result cache.
+    """
+    inputs = _engine_inputs(payload.loan)
+    base_repayments = inputs.pop("repayments")
+    recurring = payload.prepayment == "recurring"
+
+    def evaluate(x: float) -> Amortization:
+        extra = [(payload.month, x, recurring)] if x > 0 else []
+        return amortize(repayments=base_repayments + extra, **inputs)
+
+    return evaluate
+
+
+def solve_prepayment(payload: SolveRequest) -> dict:
+    started = time.perf_counter()
+    evaluate = _prepayment_evaluator(payload)
+
+    try:
+        baseline = evaluate(0)
+    except AmortizationError as e:
+        raise HTTPException(400, str(e))
+
+    def probe(x: float) -> Amortization:
+        # The loan is valid but this prepayment breaks it, e.g. an EMI
+        # change that no longer covers the interest on the new balance
+        try:
+            return evaluate(x)
+        except AmortizationError as e:
+            raise HTTPException(422, f"Prepayment of {x:.2f} makes the schedule invalid: {e}")
+
+    if payload.target_tenure_months is not None:
+        def meets(result: Amortization) -> bool:
+            return result.months <= payload.target_tenure_months
+    else:
+        target_interest = baseline.total_interest_paid * (
+            1 - payload.target_interest_saving_pct / 100
+        )
+
+        def meets(result: Amortization) -> bool:
+            return result.total_interest_paid <= target_interest
+
+    iterations = 0
+    lo, hi = 0.0, float(payload.loan.amount)
+    if meets(baseline):
+        hi = 0.0
+    elif not meets(probe(hi)):
+        raise HTTPException(
+            422, "Target cannot be reached with a prepayment up to the loan amount"
+        )
+
+    # More prepayment never lengthens the loan or adds interest, so bisect on
+    # the smallest amount that meets the target.
+    while hi - lo > payload.tolerance and iterations < payload.max_iterations:
+        iterations += 1
+        mid = (lo + hi) / 2
+        if meets(probe(mid)):
+            hi = mid
+        else:
+            lo = mid
+
+    amount = math.ceil(hi * 100) / 100
+    result = probe(amount)
+    return {
+        "prepayment": payload.prepayment,
+        "month": payload.month,
+        "amount": amount,
+        "iterations": iterations,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "baseline": summarize(payload.loan, baseline),
+        "solution": summarize(payload.loan, result),
+        "interest_saved": round(baseline.total_interest_paid - result.total_interest_paid, 2),
+        "months_saved": baseline.months - result.months,
+    }
 
 
 # ─────── API Endpoint ───────
 @router.post("/amortization", response_model=AmortizationSchedule)
-async def amortization(data: LoanRequest):
-    return calculate_schedule(data)
+async def amortization(
+    data: LoanRequest,
+    format: Literal["rows", "columnar"] = Query(
+        "rows", description="columnar returns one array per field instead of row objects"
+    ),
+    summary_only: bool = Query(False, description="Return totals and final tenure only"),
+):
+    # Columnar and summary responses are plain JSON, built without per-row
+    # models and returned directly so response_model validation is skipped.
+    result = await load_amortization(data)
+    if summary_only:
+        return JSONResponse(content=summarize(data, result))
+    if format == "columnar":
+        return JSONResponse(content=to_columns(data, result))
+    return calculate_schedule(data, result)
+
+
+@router.get("/amortization/cache")
+async def amortization_cache_stats():
+    return {"memory": _cache.stats(), "mongo": {"enabled": LOAN_CACHE_MONGO, **_mongo_stats}}
+
+
+@router.post("/amortization/batch")
+async def amortization_batch(payload: BatchLoanRequest):
+    base = await load_amortization(payload.base)
+    base_summary = summarize(payload.base, base)
+
+    requests = []
+    for scenario in payload.scenarios:
+        try:
+            requests.append(apply_scenario(payload.base, scenario))
+        except ValueError as e:
+            raise HTTPException(422, f"Invalid scenario {scenario.name or ''}: {e}")
+
+    results = await _evaluate_batch(requests, payload.include_schedules)
+
+    comparison = [_comparison_row("base", base_summary, base_summary)] + [
+        _comparison_row(scenario.name or f"scenario_{i + 1}", result, base_summary)
+        for i, (scenario, result) in enumerate(zip(payload.scenarios, results))
+    ]
+    response = {"base": base_summary, "comparison": comparison}
+    if payload.include_schedules:
+        response["base"] = to_columns(payload.base, base)
+        response["scenarios"] = results
+    return JSONResponse(content=response)
+
+
+@router.post("/solve")
+async def solve(payload: SolveRequest):
+    # Dozens of full amortizations; keep them off the event loop
+    return await asyncio.to_thread(solve_prepayment, payload)
+
+
+
+# ─────── Persisted Loans ───────
+LOAN_REQUEST_FIELDS = set(LoanRequest.__fields__)
+
+
+def _loan_request(doc: dict) -> LoanRequest:
+    request = {k: v for k, v in doc.items() if k in LOAN_REQUEST_FIELDS}
+    if isinstance(request.get("start_date"), datetime):
+        request["start_date"] = request["start_date"].date()
+    return LoanRequest(**request)
+
+
+def _request_fields(data: LoanRequest) -> dict:
+    fields = data.dict()
+    # BSON has no plain date type
+    fields["start_date"] = datetime.combine(data.start_date or date.today(), datetime.min.time())
+    return fields
+
+
+def _recompute(doc: dict, data: LoanRequest, from_month: int) -> Amortization:
+    """Schedule after a change that only affects months >= from_month.
+
+    Earlier months are kept from the stored schedule and the engine resumes
+    from the stored state at from_month, instead of starting from month 1.
+    """
+    stored = from_document(doc["schedule"])
+    tenure_months = tenure_of(data)
+    if from_month - 1 > stored.months:
+        return stored  # paid off before the change takes effect
+
+    state = resume_state(stored, from_month, data.adjust, tenure_months)
+    if state is None:
+        return run_amortization(data)
+    try:
+        suffix = amortize(**_engine_inputs(data), state=state)
+    except AmortizationError as e:
+        raise HTTPException(400, str(e))
+    return splice(stored, suffix, from_month)
+
+
+def _loan_response(doc: dict) -> dict:
+    data = _loan_request(doc)
+    result = from_document(doc["schedule"])
+    response = fix_id({k: v for k, v in doc.items() if k != "schedule"})
+    response["start_date"] = data.start_date.isoformat()
+    response.update(to_columns(data, result))
+    return response
+
+
+async def _get_owned_loan(loan_id: str, current_user: dict) -> dict:
+    try:
+        loan_oid = ObjectId(loan_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid loan ID")
+    doc = await collection.find_one({"_id": loan_oid, "userId": current_user["_id"]})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    return doc
+
+
+async def _save_recomputed(doc: dict, data: LoanRequest, from_month: int, changes: dict) -> dict:
+    result = _recompute(doc, data, from_month)
+    update = {
+        **changes,
+        "schedule": to_document(result),
+        **summarize(data, result),
+        "updatedAt": datetime.utcnow(),
+    }
+    # Optimistic concurrency: a concurrent change would have bumped version
+    saved = await collection.find_one_and_update(
+        {"_id": doc["_id"], "version": doc.get("version", 0)},
+        {"$set": update, "$inc": {"version": 1}},
+        return_document=True,
+    )
+    if saved is None:
+        raise HTTPException(status_code=409, detail="Loan was modified concurrently, retry")
+    return saved
+
+
+@router.post("", status_code=201)
+async def create_loan(data: LoanCreate, current_user: dict = Depends(get_current_user)):
+    loan = LoanRequest(**data.dict(exclude={"name"}))
+    result = run_amortization(loan)
+    now = datetime.utcnow()
+    doc = {
+        **_request_fields(loan),
+        "name": data.name,
+        "userId": current_user["_id"],
+        "payments": [],
+        "schedule": to_document(result),
+        **summarize(loan, result),
+        "version": 0,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+    inserted = await collection.insert_one(doc)
+    doc["_id"] = inserted.inserted_id
+    return JSONResponse(status_code=201, content=jsonable_encoder(_loan_response(doc)))
+
+
+@router.get("")
+async def list_loans(current_user: dict = Depends(get_current_user)):
+    cursor = collection.find({"userId": current_user["_id"]}, {"schedule": 0}).sort(
+        "createdAt", -1
+    )
+    return [fix_id(doc) async for doc in cursor]
+
+
+@router.get("/{loan_id}")
+async def get_loan(loan_id: str = Path(...), current_user: dict = Depends(get_current_user)):
+    doc = await _get_owned_loan(loan_id, current_user)
+    return JSONResponse(content=jsonable_encoder(_loan_response(doc)))
+
+
+@router.delete("/{loan_id}")
+async def delete_loan(loan_id: str = Path(...), current_user: dict = Depends(get_current_user)):
+    doc = await _get_owned_loan(loan_id, current_user)
+    await collection.delete_one({"_id": doc["_id"]})
+    return {"message": "Loan deleted successfully"}
+
+
+@router.post("/{loan_id}/payments")
+async def add_loan_payment(
+    loan_id: str = Path(...),
+    payment: LoanPayment = Body(...),
+    current_user: dict = Depends(get_current_user),
+):
+    doc = await _get_owned_loan(loan_id, current_user)
+    data = _loan_request(doc)
+    data.repayments = (data.repayments or []) + [
+        Repayment(month=payment.month, amount=payment.amount)
+    ]
+    recorded = {**payment.dict(), "recordedAt": datetime.utcnow()}
+    saved = await _save_recomputed(
+        doc,
+        data,
+        payment.month,
+        {
+            "repayments": [r.dict() for r in data.repayments],
+            "payments": doc.get("payments", []) + [recorded],
+        },
+    )
+    return JSONResponse(content=jsonable_encoder(_loan_response(saved)))
+
+
+@router.post("/{loan_id}/revisions")
+async def add_loan_revision(
+    loan_id: str = Path(...),
+    revision: InterestRevision = Body(...),
+    current_user: dict = Depends(get_current_user),
+):
+    doc = await _get_owned_loan(loan_id, current_user)
+    data = _loan_request(doc)
+    data.interest_revision = (data.interest_revision or []) + [revision]
+    saved = await _save_recomputed(
+        doc,
+        data,
+        revision.month,
+        {"interest_revision": [r.dict() for r in data.interest_revision]},
+    )
+    return JSONResponse(content=jsonable_encoder(_loan_response(saved)))
+
+
+@router.get("/{loan_id}/reconciliation")
+async def reconcile_loan(loan_id: str = Path(...), current_user: dict = Depends(get_current_user)):
+    """Compare linked transactions (linkedLoanId) with what the schedule expects."""
+    doc = await _get_owned_loan(loan_id, current_user)
+    data = _loan_request(doc)
+    result = from_document(doc["schedule"])
+    start_date = data.start_date
+
+    paid_by_month = {}
+    unmatched = []
+    cursor = transactions.find(
+        {
+            "linkedLoanId": {"$in": [loan_id, doc["_id"]]},
+            "userId": current_user["_id"],
+            "status": {"$in": ["completed", "partially_paid"]},
+        },
+        {"amount": 1, "date": 1},
+    )
+    async for tx in cursor:
+        tx_date = tx.get("date")
+        if not isinstance(tx_date, datetime):
+            unmatched.append(str(tx["_id"]))
+            continue
+        month = (tx_date.year - start_date.year) * 12 + tx_date.month - start_date.month + 1
+        if month < 1 or month > result.months:
+            unmatched.append(str(tx["_id"]))
+            continue
+        paid_by_month[month] = paid_by_month.get(month, 0.0) + tx.get("amount", 0)
+
+    today = date.today()
+    rows = []
+    for month, emi, prepayment in zip(
+        result.month.tolist(), result.emi.tolist(), result.prepayment.tolist()
+    ):
+        due_date = add_months(start_date, month - 1)
+        scheduled = round(emi + prepayment, 2)
+        paid = round(paid_by_month.get(month, 0.0), 2)
+        if paid >= scheduled:
+            status = "paid"
+        elif paid > 0:
+            status = "partial"
+        elif due_date < today:
+            status = "missed"
+        else:
+            status = "upcoming"
+        rows.append(
+            {
+                "month": month,
+                "date": due_date.isoformat(),
+                "scheduled": scheduled,
+                "paid": paid,
+                "difference": round(paid - scheduled, 2),
+                "status": status,
+            }
+        )
+
+    return {
+        "loanId": loan_id,
+        "schedule": rows,
+        "total_scheduled": round(sum(r["scheduled"] for r in rows), 2),
+        "total_paid": round(sum(paid_by_month.values()), 2),
+        "unmatched_transactions": unmatched,
+    }
@@ -1,13 +1,13 @@
 ﻿from fastapi import APIRouter, HTTPException, Depends, Body
 from pydantic import BaseModel, Field
 from typing import Dict, Any
+from app.core.config import STRIPE_SECRET_KEY
 from app.core.jwt import get_current_user
 from app.db.mongo import db
+from app.utils import stripe_client
+from app.utils.stripe_client import stripe
 from bson import ObjectId
 from datetime import datetime
-import os
-
-import stripe
 
 router = APIRouter()
 
@@ -25,9 +25,7 @@ async def create_checkout_session(
     if session_req.mode != "subscription":
         raise HTTPException(status_code=400, detail="Invalid mode")
 
-    # Ensure API key per-request
-    stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-    if not stripe.api_key:
+    if not STRIPE_SECRET_KEY:
         raise HTTPException(
             status_code=500, detail="STRIPE_SECRET_KEY not configured in environment."
         )
@@ -36,7 +34,7 @@ async def create_checkout_session(
         print("Creating checkout session for user:", current_user.get("customer_id"))
 
         if not current_user.get("customer_id"):
-            checkout_session = stripe.checkout.Session.create(
+            checkout_session = await stripe_client.create_checkout_session(
                 payment_method_types=["card"],
                 mode="subscription",
                 line_items=[{"price": session_req.priceId, "quantity": 1}],
@@ -46,7 +44,7 @@ async def create_checkout_session(
                 cancel_url="http://localhost:3000/payment/cancel",
             )
         else:
-            checkout_session = stripe.checkout.Session.create(
+            checkout_session = await stripe_client.create_checkout_session(
                 customer=current_user.get("customer_id"),
                 payment_method_types=["card"],
                 mode="subscription",
@@ -75,17 +73,15 @@ async def checkout_success(
     payload: CheckoutSessionRetrieve = Body(...),
     current_user: dict = Depends(get_current_user),
 ):
-    # Configure Stripe per-request
-    stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-    if not stripe.api_key:
+    if not STRIPE_SECRET_KEY:
         raise HTTPException(
             status_code=500, detail="STRIPE_SECRET_KEY not configured in environment."
         )
 
-    # Retrieve session
+    # Retrieve session, with its subscription, price and product expanded
     session_id = payload.session_id
     try:
-        session = stripe.checkout.Session.retrieve(session_id)
+        session = await stripe_client.retrieve_checkout_session(session_id)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Session not found: {str(e)}")
 
@@ -109,6 +105,9 @@ async def checkout_success(
             status_code=403, detail="Session does not belong to the current user"
         )
 
+    sub = session.get("subscription")
+    sub_id = sub.get("id") if sub else None
+
     # Base response
     result: Dict[str, Any] = {
         "id": session.get("id"),
@@ -117,7 +116,7 @@ async def checkout_success(
         "mode": session.get("mode"),
         "customer_email": session_email,
         "client_reference_id": session_client_ref,
-        "subscription": session.get("subscription"),
+        "subscription": sub_id,
     }
 
     # Persist in two collections when subscription is successful
@@ -125,112 +124,20 @@ async def checkout_success(
         is_success = (session.get("status") == "complete") or (
             session.get("payment_status") in ("paid", "no_payment_required")
         )
-        sub_id = session.get("subscription")
-        if is_success and session.get("mode") == "subscription" and sub_id:
-            # Retrieve subscription and extract key fields
-            sub = None
-            try:
-                sub = stripe.Subscription.retrieve(sub_id)
-                period_start_ts = (
-                    sub.get("current_period_start")
-                    if hasattr(sub, "get")
-                    else getattr(sub, "current_period_start", None)
-                )
-                period_end_ts = (
-                    sub.get("current_period_end")
-                    if hasattr(sub, "get")
-                    else getattr(sub, "current_period_end", None)
-                )
-                items = (
-                    (sub.get("items") or {}).get("data", [])
-                    if hasattr(sub, "get")
-                    else getattr(sub, "items", None).data
-                )
-                item = items[0] if items else None
-                price = (
-                    (
-                        item.get("price")
-                        if isinstance(item, dict)
-                        else getattr(item, "price", None)
-                    )
-                    if item
-                    else None
-                )
-                # Find tier: product name
-                product_ref = (
-                    (
-                        price.get("product")
-                        if isinstance(price, dict)
-                        else getattr(price, "product", None)
-                    )
-                    if price
-                    else None
-                )
-                tier = None
-                try:
-                    if isinstance(product_ref, str):
-                        prod = stripe.Product.retrieve(product_ref)
-                        tier = (
-                            prod.get("name")
-                            if hasattr(prod, "get")
-                            else getattr(prod, "name", None)
-                        )
-                    elif isinstance(product_ref, dict):
-                        tier = product_ref.get("name")
-                except Exception:
-                    # fallback to price nickname
-                    tier = (
-                        (
-                            price.get("nickname")
-                            if isinstance(price, dict)
-                            else getattr(price, "nickname", None)
-                        )
-                        if price
-                        else None
-                    )
-                amount_cents = (
-                    (
-                        price.get("unit_amount")
-                        if isinstance(price, dict)
-                        else getattr(price, "unit_amount", None)
-                    )
-                    if price
-                    else None
-                )
-                currency = (
-                    (
-                        price.get("currency")
-                        if isinstance(price, dict)
-                        else getattr(price, "currency", None)
-                    )
-                    if price
-                    else None
-                )
-                recurring = (
-                    (
-                        price.get("recurring")
-                        if isinstance(price, dict)
-                        else getattr(price, "recurring", None)
-                    )
-                    if price
-                    else None
-                )
-                interval = (
-                    (
-                        recurring.get("interval")
-                        if isinstance(recurring, dict)
-                        else getattr(recurring, "interval", None)
-                    )
-                    if recurring
-                    else None
-                )
-            except Exception:
-                period_start_ts = None
-                period_end_ts = None
-                tier = None
-                amount_cents = None
-                currency = None
-                interval = None
+        if is_success and session.get("mode") == "subscription" and sub:
+            # Everything below came expanded with the session
+            period_start_ts = sub.get("current_period_start")
+            period_end_ts = sub.get("current_period_end")
+            items = (sub.get("items") or {}).get("data", [])
+            price = (items[0].get("price") if items else None) or {}
+            product = price.get("product")
+            # Tier: product name, else the price nickname
+            tier = (product.get("name") if isinstance(product, dict) else None) or price.get(
+                "nickname"
+            )
+            amount_cents = price.get("unit_amount")
+            currency = price.get("currency")
+            interval = (price.get("recurring") or {}).get("interval")
 
             starts_at = (
                 datetime.utcfromtimestamp(period_start_ts)
@@ -269,15 +176,7 @@ async def checkout_success(
                             "ends_at": ends_at,
                             "is_recurring": is_recurring,
                             "interval": interval,
-                            "status": (
-                                (
-                                    sub.get("status")
-                                    if hasattr(sub, "get")
-                                    else getattr(sub, "status", None)
-                                )
-                                if sub
-                                else None
-                            ),
+                            "status": sub.get("status"),
                             "subscription_id": sub_id,
                             "updated_at": datetime.utcnow(),
                         },
@@ -294,20 +193,9 @@ async def checkout_success(
                     stripe_customer_id = existing_cust["_id"] if existing_cust else None
 
                 # 2) Upsert transaction by session_id (idempotent per session)
-                try:
-                    session_dict = session.to_dict()  # type: ignore[attr-defined]
-                except Exception:
-                    session_dict = {
-                        "id": session.get("id"),
-                        "status": session.get("status"),
-                        "payment_status": session.get("payment_status"),
-                        "mode": session.get("mode"),
-                        "customer": session.get("customer"),
-                    }
-                try:
-                    sub_dict = sub.to_dict() if sub else None  # type: ignore[attr-defined]
-                except Exception:
-                    sub_dict = None
+                # The subscription is stored on its own, not again in the session
+                session_dict = {**stripe_client.to_dict(session), "subscription": sub_id}
+                sub_dict = stripe_client.to_dict(sub)
 
                 existing_txn = await txn_col.find_one({"session_id": sess_id})
                 if existing_txn:
@@ -10,6 +10,7 @@ from bson import ObjectId
 from datetime import datetime
 from typing import List
 from app.utils.helpers import fix_id
+from app.utils.recurrence import next_due_at
 from app.routes.auth import get_current_user  # 👈 New import
 
 router = APIRouter()
@@ -40,6 +41,7 @@ async def create_subscription(
     data["userId"] = current_user["_id"]
     data["createdAt"] = now
     data["updatedAt"] = now
+    data["nextDueAt"] = next_due_at(data, now)
 
     result = await collection.insert_one(data)
     created = await collection.find_one({"_id": result.inserted_id})
@@ -59,9 +61,17 @@ async def update_subscription(
         raise HTTPException(status_code=400, detail="Invalid subscription ID")
 
     query = {"_id": sub_object_id, "userId": ObjectId(current_user["_id"])}
-    update = {"$set": {k: v for k, v in payload.dict().items() if v is not None}}
+    changes = {k: v for k, v in payload.dict().items() if v is not None}
 
-    result = await collection.update_one(query, update)
+    existing = await collection.find_one(query)
+    if not existing:
+        raise HTTPException(
+            status_code=404, detail="Subscription not found or no changes made"
+        )
+    # Keep the stored due date in step with the schedule fields
+    changes["nextDueAt"] = next_due_at({**existing, **changes}, datetime.utcnow())
+
+    result = await collection.update_one(query, {"$set": changes})
 
     if result.modified_count == 0:
         raise HTTPException(
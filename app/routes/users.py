@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from fastapi.security import (
     HTTPBasic,
     HTTPBearer,
@@ -7,78 +8,70 @@ from app.models.user import User, UserOut, LoginRequest, UserResponse
 from app.core.security import hash_password, verify_password
 from app.core.jwt import create_access_token, get_current_user
 from app.db.mongo import db
+from app.routes.admin import require_admin
+from app.utils import pagination, user_search
 from app.utils.helpers import fix_id  # assuming you use the helper
-from typing import Union, List
+from typing import Union, List, Optional
 import re
-from pymongo import ASCENDING
 
 router = APIRouter()
 security = HTTPBasic()
 bearer_scheme = HTTPBearer()
 collection = db["users"]
 
-@router.get("", response_model=List[UserResponse])
-async def get_users():
-    users = await get_all_users_from_db()
-    # Exclude password from response
-    return [UserResponse(**user.dict(exclude={"password"})) for user in users]
-
+def _user_response(user: dict) -> dict:
+    # A plain dict: /search lets its response_model build the UserResponse
+    # once, the listing returns it as JSON. Google sign-ups store None for
+    # fields the user has not filled in yet
+    return {
+        "id": str(user["_id"]),
+        "user_name": user.get("user_name") or "",
+        "email": user.get("email") or "",
+        "first_name": user.get("first_name") or "",
+        "last_name": user.get("last_name") or "",
+        "phone": user.get("phone") or "",
+        "date_of_birth": user.get("date_of_birth") or "",
+        "is_email_verified": user.get("is_email_verified", False),
+        "is_phone_verified": user.get("is_phone_verified", False),
+        "profile_image": user.get("profile_image") or "",
+    }
 
-async def get_all_users_from_db():
-    users_raw = await db["users"].find().to_list(length=100)
-    users = []
 
-    for user in users_raw:
-        users.append(
-            UserResponse(
-                id=str(user["_id"]),
-                first_name=user["first_name"],
-                last_name=user["last_name"],
-                user_name=user["user_name"],
-                email=user["email"],
-                phone=user["phone"],
-                date_of_birth=user["date_of_birth"],
-                profile_image=user["profile_image"],
-                is_phone_verified=user["is_phone_verified"],
-                is_email_verified=user["is_email_verified"],
-            )
-        )
-
-    return users
+@router.get("", response_model=List[UserResponse])
+async def get_users(
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(require_admin),
+):
+    """Every user's contact details in `_id` order, one page at a time;
+    admins only, others find people through /search. The next page's
+    cursor is in the X-Next-Cursor header."""
+    docs = (
+        await collection.find(pagination.after(cursor), user_search.PROJECTION)
+        .sort("_id", 1)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    docs, next_cursor = pagination.page(docs, limit)
+    # Returned directly so response_model validation is skipped: it would
+    # re-run EmailStr checks on every stored email, half the request's CPU
+    return JSONResponse(
+        content=[_user_response(user) for user in docs],
+        headers=pagination.cursor_headers(next_cursor),
+    )
 
 
 @router.get("/search", response_model=List[UserResponse])
 async def search_users(
     query: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
     current_user: dict = Depends(get_current_user),
 ):
-    cursor = collection.find(
-        {
-            "$or": [
-                {"user_name": query},
-                {"email": query},
-            ]
-        }
-    ).sort("user_name", ASCENDING)
-
-    result = []
-    async for user in cursor:
-        result.append(
-            UserResponse(
-                id=str(user["_id"]),
-                user_name=user.get("user_name", ""),
-                email=user.get("email", ""),
-                first_name=user.get("first_name", ""),
-                last_name=user.get("last_name", ""),
-                phone=user.get("phone", ""),
-                date_of_birth=user.get("date_of_birth", ""),
-                is_email_verified=user.get("is_email_verified", False),
-                is_phone_verified=user.get("is_phone_verified", False),
-                profile_image=user.get("profile_image"),
-            )
-        )
-
-    return result
+    """Type-ahead search: exact and prefix matches on username, name and
+    email (case- and accent-insensitive), then fuzzy matches. The caller
+    is never included."""
+    users = await user_search.search(query, current_user["_id"], limit)
+    return [_user_response(user) for user in users]
 
 
 @router.get("/current_user", response_model=UserOut)
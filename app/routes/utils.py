@@ -1,26 +1,273 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-from PIL import Image
-import pytesseract
-import io
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from bson import ObjectId
+import asyncio
+import json
+import time
+from typing import List, Optional
+from app.core.config import (
+    OCR_BATCH_CONCURRENCY,
+    OCR_BATCH_MAX_IMAGES,
+    OCR_MAX_UPLOAD_BYTES,
+    RECEIPT_EVENTS_POLL_SECONDS,
+    RECEIPT_EVENTS_TIMEOUT_SECONDS,
+)
+from app.core.jwt import get_current_user, get_optional_user
+from app.tasks import ocr_receipts
+from app.utils import ocr, ocr_cache
+from app.utils.helpers import fix_id
+from app.utils.preprocess import ImageTooLarge, PreprocessError, check_dimensions, image_size
 
 router = APIRouter()
 
-@router.post("/extract_receipt")
-async def extract_receipt(image: UploadFile = File(...)):
-    if image.content_type not in ["image/jpeg", "image/png"]:
+SUPPORTED_IMAGE_TYPES = ["image/jpeg", "image/png"]
+# Only what clients need; fileId, jobId and the owner stay internal
+RECEIPT_PROJECTION = {"fileId": 0, "jobId": 0, "maxAttempts": 0, "userId": 0}
+SSE_KEEPALIVE_SECONDS = 15
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def _check_image_type(image: UploadFile):
+    if image.content_type not in SUPPORTED_IMAGE_TYPES:
         raise HTTPException(
             status_code=400, detail="Only JPEG and PNG files are supported."
         )
 
-    # Read image from upload
-    image_bytes = await image.read()
-    img = Image.open(io.BytesIO(image_bytes))
 
-    # Extract text with pytesseract
+async def _read_image(image: UploadFile) -> bytes:
+    """The upload's bytes, once it is known to be within the size limits.
+
+    Starlette spools uploads to a temporary file. The pixel count comes from
+    the image header and the body is read in chunks, so an oversized or
+    decompression-bomb image is rejected before it is held in memory.
+    """
+    _check_image_type(image)
+    if image.size is not None and image.size > OCR_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=_too_many_bytes())
     try:
-        text = pytesseract.image_to_string(img)
+        await image.seek(0)
+        _, width, height = await asyncio.to_thread(image_size, image.file)
+        check_dimensions(width, height)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except PreprocessError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await image.seek(0)
+    chunks = []
+    size = 0
+    while True:
+        chunk = await image.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > OCR_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=_too_many_bytes())
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _too_many_bytes() -> str:
+    return f"Images must be at most {OCR_MAX_UPLOAD_BYTES / 1024 / 1024:g} MB"
+
+
+def _check_draft_options(create_transaction: bool, category: Optional[str], current_user):
+    if not create_transaction:
+        return
+    if current_user is None:
+        raise HTTPException(status_code=401, detail="Sign in to create a transaction")
+    if not category:
+        raise HTTPException(
+            status_code=400, detail="category is required to create a transaction"
+        )
+
+
+async def _recognize(image_bytes: bytes) -> dict:
+    # Cached, or preprocessed and run through tesseract in the OCR process
+    # pool, off the event loop
+    try:
+        return await ocr_cache.recognize(image_bytes)
+    except ocr.OcrBusy as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(ocr.pool.retry_after())},
+        )
+    except ocr.OcrUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ocr.OcrTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except PreprocessError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    return JSONResponse(content={"raw_text": text})
+
+@router.post("/extract_receipt")
+async def extract_receipt(
+    image: UploadFile = File(...),
+    create_transaction: bool = Query(False),
+    category: Optional[str] = Query(None),
+    current_user: Optional[dict] = Depends(get_optional_user),
+):
+    """OCR a receipt; `receipt` in the result has the parsed fields with
+    confidences. With create_transaction, a pending expense is also created
+    from them and returned as `transaction`."""
+    _check_draft_options(create_transaction, category, current_user)
+    result = await _recognize(await _read_image(image))
+
+    if create_transaction:
+        try:
+            result["transaction"] = await ocr_receipts.create_draft_transaction(
+                result["receipt"], current_user["_id"], category
+            )
+        except ocr_receipts.NoTotalError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.post("/extract_receipts")
+async def extract_receipts(images: List[UploadFile] = File(...), stream: bool = Query(False)):
+    """OCR several images in one request: the pages of a long receipt, or
+    the receipts of an expense report.
+
+    At most OCR_BATCH_CONCURRENCY images of a request are read and in the
+    OCR pool at a time. Results are returned in upload order, or with
+    stream=true as NDJSON lines as each image finishes; every result has
+    its `index`. An image that fails has an `error` instead of OCR fields
+    and does not fail the rest.
+    """
+    if len(images) > OCR_BATCH_MAX_IMAGES:
+        raise HTTPException(
+            status_code=400, detail=f"At most {OCR_BATCH_MAX_IMAGES} images per request"
+        )
+    semaphore = asyncio.Semaphore(OCR_BATCH_CONCURRENCY)
+
+    async def extract(index: int, image: UploadFile) -> dict:
+        page = {"index": index, "filename": image.filename}
+        async with semaphore:
+            try:
+                result = await _recognize(await _read_image(image))
+            except HTTPException as e:
+                return {**page, "error": {"status_code": e.status_code, "detail": e.detail}}
+        return {**page, **result}
+
+    tasks = [asyncio.create_task(extract(index, image)) for index, image in enumerate(images)]
+    if not stream:
+        results = await asyncio.gather(*tasks)
+        return JSONResponse(content=jsonable_encoder({"results": results}))
+
+    async def lines():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(jsonable_encoder(await next_done)) + "\n"
+        finally:
+            # Client went away: don't keep the OCR pool busy for it
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/ocr/metrics")
+async def ocr_metrics():
+    return {**ocr.pool.stats(), "cache": ocr_cache.stats()}
+
+
+# ─────── Background receipt OCR ───────
+def _receipt_oid(receipt_id: str) -> ObjectId:
+    try:
+        return ObjectId(receipt_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid receipt ID")
+
+
+@router.post("/receipts", status_code=202)
+async def submit_receipt(
+    image: UploadFile = File(...),
+    create_transaction: bool = Query(False),
+    category: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """Store the image and queue OCR; poll GET /receipts/{id} or stream its
+    events. With create_transaction, the finished receipt has the id of a
+    draft transaction in `transactionId`. Only the uploader can read it."""
+    _check_draft_options(create_transaction, category, current_user)
+    image_bytes = await _read_image(image)
+    receipt = await ocr_receipts.create_receipt(
+        image_bytes,
+        image.filename,
+        image.content_type,
+        user_id=ObjectId(current_user["_id"]),
+        category=category if create_transaction else None,
+    )
+    return {
+        "id": str(receipt["_id"]),
+        "status": receipt["status"],
+        "status_url": f"/utils/receipts/{receipt['_id']}",
+        "events_url": f"/utils/receipts/{receipt['_id']}/events",
+    }
+
+
+def _owned_receipt(receipt_id: str, current_user: dict) -> dict:
+    # Someone else's receipt is reported as missing, not forbidden
+    return {"_id": _receipt_oid(receipt_id), "userId": current_user["_id"]}
+
+
+@router.get("/receipts/{receipt_id}")
+async def get_receipt(receipt_id: str, current_user: dict = Depends(get_current_user)):
+    receipt = await ocr_receipts.collection.find_one(
+        _owned_receipt(receipt_id, current_user), RECEIPT_PROJECTION
+    )
+    if not receipt:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    return fix_id(receipt)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@router.get("/receipts/{receipt_id}/events")
+async def receipt_events(
+    receipt_id: str, request: Request, current_user: dict = Depends(get_current_user)
+):
+    """Server-sent events: a `status` event per status change, ending once
+    the receipt is done or failed."""
+    query = _owned_receipt(receipt_id, current_user)
+    if not await ocr_receipts.collection.find_one(query, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Receipt not found")
+
+    async def events():
+        last_status = None
+        last_sent = time.monotonic()
+        deadline = last_sent + RECEIPT_EVENTS_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if await request.is_disconnected():
+                return
+            receipt = await ocr_receipts.collection.find_one(query, RECEIPT_PROJECTION)
+            if receipt is None:
+                yield _sse("error", {"detail": "Receipt not found"})
+                return
+            if receipt["status"] != last_status:
+                last_status = receipt["status"]
+                last_sent = time.monotonic()
+                yield _sse("status", fix_id(receipt))
+                if last_status in ocr_receipts.FINISHED:
+                    return
+            elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                # Comment line: keeps proxies from closing an idle stream
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(RECEIPT_EVENTS_POLL_SECONDS)
+        yield _sse("timeout", {"status": last_status})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,42 @@
-import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from app.tasks.fetch_exchange_rates import fetch_and_store_rates
-from app.tasks.queue_upcoming_subscriptions import queue_upcoming_subscriptions
+from app.core.lease import LeaderElector
+from app.tasks.job_queue import enqueue
 
 scheduler = AsyncIOScheduler()
 
+
+def leader_only(task):
+    # Every worker keeps the same triggers; only the current leader enqueues,
+    # and the dedupe key stops a slow run piling up behind the next trigger.
+    # The job itself runs on whichever worker claims it.
+    async def run():
+        if not elector.is_leader:
+            return None
+        return await enqueue(task, dedupe_key=task)
+
+    run.__name__ = task
+    return run
+
+
+fetch_rates_job = leader_only("fetch_exchange_rates")
+queue_subscriptions_job = leader_only("queue_upcoming_subscriptions")
+
+
+async def on_elected():
+    await fetch_rates_job()  # run immediately on the new leader
+
+
+elector = LeaderElector("scheduler", on_elected=on_elected)
+
+
 def start_scheduler():
+    elector.start()
     scheduler.start()
-    asyncio.create_task(fetch_and_store_rates())  # run immediately
-    # asyncio.create_task(queue_upcoming_subscriptions())  # run immediately
-    scheduler.add_job(fetch_and_store_rates, IntervalTrigger(hours=12))
-    # scheduler.add_job(queue_upcoming_subscriptions, IntervalTrigger(hours=12))
+    scheduler.add_job(fetch_rates_job, IntervalTrigger(hours=12))
+    # scheduler.add_job(queue_subscriptions_job, IntervalTrigger(hours=12))
+
+
+async def stop_scheduler():
+    scheduler.shutdown(wait=False)
+    await elector.stop()
@@ -0,0 +1,33 @@
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+from app.core.config import USER_SEARCH_BACKFILL_BATCH_SIZE
+from app.db.mongo import db
+from app.utils.user_search import SEARCH_VERSION, search_fields
+
+collection = db["users"]
+
+SOURCE_FIELDS = {"user_name": 1, "first_name": 1, "last_name": 1, "email": 1}
+
+
+async def backfill_user_search(batch_size: int = USER_SEARCH_BACKFILL_BATCH_SIZE):
+    """Write search fields on users created before they existed, or under
+    an older SEARCH_VERSION. Updated users drop out of the query, so each
+    batch picks up where the last one ended."""
+    started = time.perf_counter()
+    updated = 0
+    while True:
+        batch = await collection.find(
+            {"searchVersion": {"$ne": SEARCH_VERSION}}, SOURCE_FIELDS
+        ).to_list(length=batch_size)
+        if not batch:
+            break
+        await collection.bulk_write(
+            [UpdateOne({"_id": user["_id"]}, {"$set": search_fields(user)}) for user in batch],
+            ordered=False,
+        )
+        updated += len(batch)
+
+    elapsed = round(time.perf_counter() - started, 3)
+    print(f"[{datetime.utcnow()}] User search backfill: updated={updated} in {elapsed}s")
+    return {"items_processed": updated, "elapsed_seconds": elapsed}
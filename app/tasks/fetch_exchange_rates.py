@@ -10,6 +10,7 @@ async def fetch_and_store_rates():
     try:
         async with httpx.AsyncClient() as client:
             response = await client.get(EXCHANGE_API_URL)
+            response.raise_for_status()
             data = response.json()
 
         # Prepare document
@@ -22,6 +23,8 @@ async def fetch_and_store_rates():
 
         await collection.replace_one({"base": "usd"}, document, upsert=True)
         print(f"[{datetime.utcnow()}] Exchange rates fetched and stored.")
+        return {"items_processed": len(document["rates"])}
 
     except Exception as e:
         print(f"Error fetching exchange rates: {e}")
+        raise  # let the job queue retry
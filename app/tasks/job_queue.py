@@ -0,0 +1,301 @@
+import asyncio
+import inspect
+import random
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import (
+    JOB_QUEUE_CONCURRENCY,
+    JOB_QUEUE_POLL_SECONDS,
+    JOB_VISIBILITY_TIMEOUT_SECONDS,
+)
+from app.core.lease import WORKER_ID, run_exclusive
+from app.tasks.telemetry import record_run
+from app.db.mongo import db
+
+collection = db["jobs"]
+dead_letters = db["jobs_dead"]
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+DONE_RETENTION_SECONDS = 7 * 24 * 3600
+
+TASKS: Dict[str, Callable] = {}
+
+
+def register(name: str, handler: Callable, exclusive: bool = False):
+    """Make `handler(**payload)` runnable as task `name`.
+
+    Sync handlers run in a thread. `exclusive` wraps the run in a job lease so
+    two workers never execute the task at the same time. Every run is
+    recorded in job_runs.
+    """
+
+    async def run(**payload):
+        if inspect.iscoroutinefunction(handler):
+            call = lambda: handler(**payload)
+        else:
+            call = lambda: asyncio.to_thread(handler, **payload)
+        if exclusive:
+            return await record_run(name, lambda: run_exclusive(name, call))
+        return await record_run(name, call)
+
+    TASKS[name] = run
+
+
+async def ensure_indexes():
+    await collection.create_index(
+        [("queue", ASCENDING), ("status", ASCENDING), ("runAt", ASCENDING)]
+    )
+    await collection.create_index(
+        [("queue", ASCENDING), ("status", ASCENDING), ("lockedUntil", ASCENDING)]
+    )
+    # Set only while a job is queued or running, so at most one active job
+    # per key even when several workers enqueue at once
+    await collection.create_index(
+        "activeDedupeKey",
+        unique=True,
+        partialFilterExpression={"activeDedupeKey": {"$exists": True}},
+    )
+    await collection.create_index(
+        "finishedAt", expireAfterSeconds=DONE_RETENTION_SECONDS
+    )
+
+
+async def enqueue(
+    task: str,
+    payload: Optional[Dict[str, Any]] = None,
+    queue: str = "default",
+    delay_seconds: float = 0,
+    max_attempts: int = 5,
+    dedupe_key: Optional[str] = None,
+):
+    """Persist a job and return its id.
+
+    With `dedupe_key`, a job that is already queued or running under the same
+    key is reused instead of adding another.
+    """
+    now = datetime.utcnow()
+    job = {
+        "queue": queue,
+        "task": task,
+        "payload": payload or {},
+        "status": QUEUED,
+        "attempts": 0,
+        "maxAttempts": max_attempts,
+        "runAt": now + timedelta(seconds=delay_seconds),
+        "dedupeKey": dedupe_key,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+    if dedupe_key is None:
+        result = await collection.insert_one(job)
+        return result.inserted_id
+
+    while True:
+        try:
+            doc = await collection.find_one_and_update(
+                {"activeDedupeKey": dedupe_key},
+                {"$setOnInsert": job},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return doc["_id"]
+        except DuplicateKeyError:
+            # A concurrent enqueue inserted first; reuse its job, or try
+            # again if that one has already finished
+            existing = await collection.find_one({"activeDedupeKey": dedupe_key}, {"_id": 1})
+            if existing is not None:
+                return existing["_id"]
+
+
+async def claim(queue: str, visibility_seconds: int = JOB_VISIBILITY_TIMEOUT_SECONDS):
+    """Atomically take the next due job, or one whose previous worker went quiet."""
+    now = datetime.utcnow()
+    return await collection.find_one_and_update(
+        {
+            "queue": queue,
+            "$or": [
+                {"status": QUEUED, "runAt": {"$lte": now}},
+                {"status": RUNNING, "lockedUntil": {"$lte": now}},
+            ],
+        },
+        {
+            "$set": {
+                "status": RUNNING,
+                "lockedBy": WORKER_ID,
+                "lockedUntil": now + timedelta(seconds=visibility_seconds),
+                "updatedAt": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("runAt", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _owned(job: dict) -> dict:
+    # Ignore writes from a worker whose claim has since been taken over
+    return {"_id": job["_id"], "lockedBy": WORKER_ID, "attempts": job["attempts"]}
+
+
+async def extend(job: dict, visibility_seconds: int = JOB_VISIBILITY_TIMEOUT_SECONDS):
+    await collection.update_one(
+        _owned(job),
+        {
+            "$set": {
+                "lockedUntil": datetime.utcnow() + timedelta(seconds=visibility_seconds)
+            }
+        },
+    )
+
+
+async def complete(job: dict, result: Any = None):
+    now = datetime.utcnow()
+    await collection.update_one(
+        _owned(job),
+        {
+            "$set": {
+                "status": DONE,
+                "result": result if isinstance(result, (dict, list, str, int, float)) else None,
+                "finishedAt": now,
+                "updatedAt": now,
+            },
+            "$unset": {"lockedBy": "", "lockedUntil": "", "activeDedupeKey": ""},
+        },
+    )
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def fail(job: dict, error: str):
+    now = datetime.utcnow()
+    if job["attempts"] >= job.get("maxAttempts", 1):
+        await dead_letter(job, error)
+        return
+
+    await collection.update_one(
+        _owned(job),
+        {
+            "$set": {
+                "status": QUEUED,
+                "runAt": now + timedelta(seconds=_backoff(job["attempts"])),
+                "lastError": error,
+                "updatedAt": now,
+            },
+            "$unset": {"lockedBy": "", "lockedUntil": ""},
+        },
+    )
+
+
+async def dead_letter(job: dict, error: str):
+    deleted = await collection.find_one_and_delete(_owned(job))
+    if deleted is None:
+        return
+    deleted["lastError"] = error
+    deleted["deadAt"] = datetime.utcnow()
+    await dead_letters.insert_one(deleted)
+    print(f"Job {job['_id']} ({job['task']}) moved to dead letters")
+
+
+async def get_job(job_id):
+    return await collection.find_one({"_id": job_id}) or await dead_letters.find_one(
+        {"_id": job_id}
+    )
+
+
+class Worker:
+    """Polls each queue with its own concurrency limit."""
+
+    def __init__(
+        self,
+        concurrency: Dict[str, int] = JOB_QUEUE_CONCURRENCY,
+        poll_seconds: float = JOB_QUEUE_POLL_SECONDS,
+        visibility_seconds: int = JOB_VISIBILITY_TIMEOUT_SECONDS,
+    ):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.visibility_seconds = visibility_seconds
+        self._loops = []
+        self._running = set()
+        self._stopping = False
+
+    def start(self):
+        self._stopping = False
+        for queue, limit in self.concurrency.items():
+            self._loops.append(asyncio.create_task(self._poll(queue, limit)))
+        print(f"Job worker {WORKER_ID} started: {self.concurrency}")
+
+    async def stop(self, timeout: float = 30):
+        self._stopping = True
+        for loop in self._loops:
+            loop.cancel()
+        self._loops = []
+        if self._running:
+            # Unfinished jobs become visible again once their lock expires
+            await asyncio.wait(set(self._running), timeout=timeout)
+
+    async def _poll(self, queue: str, limit: int):
+        slots = asyncio.Semaphore(limit)
+        while not self._stopping:
+            await slots.acquire()
+            try:
+                job = await claim(queue, self.visibility_seconds)
+            except Exception as e:
+                print(f"Error claiming from {queue}: {e}")
+                job = None
+            if job is None:
+                slots.release()
+                await asyncio.sleep(self.poll_seconds)
+                continue
+
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+
+            def done(t, slots=slots):
+                self._running.discard(t)
+                slots.release()
+
+            task.add_done_callback(done)
+
+    async def _keep_visible(self, job: dict):
+        while True:
+            await asyncio.sleep(self.visibility_seconds / 3)
+            try:
+                await extend(job, self.visibility_seconds)
+            except Exception as e:
+                # Keep trying; the job is only reclaimed once lockedUntil passes
+                print(f"Error extending job {job['_id']} ({job['task']}): {e}")
+
+    async def _execute(self, job: dict):
+        if job["attempts"] > job.get("maxAttempts", 1):
+            # Claimed after its last worker died mid-run too many times
+            await dead_letter(job, job.get("lastError") or "visibility timeout")
+            return
+
+        handler = TASKS.get(job["task"])
+        if handler is None:
+            await dead_letter(job, f"Unknown task {job['task']}")
+            return
+
+        heartbeat = asyncio.create_task(self._keep_visible(job))
+        try:
+            result = await handler(**job.get("payload", {}))
+        except Exception as e:
+            error = traceback.format_exc(limit=5)
+            print(f"Job {job['_id']} ({job['task']}) failed: {e}")
+            await fail(job, error)
+        else:
+            await complete(job, result)
+        finally:
+            heartbeat.cancel()
@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo import ReturnDocument
+from app.core.config import OCR_JOB_MAX_ATTEMPTS
+from app.db.mongo import db
+from app.models.transaction import TransactionCreate
+from app.tasks.job_queue import enqueue
+from app.utils import ocr_cache
+from app.utils.enums import TransactionStatus
+from app.utils.helpers import fix_id
+from app.utils.preprocess import PreprocessError
+
+collection = db["receipts"]
+transactions = db["transactions"]
+images = AsyncIOMotorGridFSBucket(db, bucket_name="receipt_images")
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+
+async def ensure_indexes():
+    await collection.create_index([("status", 1), ("createdAt", 1)])
+
+
+async def create_receipt(
+    image_bytes: bytes,
+    filename: str,
+    content_type: str,
+    user_id: Optional[ObjectId] = None,
+    category: Optional[str] = None,
+) -> dict:
+    """Store the image in GridFS and queue it for OCR. `user_id` owns the
+    receipt; with a category as well, a draft transaction is created once
+    the receipt is read."""
+    file_id = await images.upload_from_stream(
+        filename or "receipt", image_bytes, metadata={"contentType": content_type}
+    )
+    now = datetime.utcnow()
+    receipt = {
+        "status": QUEUED,
+        "fileId": file_id,
+        "filename": filename,
+        "contentType": content_type,
+        "size": len(image_bytes),
+        "attempts": 0,
+        "maxAttempts": OCR_JOB_MAX_ATTEMPTS,
+        "result": None,
+        "error": None,
+        "userId": user_id,
+        "category": category,
+        "transactionId": None,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+    inserted = await collection.insert_one(receipt)
+    receipt["_id"] = inserted.inserted_id
+
+    receipt["jobId"] = await enqueue(
+        "process_receipt",
+        {"receipt_id": str(inserted.inserted_id)},
+        queue="ocr",
+        max_attempts=OCR_JOB_MAX_ATTEMPTS,
+    )
+    await collection.update_one({"_id": receipt["_id"]}, {"$set": {"jobId": receipt["jobId"]}})
+    return receipt
+
+
+async def _finish(receipt_id: ObjectId, status: str, **fields):
+    await collection.update_one(
+        {"_id": receipt_id},
+        {"$set": {"status": status, **fields, "updatedAt": datetime.utcnow()}},
+    )
+
+
+# ─────── Draft transactions ───────
+class NoTotalError(ValueError):
+    pass
+
+
+def draft_transaction(parsed: dict, user_id: str, category: str) -> TransactionCreate:
+    """A pending expense from parsed receipt fields, for the user to review."""
+    total = parsed["total"]["value"]
+    if total is None:
+        raise NoTotalError("No total found on the receipt")
+    fields = {
+        "userId": user_id,
+        "title": parsed["merchant"]["value"] or "Receipt",
+        "amount": total,
+        "type": "expense",
+        "category": category,
+        "notes": "Draft created from a scanned receipt",
+        "status": TransactionStatus.pending,
+    }
+    if parsed["currency"]["value"]:
+        fields["currency"] = parsed["currency"]["value"]
+    if parsed["date"]["value"]:
+        fields["date"] = datetime.fromisoformat(parsed["date"]["value"])
+    return TransactionCreate(**fields)
+
+
+async def create_draft_transaction(
+    parsed: dict, user_id: ObjectId, category: str, receipt_id: Optional[ObjectId] = None
+) -> dict:
+    now = datetime.utcnow()
+    data = draft_transaction(parsed, str(user_id), category).dict()
+    data["userId"] = ObjectId(user_id)
+    data["createdAt"] = now
+    data["updatedAt"] = now
+    if receipt_id is not None:
+        data["receiptId"] = receipt_id
+
+    result = await transactions.insert_one(data)
+    data["_id"] = result.inserted_id
+    return fix_id(data)
+
+
+async def process_receipt(receipt_id: str):
+    """Job handler: OCR one stored receipt image.
+
+    Errors such as a saturated pool or a timeout are raised so the job
+    queue retries with backoff; on the last attempt, or for images that
+    cannot be decoded, the receipt is marked failed instead.
+    """
+    receipt = await collection.find_one_and_update(
+        {"_id": ObjectId(receipt_id), "status": {"$nin": list(FINISHED)}},
+        {"$set": {"status": PROCESSING, "updatedAt": datetime.utcnow()}, "$inc": {"attempts": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if receipt is None:
+        return {"items_processed": 0}  # deleted, or finished by an earlier attempt
+
+    try:
+        stream = await images.open_download_stream(receipt["fileId"])
+        result = await ocr_cache.recognize(await stream.read())
+    except PreprocessError as e:
+        # Not an image we can decode; retrying will not help
+        await _finish(receipt["_id"], FAILED, error=str(e))
+        return {"items_processed": 0}
+    except Exception as e:
+        if receipt["attempts"] >= receipt.get("maxAttempts", 1):
+            await _finish(receipt["_id"], FAILED, error=str(e))
+            return {"items_processed": 0}
+        await _finish(receipt["_id"], QUEUED, error=str(e))
+        raise
+
+    fields = {"result": result, "error": None}
+    if receipt.get("userId") and receipt.get("category"):
+        try:
+            transaction = await create_draft_transaction(
+                result["receipt"], receipt["userId"], receipt["category"], receipt["_id"]
+            )
+            fields["transactionId"] = ObjectId(transaction["id"])
+        except NoTotalError as e:
+            fields["error"] = str(e)  # the OCR result is still useful on its own
+
+    await _finish(receipt["_id"], DONE, **fields, finishedAt=datetime.utcnow())
+    return {"items_processed": 1}
@@ -1,13 +1,166 @@
-import httpx
+import time
 from datetime import datetime, timedelta
+from typing import Dict, List
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from app.core.config import SUBSCRIPTION_QUEUE_BATCH_SIZE
 from app.db.mongo import db
-
-RECURRENCE_MAP = {"monthly": 30, "quarterly": 90, "yearly": 365}
+from app.utils.recurrence import RECURRENCE_MONTHS, next_occurrence, to_datetime
 
 collection = db["subscriptions"]
+transactions = db["transactions"]
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def ensure_indexes():
+    # Lets each run read only the subscriptions that fall due in the window
+    await collection.create_index(
+        [("isActive", ASCENDING), ("nextDueAt", ASCENDING)], name="isActive_nextDueAt"
+    )
+
+    # One queued transaction per subscription per due date. Only documents
+    # written by this job carry an ObjectId link, so manual transactions with a
+    # null / string linkedSubscriptionId are left out of the constraint.
+    try:
+        await transactions.create_index(
+            [("linkedSubscriptionId", ASCENDING), ("date", ASCENDING)],
+            name="linkedSubscriptionId_date_unique",
+            unique=True,
+            partialFilterExpression={"linkedSubscriptionId": {"$type": "objectId"}},
+        )
+    except OperationFailure as e:
+        # Duplicates queued before this index existed must be cleaned up first
+        print(f"Could not create linkedSubscriptionId/date index: {e}")
 
 
-async def queue_upcoming_subscriptions():
+def _queued_transaction(sub: dict, due_date: datetime, now: datetime) -> dict:
+    return {
+        "userId": sub["userId"],
+        "title": sub["title"],
+        "description": sub.get("description", ""),
+        "amount": sub["amount"],
+        "type": sub["type"],
+        "currency": sub["currency"],
+        "category": sub["category"],
+        "status": "queued",
+        "notes": "",
+        "date": due_date,
+        "createdAt": now,
+        "updatedAt": now,
+        "linkedSubscriptionId": sub["_id"],
+    }
+
+
+async def _queue_batch(batch: List[dict], now: datetime, cutoff: datetime) -> Dict[str, int]:
+    stats = {"due": 0, "queued": 0, "skipped": 0}
+
+    due = []
+    reschedule = []
+    for sub in batch:
+        # Stored nextDueAt is missing on legacy documents and stale when a run
+        # was missed; either way recompute the first occurrence from now.
+        next_due_date = to_datetime(sub.get("nextDueAt"))
+        if next_due_date is None or next_due_date < now:
+            next_due_date = next_occurrence(
+                to_datetime(sub.get("startDate")), sub.get("recurrenceType"), now
+            )
+        if next_due_date is None:
+            continue
+        end_date = to_datetime(sub.get("endDate"))
+        if end_date is not None and next_due_date > end_date:
+            reschedule.append(
+                UpdateOne({"_id": sub["_id"]}, {"$set": {"nextDueAt": None}})
+            )
+            continue
+        if next_due_date > cutoff:
+            reschedule.append(
+                UpdateOne({"_id": sub["_id"]}, {"$set": {"nextDueAt": next_due_date}})
+            )
+            continue
+        due.append((sub, next_due_date))
+
+    stats["due"] = len(due)
+    if not due:
+        await _reschedule(reschedule)
+        return stats
+
+    # One round trip to find everything in this batch that is already queued
+    existing_cursor = transactions.find(
+        {
+            "linkedSubscriptionId": {"$in": [sub["_id"] for sub, _ in due]},
+            "date": {"$in": list({d for _, d in due})},
+        },
+        {"linkedSubscriptionId": 1, "date": 1},
+    )
+    existing = {
+        (doc["linkedSubscriptionId"], doc["date"]) async for doc in existing_cursor
+    }
+
+    operations = []
+    for sub, next_due_date in due:
+        if (sub["_id"], next_due_date) in existing:
+            stats["skipped"] += 1
+            continue
+        # Upsert keyed on the unique index so concurrent runs cannot duplicate
+        operations.append(
+            UpdateOne(
+                {"linkedSubscriptionId": sub["_id"], "date": next_due_date},
+                {"$setOnInsert": _queued_transaction(sub, next_due_date, now)},
+                upsert=True,
+            )
+        )
+
+    if operations:
+        await _write_transactions(operations, stats)
+
+    # Advance only once the transaction is safely written, so a failed batch is
+    # picked up again on the next run.
+    for sub, next_due_date in due:
+        following = next_occurrence(
+            to_datetime(sub.get("startDate")),
+            sub.get("recurrenceType"),
+            next_due_date,
+            inclusive=False,
+        )
+        end_date = to_datetime(sub.get("endDate"))
+        if end_date is not None and following > end_date:
+            following = None
+        reschedule.append(
+            UpdateOne({"_id": sub["_id"]}, {"$set": {"nextDueAt": following}})
+        )
+    await _reschedule(reschedule)
+
+    return stats
+
+
+async def _reschedule(operations: List[UpdateOne]):
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+
+
+async def _write_transactions(operations: List[UpdateOne], stats: Dict[str, int]):
+    try:
+        result = await transactions.bulk_write(operations, ordered=False)
+        stats["queued"] += result.upserted_count
+        stats["skipped"] += len(operations) - result.upserted_count
+    except BulkWriteError as e:
+        details = e.details or {}
+        upserted = len(details.get("upserted", []))
+        duplicates = sum(
+            1
+            for err in details.get("writeErrors", [])
+            if err.get("code") == DUPLICATE_KEY_ERROR
+        )
+        if duplicates != len(details.get("writeErrors", [])):
+            raise
+        # Another run queued the same rows between our read and write
+        stats["queued"] += upserted
+        stats["skipped"] += len(operations) - upserted
+
+
+async def queue_upcoming_subscriptions(batch_size: int = SUBSCRIPTION_QUEUE_BATCH_SIZE):
+    started = time.perf_counter()
     now = datetime.utcnow()
     cutoff = now + timedelta(days=30)
 
@@ -15,57 +168,48 @@ async def queue_upcoming_subscriptions():
         {
             "type": "expense",
             "isActive": True,
-            "recurrenceType": {"$in": ["monthly", "quarterly", "yearly"]},
-            "$or": [{"endDate": None}, {"endDate": {"$gt": now}}],
+            "recurrenceType": {"$in": list(RECURRENCE_MONTHS)},
+            "$and": [
+                {"$or": [{"endDate": None}, {"endDate": {"$gt": now}}]},
+                {
+                    "$or": [
+                        {"nextDueAt": {"$lte": cutoff}},
+                        {"nextDueAt": {"$exists": False}},
+                    ]
+                },
+            ],
         }
-    )
+    ).batch_size(batch_size)
 
-    async for sub in subscriptions_cursor:
-        recurrence_days = RECURRENCE_MAP.get(sub.get("recurrenceType"))
-        if not recurrence_days:
-            continue
+    totals = {"scanned": 0, "due": 0, "queued": 0, "skipped": 0, "batches": 0}
+    batch: List[dict] = []
 
-        start_date = sub["startDate"]
-        if isinstance(start_date, dict) and "$date" in start_date:
-            start_date = datetime.fromtimestamp(
-                start_date["$date"]["$numberLong"] / 1000
-            )
+    async def flush():
+        batch_stats = await _queue_batch(batch, now, cutoff)
+        totals["batches"] += 1
+        for key, value in batch_stats.items():
+            totals[key] += value
+        batch.clear()
 
-        days_since_start = (now - start_date).days
-        cycles = days_since_start // recurrence_days
-        next_due_date = start_date + timedelta(days=(cycles + 1) * recurrence_days)
+    async for sub in subscriptions_cursor:
+        totals["scanned"] += 1
+        batch.append(sub)
+        if len(batch) >= batch_size:
+            await flush()
 
-        if now <= next_due_date <= cutoff:
-            # Check for existing queued transaction
-            existing = await db["transactions"].find_one(
-                {
-                    "userId": sub["userId"],
-                    "linkedSubscriptionId": sub["_id"],
-                    "date": next_due_date,
-                    "status": "queued",
-                }
-            )
+    if batch:
+        await flush()
 
-            if existing:
-                print(f"Already queued: {sub['title']} for {next_due_date.date()}")
-                continue  # Skip duplicate
-
-            # Create new queued transaction
-            transaction = {
-                "userId": sub["userId"],
-                "title": sub["title"],
-                "description": sub.get("description", ""),
-                "amount": sub["amount"],
-                "type": sub["type"],
-                "currency": sub["currency"],
-                "category": sub["category"],
-                "status": "queued",
-                "notes": "",
-                "date": next_due_date,
-                "createdAt": datetime.utcnow(),
-                "updatedAt": datetime.utcnow(),
-                "linkedSubscriptionId": sub["_id"],
-            }
-
-            await db["transactions"].insert_one(transaction)
-            print(f"Queued transaction for {sub['title']} on {next_due_date.date()}")
+    elapsed = time.perf_counter() - started
+    totals["items_processed"] = totals["scanned"]
+    totals["elapsed_seconds"] = round(elapsed, 3)
+    totals["subscriptions_per_second"] = (
+        round(totals["scanned"] / elapsed, 1) if elapsed > 0 else 0.0
+    )
+    print(
+        f"[{datetime.utcnow()}] Subscription queue: scanned={totals['scanned']} "
+        f"due={totals['due']} queued={totals['queued']} skipped={totals['skipped']} "
+        f"batches={totals['batches']} in {totals['elapsed_seconds']}s "
+        f"({totals['subscriptions_per_second']}/s)"
+    )
+    return totals
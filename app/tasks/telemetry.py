@@ -0,0 +1,138 @@
+import time
+import traceback
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo.errors import CollectionInvalid
+from app.core.lease import SKIPPED, WORKER_ID
+from app.db.mongo import db
+
+collection = db["job_runs"]
+
+JOB_RUNS_MAX_BYTES = 16 * 1024 * 1024
+JOB_RUNS_MAX_DOCS = 50000
+HISTOGRAM_SIZE = 500
+
+# Per-process view; the job_runs collection is the cross-worker record
+_durations: Dict[str, deque] = defaultdict(lambda: deque(maxlen=HISTOGRAM_SIZE))
+_last_run: Dict[str, dict] = {}
+_failure_streak: Dict[str, int] = defaultdict(int)
+
+
+async def ensure_collection():
+    try:
+        await db.create_collection(
+            "job_runs", capped=True, size=JOB_RUNS_MAX_BYTES, max=JOB_RUNS_MAX_DOCS
+        )
+    except CollectionInvalid:
+        pass  # already exists
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _items_processed(result) -> Optional[int]:
+    if isinstance(result, bool):
+        return None
+    if isinstance(result, int):
+        return result
+    if isinstance(result, dict):
+        return result.get("items_processed")
+    return None
+
+
+async def record_run(name: str, job: Callable[[], Awaitable]):
+    """Run `job`, recording duration, outcome and item count for `name`."""
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+    run = {
+        "job": name,
+        "worker": WORKER_ID,
+        "startedAt": started_at,
+        "outcome": "success",
+        "itemsProcessed": None,
+        "error": None,
+    }
+    try:
+        result = await job()
+        if result is SKIPPED:
+            run["outcome"] = "skipped"
+        else:
+            run["itemsProcessed"] = _items_processed(result)
+        return result
+    except Exception as e:
+        run["outcome"] = "failure"
+        run["error"] = {
+            "type": type(e).__name__,
+            "message": str(e),
+            "traceback": traceback.format_exc(limit=5),
+        }
+        raise
+    finally:
+        run["durationMs"] = round((time.perf_counter() - started) * 1000, 2)
+        run["finishedAt"] = datetime.utcnow()
+        _observe(run)
+        try:
+            await collection.insert_one(dict(run))
+        except Exception as e:
+            print(f"Error recording job run for {name}: {e}")
+
+
+def _observe(run: dict):
+    name = run["job"]
+    if run["outcome"] == "skipped":
+        return
+    _durations[name].append(run["durationMs"])
+    _last_run[name] = run
+    if run["outcome"] == "failure":
+        _failure_streak[name] += 1
+    else:
+        _failure_streak[name] = 0
+
+
+def summarize(runs: List[dict]) -> dict:
+    """Stats for one job from its runs, newest first."""
+    finished = [r for r in runs if r.get("outcome") != "skipped"]
+    durations = [r["durationMs"] for r in finished]
+    streak = 0
+    for r in finished:
+        if r["outcome"] != "failure":
+            break
+        streak += 1
+    last = finished[0] if finished else None
+    return {
+        "last_run": last,
+        "runs": len(finished),
+        "failures": sum(1 for r in finished if r["outcome"] == "failure"),
+        "skipped": len(runs) - len(finished),
+        "failure_streak": streak,
+        "p50_ms": percentile(durations, 50),
+        "p95_ms": percentile(durations, 95),
+    }
+
+
+def local_stats() -> Dict[str, dict]:
+    return {
+        name: {
+            "last_run": _last_run.get(name),
+            "runs": len(durations),
+            "failure_streak": _failure_streak[name],
+            "p50_ms": percentile(list(durations), 50),
+            "p95_ms": percentile(list(durations), 95),
+        }
+        for name, durations in _durations.items()
+    }
+
+
+async def job_stats(runs_per_job: int = 200) -> Dict[str, dict]:
+    runs: Dict[str, List[dict]] = defaultdict(list)
+    cursor = collection.find({}, {"_id": 0}).sort("$natural", -1)
+    async for run in cursor.limit(runs_per_job * 20):
+        if len(runs[run["job"]]) < runs_per_job:
+            runs[run["job"]].append(run)
+    return {name: summarize(job_runs) for name, job_runs in runs.items()}
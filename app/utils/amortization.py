@@ -0,0 +1,334 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+import calendar
+import math
+import numpy as np
+
+# Constant-EMI stretches shorter than this are cheaper to step through
+MIN_CLOSED_FORM_MONTHS = 8
+
+
+class AmortizationError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Amortization:
+    """Column arrays for the scheduled (non-final) months plus running totals."""
+
+    month: np.ndarray
+    emi: np.ndarray
+    interest_rate: np.ndarray
+    principal: np.ndarray
+    interest: np.ndarray
+    prepayment: np.ndarray
+    remaining: np.ndarray
+    total_amount_paid: float
+    total_interest_paid: float
+
+    @property
+    def months(self) -> int:
+        return len(self.month)
+
+
+@dataclass(frozen=True)
+class AmortizationState:
+    """Loop state entering `month`, for resuming a schedule part-way."""
+
+    month: int
+    remaining: float
+    interest_rate: float
+    emi: float
+    total_amount_paid: float
+    total_interest_paid: float
+
+
+def _emi(principal: float, rate: float, months: int) -> float:
+    if months <= 0 or principal <= 0:
+        return 0
+    if rate == 0:
+        return principal / months
+    factor = (1 + rate) ** months
+    return principal * rate * factor / (factor - 1)
+
+
+def add_months(start: date, months: int) -> date:
+    # Same result as start + relativedelta(months=months), without the overhead
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def schedule_dates(start: date, months: Iterable[int]) -> List[date]:
+    return [add_months(start, m - 1) for m in months]
+
+
+def _prepayments(repayments: List[Tuple[int, float, bool]], max_months: int) -> np.ndarray:
+    """Prepayment per month, indexed by month number.
+
+    The amount only changes at months where some repayment starts, so each
+    of those is summed once (in request order, matching the month-by-month
+    loop bit for bit) and carried forward with the recurring part.
+    """
+    prepay = np.zeros(max_months + 2)
+    starts = sorted({m for m, _, _ in repayments if m <= max_months})
+    for i, start in enumerate(starts):
+        at_start = 0.0
+        recurring = 0.0
+        for month, amount, is_recurring in repayments:
+            if is_recurring and start >= month:
+                at_start += amount
+                recurring += amount
+            elif not is_recurring and start == month:
+                at_start += amount
+        end = starts[i + 1] if i + 1 < len(starts) else max_months + 1
+        prepay[start] = at_start
+        prepay[start + 1 : end] = recurring
+    return prepay
+
+
+def _next_event(events: np.ndarray) -> np.ndarray:
+    """For each month, the first later month that has an event."""
+    size = len(events)
+    idx = np.where(events, np.arange(size), size)
+    nxt = np.minimum.accumulate(idx[::-1])[::-1]
+    return np.append(nxt[1:], size)
+
+
+def amortize(
+    amount: float,
+    interest: float,
+    tenure_months: int,
+    adjust: str,
+    repayments: List[Tuple[int, float, bool]] = (),
+    interest_revision: List[Tuple[int, float]] = (),
+    adjusted_emi_schedule: List[Tuple[int, float]] = (),
+    state: Optional[AmortizationState] = None,
+) -> Amortization:
+    """Month-by-month amortization with prepayments and rate/EMI revisions.
+
+    Stretches with no prepayment, revision or EMI change skip the per-month
+    checks: the closed-form payoff month bounds the stretch, a tight loop
+    carries the balance with the exact recurrence, and the stretch's rows
+    are filled into the NumPy columns in one go. Everything else steps one
+    month at a time.
+    With `state`, only months from `state.month` on are computed and the
+    totals carry on from the state's.
+    """
+    repayments = list(repayments)
+    max_months = max(tenure_months * 3, 1500)
+    size = max_months + 2
+
+    rate_changes = dict(interest_revision)
+    emi_changes = dict(sorted(adjusted_emi_schedule, key=lambda x: x[0]))
+
+    prepay = _prepayments(repayments, max_months)
+    events = prepay != 0
+    for m in list(rate_changes) + list(emi_changes):
+        if 0 < m < size:
+            events[m] = True
+    next_event = _next_event(events)
+    prepay_at = prepay.tolist()
+
+    month_col = np.zeros(max_months, dtype=np.int64)
+    emi_col = np.zeros(max_months)
+    rate_col = np.zeros(max_months)
+    principal_col = np.zeros(max_months)
+    interest_col = np.zeros(max_months)
+    prepay_col = np.zeros(max_months)
+    remaining_col = np.zeros(max_months)
+
+    if state is None:
+        monthly_rate = interest / (12 * 100)
+        remaining = amount
+        emi = emi_changes.get(1, _emi(remaining, monthly_rate, tenure_months))
+        current_rate = interest
+        total_interest_paid = 0.0
+        total_amount_paid = 0.0
+        month = 1
+    else:
+        current_rate = state.interest_rate
+        monthly_rate = current_rate / (12 * 100)
+        remaining = state.remaining
+        emi = state.emi
+        total_interest_paid = state.total_interest_paid
+        total_amount_paid = state.total_amount_paid
+        month = state.month
+    rows = 0
+
+    while remaining > 0 and month <= max_months:
+        if month in rate_changes:
+            current_rate = rate_changes[month]
+            monthly_rate = current_rate / (12 * 100)
+            if adjust == "emi":
+                emi = _emi(remaining, monthly_rate, tenure_months - month + 1)
+
+        if month in emi_changes:
+            emi = emi_changes[month]
+
+        # A stretch with no prepayment, revision or EMI change is a plain
+        # annuity, so the months left until payoff have a closed form:
+        #   n = -log(1 - r * B / EMI) / log(1 + r)
+        # The stretch stops two months short of that so the payoff month (and
+        # its break condition) goes through the step below. Balances are still
+        # carried with the exact recurrence: the closed-form balance drifts by
+        # a few ulps, which is enough to move the payoff month.
+        span = min(int(next_event[month]), max_months + 1) - month
+        if (
+            prepay_at[month] == 0
+            and span >= MIN_CLOSED_FORM_MONTHS
+            and emi > remaining * monthly_rate
+        ):
+            if monthly_rate > 0:
+                payoff = -math.log1p(-remaining * monthly_rate / emi) / math.log1p(
+                    monthly_rate
+                )
+            else:
+                payoff = remaining / emi
+            n = min(span, int(payoff) - 2)
+            if n >= MIN_CLOSED_FORM_MONTHS:
+                opening = [0.0] * n
+                closing = [0.0] * n
+                balance = remaining
+                for i in range(n):
+                    opening[i] = balance
+                    interest_amt = balance * monthly_rate
+                    total_interest_paid += interest_amt
+                    total_amount_paid += emi
+                    balance -= emi - interest_amt
+                    closing[i] = balance
+
+                end = rows + n
+                interest_k = np.array(opening) * monthly_rate
+                month_col[rows:end] = np.arange(month, month + n)
+                emi_col[rows:end] = emi
+                rate_col[rows:end] = current_rate
+                interest_col[rows:end] = interest_k
+                principal_col[rows:end] = emi - interest_k
+                remaining_col[rows:end] = closing
+                remaining = balance
+                rows = end
+                month += n
+                continue
+
+        interest_amt = remaining * monthly_rate
+        principal = emi - interest_amt
+        if principal < 0:
+            raise AmortizationError(
+                f"EMI {emi:.2f} too low to cover interest {interest_amt:.2f} at month {month}"
+            )
+
+        prepayment = prepay_at[month]
+        if principal + prepayment > remaining:
+            prepayment = max(remaining - principal, 0)
+
+        remaining -= principal + prepayment
+        total_interest_paid += interest_amt
+        total_amount_paid += emi + prepayment
+
+        # The payoff month counts towards the totals but not the schedule
+        if remaining <= 0:
+            break
+
+        month_col[rows] = month
+        emi_col[rows] = emi
+        rate_col[rows] = current_rate
+        principal_col[rows] = principal
+        interest_col[rows] = interest_amt
+        prepay_col[rows] = prepayment
+        remaining_col[rows] = remaining
+        rows += 1
+
+        if adjust == "emi" and prepayment > 0 and remaining > 0:
+            emi = _emi(remaining, monthly_rate, max(tenure_months - month, 1))
+
+        month += 1
+
+    columns = [
+        month_col[:rows],
+        emi_col[:rows],
+        rate_col[:rows],
+        principal_col[:rows],
+        interest_col[:rows],
+        prepay_col[:rows],
+        remaining_col[:rows],
+    ]
+    # Results may be cached and shared between requests
+    for column in columns:
+        column.setflags(write=False)
+
+    return Amortization(*columns, total_amount_paid, total_interest_paid)
+
+
+def resume_state(
+    result: Amortization, month: int, adjust: str, tenure_months: int
+) -> Optional[AmortizationState]:
+    """State entering `month` of a schedule whose earlier months still hold.
+
+    Replays exactly what the loop carries between months, so resuming from
+    here gives the same numbers as recomputing from month 1. Returns None
+    when there is nothing to resume from (month 1, or the loan was already
+    paid off before `month`).
+    """
+    done = month - 1
+    if done <= 0 or done > result.months:
+        return None
+
+    total_amount_paid = 0.0
+    total_interest_paid = 0.0
+    for emi, prepayment, interest in zip(
+        result.emi[:done].tolist(),
+        result.prepayment[:done].tolist(),
+        result.interest[:done].tolist(),
+    ):
+        total_interest_paid += interest
+        total_amount_paid += emi + prepayment
+
+    last = done - 1
+    remaining = float(result.remaining[last])
+    rate = float(result.interest_rate[last])
+    emi = float(result.emi[last])
+    if adjust == "emi" and result.prepayment[last] > 0 and remaining > 0:
+        emi = _emi(remaining, rate / (12 * 100), max(tenure_months - done, 1))
+
+    return AmortizationState(
+        month=month,
+        remaining=remaining,
+        interest_rate=rate,
+        emi=emi,
+        total_amount_paid=total_amount_paid,
+        total_interest_paid=total_interest_paid,
+    )
+
+
+def splice(prefix: Amortization, suffix: Amortization, month: int) -> Amortization:
+    """Months before `month` from `prefix`, the rest (and totals) from `suffix`."""
+    done = month - 1
+    columns = [
+        np.concatenate([getattr(prefix, name)[:done], getattr(suffix, name)])
+        for name in COLUMNS
+    ]
+    for column in columns:
+        column.setflags(write=False)
+    return Amortization(*columns, suffix.total_amount_paid, suffix.total_interest_paid)
+
+
+COLUMNS = ("month", "emi", "interest_rate", "principal", "interest", "prepayment", "remaining")
+
+
+def to_document(result: Amortization) -> dict:
+    doc = {name: getattr(result, name).tolist() for name in COLUMNS}
+    doc["total_amount_paid"] = result.total_amount_paid
+    doc["total_interest_paid"] = result.total_interest_paid
+    return doc
+
+
+def from_document(doc: dict) -> Amortization:
+    columns = [
+        np.array(doc[name], dtype=np.int64 if name == "month" else np.float64)
+        for name in COLUMNS
+    ]
+    for column in columns:
+        column.setflags(write=False)
+    return Amortization(*columns, doc["total_amount_paid"], doc["total_interest_paid"])
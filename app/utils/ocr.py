@@ -0,0 +1,210 @@
+import asyncio
+import io
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+from app.core.config import OCR_QUEUE_SIZE, OCR_TIMEOUT_SECONDS, OCR_WORKERS, TESSERACT_CMD
+from app.tasks.telemetry import percentile
+from app.utils import receipt_parser
+from app.utils.lazy import lazy_import
+from app.utils.preprocess import (
+    DEFAULT_CONFIG,
+    PreprocessConfig,
+    check_dimensions,
+    preprocess,
+    receipt_dpi,
+)
+
+Image = lazy_import("PIL.Image")
+pytesseract = lazy_import("pytesseract")
+
+HISTOGRAM_SIZE = 500
+
+
+class OcrError(Exception):
+    pass
+
+
+class OcrBusy(OcrError):
+    """Every worker is busy and the wait queue is full."""
+
+
+class OcrUnavailable(OcrError):
+    """The worker pool is shut down or a worker process died."""
+
+
+class OcrTimeout(OcrError):
+    pass
+
+
+def _init_worker():
+    # Parallelism comes from the pool; one thread per tesseract avoids
+    # oversubscribing cores when every worker is busy
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _timed(fn: Callable, deadline: float, *args):
+    """Runs in a pool process: `fn(remaining_seconds, *args)` plus when it started."""
+    started_at = time.time()
+    remaining = deadline - started_at
+    if remaining <= 0:
+        # The request already gave up while this was queued
+        raise OcrTimeout("Timed out waiting for an OCR worker")
+    started = time.perf_counter()
+    result = fn(remaining, *args)
+    return result, started_at, time.perf_counter() - started
+
+
+def recognize(timeout: float, image_bytes: bytes, config: PreprocessConfig = DEFAULT_CONFIG) -> dict:
+    """Preprocess, OCR and parse one image.
+
+    Returns the text, the parsed receipt fields and per-stage timings. One
+    tesseract run gives word-level output (image_to_data) that both the
+    text and the parser are built from.
+    """
+    started = time.perf_counter()
+    if config.stages:
+        img, timings = preprocess(image_bytes, config)
+        # Tell tesseract the resolution instead of letting it guess; below
+        # the target when a reduced decode left the receipt narrower
+        options = f"--dpi {receipt_dpi(img, config)}" if "downscale" in config.stages else ""
+    else:
+        img, timings = Image.open(io.BytesIO(image_bytes)), {}
+        check_dimensions(img.width, img.height)
+        options = ""
+
+    remaining = timeout - (time.perf_counter() - started)
+    if remaining <= 0:
+        raise OcrTimeout("OCR timed out")
+    ocr_started = time.perf_counter()
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    try:
+        data = pytesseract.image_to_data(
+            img, config=options, timeout=remaining, output_type=pytesseract.Output.DICT
+        )
+    except RuntimeError as e:
+        # pytesseract kills tesseract at the timeout and raises RuntimeError
+        if "timeout" in str(e).lower():
+            raise OcrTimeout("OCR timed out")
+        raise
+    timings["ocr"] = round((time.perf_counter() - ocr_started) * 1000, 2)
+
+    parse_started = time.perf_counter()
+    lines = receipt_parser.lines_from_data(data)
+    receipt = receipt_parser.parse(lines)
+    timings["parse"] = round((time.perf_counter() - parse_started) * 1000, 2)
+    return {
+        "raw_text": "\n".join(line.text for line in lines),
+        "receipt": receipt,
+        "timings_ms": timings,
+    }
+
+
+class OcrPool:
+    """Process pool for OCR with a bounded number of requests in flight.
+
+    Up to `workers` jobs run at once and `queue_size` more may wait for a
+    worker; beyond that `run` raises OcrBusy straight away instead of
+    queueing behind work that would outlast the request timeout.
+    """
+
+    def __init__(
+        self,
+        workers: int = OCR_WORKERS,
+        queue_size: int = OCR_QUEUE_SIZE,
+        timeout: float = OCR_TIMEOUT_SECONDS,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._durations = deque(maxlen=HISTOGRAM_SIZE)
+        self._waits = deque(maxlen=HISTOGRAM_SIZE)
+        self._counts = {"completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "unavailable": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker
+            )
+        return self._executor
+
+    def _discard_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self):
+        self._discard_executor()
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None):
+        """Run `fn(remaining_seconds, *args)` in a worker process."""
+        if self._in_flight >= self.workers + self.queue_size:
+            self._counts["rejected"] += 1
+            raise OcrBusy("OCR queue is full")
+
+        timeout = timeout or self.timeout
+        submitted_at = time.time()
+        self._in_flight += 1
+        try:
+            try:
+                future = self._get_executor().submit(_timed, fn, submitted_at + timeout, *args)
+            except RuntimeError:
+                # Broken by an earlier worker crash, or shut down
+                self._counts["unavailable"] += 1
+                self._discard_executor()
+                raise OcrUnavailable("OCR workers unavailable")
+
+            try:
+                # The worker enforces the deadline itself; the margin only
+                # covers pickling and process start-up
+                result, started_at, seconds = await asyncio.wait_for(
+                    asyncio.wrap_future(future), timeout + 5
+                )
+            except BrokenProcessPool:
+                # A worker died mid-job (e.g. OOM-killed); start afresh next time
+                self._counts["unavailable"] += 1
+                self._discard_executor()
+                raise OcrUnavailable("OCR worker crashed")
+            except (asyncio.TimeoutError, OcrTimeout):
+                self._counts["timeouts"] += 1
+                raise OcrTimeout(f"OCR did not finish within {timeout:g}s")
+            except Exception:
+                self._counts["failed"] += 1
+                raise
+        finally:
+            self._in_flight -= 1
+
+        self._counts["completed"] += 1
+        self._durations.append(seconds * 1000)
+        self._waits.append(max(started_at - submitted_at, 0) * 1000)
+        return result
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up."""
+        typical = percentile(list(self._durations), 50) or self.timeout * 1000
+        return max(1, math.ceil(typical / 1000))
+
+    def stats(self) -> dict:
+        durations = list(self._durations)
+        waits = list(self._waits)
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "running": min(self._in_flight, self.workers),
+            "queued": max(self._in_flight - self.workers, 0),
+            **self._counts,
+            "ocr_p50_ms": percentile(durations, 50),
+            "ocr_p95_ms": percentile(durations, 95),
+            "wait_p50_ms": percentile(waits, 50),
+            "wait_p95_ms": percentile(waits, 95),
+        }
+
+
+pool = OcrPool()
@@ -0,0 +1,70 @@
+import hashlib
+from datetime import datetime
+from pymongo.errors import PyMongoError
+from app.core.config import OCR_CACHE_SIZE, OCR_CACHE_TTL_SECONDS
+from app.db.mongo import db
+from app.utils import ocr
+from app.utils.lru import LRUCache
+from app.utils.preprocess import DEFAULT_CONFIG
+
+collection = db["ocr_cache"]
+
+# Bump when OCR output for the same image and config changes. 3 drops the
+# entries the near-duplicate tier stored under the wrong receipt's result
+CACHE_VERSION = "3"
+VERSION = hashlib.sha256(f"{CACHE_VERSION}:{DEFAULT_CONFIG!r}".encode()).hexdigest()[:12]
+
+_cache = LRUCache(OCR_CACHE_SIZE)
+_stats = {"mongo_hits": 0, "misses": 0}
+
+
+def content_key(image_bytes: bytes) -> str:
+    return f"{hashlib.sha256(image_bytes).hexdigest()}:{VERSION}"
+
+
+async def _store(key: str, result: dict):
+    _cache.put(key, result)
+    doc = {"version": VERSION, "result": result, "createdAt": datetime.utcnow()}
+    try:
+        await collection.replace_one({"_id": key}, doc, upsert=True)
+    except PyMongoError as e:
+        print(f"Error storing OCR cache entry: {e}")
+
+
+async def ensure_indexes():
+    await collection.create_index("createdAt", expireAfterSeconds=OCR_CACHE_TTL_SECONDS)
+
+
+async def recognize(image_bytes: bytes) -> dict:
+    """ocr.recognize through the cache tiers; `cache` in the result says
+    which tier answered (memory, mongo) or None for a fresh run.
+
+    The key is a hash of the bytes and the OCR config version, so only the
+    same file is ever answered from the cache. Images that merely look alike
+    are not: receipts sharing a layout differ only in the small text that
+    carries the date and totals.
+    """
+    key = content_key(image_bytes)
+    result = _cache.get(key)
+    if result is not None:
+        return {**result, "cache": "memory"}
+
+    try:
+        doc = await collection.find_one({"_id": key})
+    except PyMongoError as e:
+        # The cache is an optimisation; an outage only costs a fresh OCR run
+        print(f"Error reading OCR cache entry: {e}")
+        doc = None
+    if doc is not None:
+        _stats["mongo_hits"] += 1
+        _cache.put(key, doc["result"])
+        return {**doc["result"], "cache": "mongo"}
+
+    _stats["misses"] += 1
+    result = await ocr.pool.run(ocr.recognize, image_bytes)
+    await _store(key, result)
+    return {**result, "cache": None}
+
+
+def stats() -> dict:
+    return {"version": VERSION, "memory": _cache.stats(), **_stats}
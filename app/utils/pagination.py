@@ -0,0 +1,31 @@
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Lists stay the response body; the cursor for the next page, if any, is here
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def after(cursor: Optional[str]) -> dict:
+    """Query fragment for the documents after `cursor`, in `_id` order."""
+    if not cursor:
+        return {}
+    try:
+        return {"_id": {"$gt": ObjectId(cursor)}}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page(docs: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """`docs`, fetched with limit + 1, trimmed to one page, and the cursor
+    for the next page; None when this is the last one."""
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, str(docs[-1]["_id"])
+    return docs, None
+
+
+def cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
@@ -0,0 +1,257 @@
+import io
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Tuple
+import numpy as np
+from PIL import UnidentifiedImageError
+from app.core.config import (
+    OCR_DECODE_MIN_SIDE,
+    OCR_MAX_PIXELS,
+    OCR_PREPROCESS_STAGES,
+    OCR_RECEIPT_WIDTH_MM,
+    OCR_TARGET_DPI,
+    OCR_THRESHOLD_BLOCK_SIZE,
+    OCR_THRESHOLD_C,
+)
+from app.utils.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+# Header reads only happen on OCR requests; PIL.Image pulls in its plugins
+Image = lazy_import("PIL.Image")
+
+# A contour smaller than this share of the frame is not taken for the receipt
+MIN_RECEIPT_AREA = 0.1
+# The receipt outline is found on a copy this wide, then cut from the original
+PREVIEW_WIDTH = 800
+# Skew below this is not worth the interpolation blur; above it the text
+# block is probably not what minAreaRect locked on to
+MIN_SKEW_DEGREES = 0.5
+MAX_SKEW_DEGREES = 20
+
+
+class PreprocessError(ValueError):
+    pass
+
+
+class ImageTooLarge(PreprocessError):
+    pass
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    stages: Tuple[str, ...] = tuple(OCR_PREPROCESS_STAGES)
+    target_dpi: int = OCR_TARGET_DPI
+    receipt_width_mm: float = OCR_RECEIPT_WIDTH_MM
+    block_size: int = OCR_THRESHOLD_BLOCK_SIZE
+    threshold_c: int = OCR_THRESHOLD_C
+    decode_min_side: int = OCR_DECODE_MIN_SIDE
+
+    def __post_init__(self):
+        unknown = [s for s in self.stages if s not in STAGES and s != "grayscale"]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stages: {', '.join(unknown)}")
+
+    @property
+    def target_width(self) -> int:
+        return round(self.receipt_width_mm / 25.4 * self.target_dpi)
+
+
+def image_size(fp: BinaryIO) -> Tuple[str, int, int]:
+    """Format, width and height from the image header; no pixels are decoded."""
+    try:
+        with Image.open(fp) as img:
+            return img.format, img.width, img.height
+    except Image.DecompressionBombError:
+        raise ImageTooLarge(f"Image is over the {OCR_MAX_PIXELS / 1e6:g} megapixel limit")
+    except (UnidentifiedImageError, OSError):
+        raise PreprocessError("Could not decode image")
+
+
+def check_dimensions(width: int, height: int, max_pixels: int = OCR_MAX_PIXELS):
+    # A small, highly compressed PNG can expand to gigabytes; the header
+    # tells us before anything is allocated
+    if width * height > max_pixels:
+        raise ImageTooLarge(
+            f"Image is {width}x{height}; the limit is {max_pixels / 1e6:g} megapixels"
+        )
+
+
+def _scale_denominator(image_format: str, width: int, height: int, config: PreprocessConfig) -> int:
+    if image_format != "JPEG":
+        return 1
+    # The shorter side, as EXIF rotation may swap width and height
+    short_side = min(width, height)
+    for denominator in (8, 4, 2):
+        if short_side // denominator >= config.decode_min_side:
+            return denominator
+    return 1
+
+
+def _decode_flags(denominator: int, grayscale: bool) -> int:
+    # libjpeg scales in the DCT, so the full-size image is never materialised
+    if grayscale:
+        return {
+            1: cv2.IMREAD_GRAYSCALE,
+            2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+            4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+            8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+        }[denominator]
+    return {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }[denominator]
+
+
+def decode(image_bytes: bytes, config: PreprocessConfig) -> np.ndarray:
+    """Decode within OCR_MAX_PIXELS, large JPEGs straight at reduced size."""
+    image_format, width, height = image_size(io.BytesIO(image_bytes))
+    check_dimensions(width, height)
+    denominator = _scale_denominator(image_format, width, height, config)
+    flags = _decode_flags(denominator, "grayscale" in config.stages)
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flags)
+    if img is None:
+        raise PreprocessError("Could not decode image")
+    return img
+
+
+def receipt_dpi(img: np.ndarray, config: PreprocessConfig) -> int:
+    """Resolution of a cropped receipt image, at most the target DPI."""
+    dpi = img.shape[1] / (config.receipt_width_mm / 25.4)
+    return max(1, min(config.target_dpi, round(dpi)))
+
+
+def _gray(img: np.ndarray) -> np.ndarray:
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def downscale(img: np.ndarray, config: PreprocessConfig) -> np.ndarray:
+    """Shrink so the image width is the receipt width at the target DPI.
+
+    Run after crop, so the width is the receipt's own; never upscales.
+    """
+    height, width = img.shape[:2]
+    scale = config.target_width / width
+    if scale >= 1:
+        return img
+    return cv2.resize(
+        img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA
+    )
+
+
+def _order_corners(quad: np.ndarray) -> np.ndarray:
+    # top-left has the smallest x+y, bottom-right the largest; top-right
+    # the smallest y-x, bottom-left the largest
+    sums = quad.sum(axis=1)
+    diffs = np.diff(quad, axis=1).ravel()
+    return np.array(
+        [quad[sums.argmin()], quad[diffs.argmin()], quad[sums.argmax()], quad[diffs.argmax()]],
+        dtype=np.float32,
+    )
+
+
+def crop(img: np.ndarray, config: PreprocessConfig) -> np.ndarray:
+    """Cut out the receipt: the largest bright region against a darker background.
+
+    The outline is located on a small preview and cut from the full image;
+    a four-cornered outline is also straightened with a perspective warp.
+    Images with no such region (scans, screenshots) are returned as-is.
+    """
+    gray = _gray(img)
+    scale = min(1.0, PREVIEW_WIDTH / gray.shape[1])
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, paper = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Close the gaps the printed text leaves in the paper mask
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+    paper = cv2.morphologyEx(paper, cv2.MORPH_CLOSE, kernel)
+
+    contours, _ = cv2.findContours(paper, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return img
+    outline = max(contours, key=cv2.contourArea)
+    frame = gray.shape[0] * gray.shape[1]
+    if not MIN_RECEIPT_AREA * frame <= cv2.contourArea(outline) <= 0.95 * frame:
+        return img
+
+    quad = cv2.approxPolyDP(outline, 0.02 * cv2.arcLength(outline, True), True)
+    if len(quad) != 4:
+        x, y, w, h = (round(v / scale) for v in cv2.boundingRect(outline))
+        return img[y : y + h, x : x + w]
+
+    corners = _order_corners(quad.reshape(4, 2).astype(np.float32) / scale)
+    tl, tr, br, bl = corners
+    width = int(max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl)))
+    height = int(max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr)))
+    target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], np.float32)
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(img, matrix, (width, height), flags=cv2.INTER_AREA)
+
+
+def skew_angle(img: np.ndarray) -> float:
+    """Rotation in degrees (counter-clockwise) that levels the text."""
+    _, ink = cv2.threshold(_gray(img), 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Smear characters into text lines so the box follows the lines
+    ink = cv2.dilate(ink, cv2.getStructuringElement(cv2.MORPH_RECT, (25, 3)))
+    points = cv2.findNonZero(ink)
+    if points is None or len(points) < 100:
+        return 0.0
+    angle = cv2.minAreaRect(points)[-1]
+    # OpenCV >= 4.5 reports angles in [0, 90)
+    return angle - 90 if angle > 45 else angle
+
+
+def deskew(img: np.ndarray, config: PreprocessConfig) -> np.ndarray:
+    angle = skew_angle(img)
+    if not MIN_SKEW_DEGREES <= abs(angle) <= MAX_SKEW_DEGREES:
+        return img
+    height, width = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(
+        img, matrix, (width, height), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE
+    )
+
+
+def threshold(img: np.ndarray, config: PreprocessConfig) -> np.ndarray:
+    """Black text on white, robust to shadows and uneven phone-camera lighting."""
+    return cv2.adaptiveThreshold(
+        _gray(img),
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        config.block_size | 1,  # must be odd
+        config.threshold_c,
+    )
+
+
+STAGES = {
+    "downscale": downscale,
+    "crop": crop,
+    "deskew": deskew,
+    "threshold": threshold,
+}
+
+
+def preprocess(image_bytes: bytes, config: PreprocessConfig) -> Tuple[np.ndarray, Dict[str, float]]:
+    """Decode and run the configured stages, returning the image and per-stage ms.
+
+    "grayscale" is applied while decoding, which is cheaper than converting
+    a decoded colour image.
+    """
+    timings = {}
+    started = time.perf_counter()
+    img = decode(image_bytes, config)
+    timings["decode"] = round((time.perf_counter() - started) * 1000, 2)
+
+    for stage in config.stages:
+        if stage == "grayscale":
+            continue
+        started = time.perf_counter()
+        img = STAGES[stage](img, config)
+        timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+    return img, timings
+
+
+DEFAULT_CONFIG = PreprocessConfig()
@@ -0,0 +1,259 @@
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# ─────── Patterns (compiled once per process) ───────
+# 1,234.56 / 1.234,56 / 12.50; the last separator is the decimal one
+AMOUNT_RE = re.compile(r"(?<![\d.,])(\d{1,3}(?:[.,]\d{3})+|\d+)[.,](\d{2})(?![\d])")
+TOTAL_RE = re.compile(
+    r"\b(grand\s*total|total\s*due|amount\s*due|balance\s*due|total\s*amount|net\s*total|total)\b",
+    re.I,
+)
+SUBTOTAL_RE = re.compile(r"\bsub\s*-?\s*total\b", re.I)
+# Only a line that starts with the keyword: "TOTAL (incl. VAT) 105.00" is a total
+TAX_RE = re.compile(r"^\W*(sales\s*tax|tax|vat|gst|hst)\b", re.I)
+# Payment and change lines carry amounts but are neither items nor totals
+PAYMENT_RE = re.compile(
+    r"\b(cash|change|tender(?:ed)?|card|visa|master\s*card|amex|paid|payment|balance|tip|rounding|discount|savings?)\b",
+    re.I,
+)
+QUANTITY_RE = re.compile(r"^(\d{1,3})\s*(?:x|@|pcs?)\s+", re.I)
+
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [
+            ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+            ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+            ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+            ("dec", "december"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+ISO_DATE_RE = re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b")
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})\b")
+NAMED_DATE_RE = re.compile(
+    r"\b(?:(\d{1,2})[\s-]*([a-z]{3,9})[\s,-]*(\d{4}|\d{2})|([a-z]{3,9})[\s-]*(\d{1,2})(?:st|nd|rd|th)?[\s,-]*(\d{4}))\b",
+    re.I,
+)
+
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "₹": "INR", "¥": "JPY"}
+CURRENCY_ALIASES = {"DHS": "AED", "DH": "AED", "RS": "INR", "SR": "SAR"}
+CURRENCY_CODES = {
+    "AED", "USD", "EUR", "GBP", "INR", "JPY", "SAR", "QAR", "KWD", "OMR", "BHD",
+    "CAD", "AUD", "NZD", "SGD", "CHF", "CNY", "HKD", "PKR", "LKR", "EGP",
+}
+CURRENCY_RE = re.compile(
+    r"(?<![A-Z])(" + "|".join(sorted(CURRENCY_CODES | set(CURRENCY_ALIASES), key=len, reverse=True)) + r")(?![A-Z])"
+    r"|([$€£₹¥])",
+    re.I,
+)
+
+# How far each kind of evidence is trusted, before OCR confidence
+WEIGHTS = {
+    "keyword": 0.95,
+    "largest_amount": 0.5,
+    "merchant": 0.7,
+    "item": 0.8,
+    "iso_date": 0.95,
+    "named_date": 0.9,
+    "numeric_date": 0.85,
+    "ambiguous_date": 0.6,
+    "currency_code": 0.95,
+    "currency_symbol": 0.8,
+}
+# Totals that add up (subtotal + tax = total, items = subtotal) are very
+# unlikely to be misreads
+CONSISTENCY_BONUS = 0.1
+TOLERANCE = 0.02
+
+
+@dataclass
+class Line:
+    text: str
+    confidence: float  # mean tesseract word confidence, 0-1
+
+
+def lines_from_data(data: Dict[str, list]) -> List[Line]:
+    """Group `image_to_data` words into lines, in reading order."""
+    lines: Dict[Tuple[int, int, int], List[Tuple[str, float]]] = {}
+    for i, text in enumerate(data["text"]):
+        text = (text or "").strip()
+        conf = float(data["conf"][i])
+        if not text or conf < 0:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append((text, conf))
+    return [
+        Line(" ".join(w for w, _ in words), sum(c for _, c in words) / len(words) / 100)
+        for words in lines.values()
+    ]
+
+
+def parse_amount(whole: str, cents: str) -> float:
+    return float(re.sub(r"[.,\s]", "", whole) + "." + cents)
+
+
+def amounts(text: str) -> List[float]:
+    # 12.03.2024 would otherwise read as an amount of 12.03
+    for pattern in (ISO_DATE_RE, NUMERIC_DATE_RE):
+        text = pattern.sub(" ", text)
+    return [parse_amount(whole, cents) for whole, cents in AMOUNT_RE.findall(text)]
+
+
+def _field(value=None, confidence: float = 0.0) -> dict:
+    return {"value": value, "confidence": round(confidence, 2)}
+
+
+def _valid_date(year: int, month: int, day: int) -> Optional[date]:
+    if year < 100:
+        year += 2000
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_date(text: str) -> Optional[Tuple[date, str]]:
+    match = ISO_DATE_RE.search(text)
+    if match:
+        parsed = _valid_date(int(match[1]), int(match[2]), int(match[3]))
+        if parsed:
+            return parsed, "iso_date"
+
+    match = NAMED_DATE_RE.search(text)
+    if match:
+        if match[1]:
+            day, month_name, year = match[1], match[2], match[3]
+        else:
+            month_name, day, year = match[4], match[5], match[6]
+        month = MONTHS.get(month_name.lower())
+        parsed = month and _valid_date(int(year), month, int(day))
+        if parsed:
+            return parsed, "named_date"
+
+    match = NUMERIC_DATE_RE.search(text)
+    if match:
+        first, second, year = int(match[1]), int(match[2]), int(match[3])
+        if first > 12:
+            parsed, kind = _valid_date(year, second, first), "numeric_date"
+        elif second > 12:
+            parsed, kind = _valid_date(year, first, second), "numeric_date"
+        else:
+            # Could be either; day-first is the common receipt format here
+            parsed, kind = _valid_date(year, second, first), "ambiguous_date"
+        if parsed:
+            return parsed, kind
+    return None
+
+
+def parse_currency(text: str) -> Optional[Tuple[str, str]]:
+    for code, symbol in CURRENCY_RE.findall(text):
+        if code:
+            code = code.upper()
+            return CURRENCY_ALIASES.get(code, code), "currency_code"
+        return CURRENCY_SYMBOLS[symbol], "currency_symbol"
+    return None
+
+
+def _looks_like_merchant(text: str) -> bool:
+    letters = sum(c.isalpha() for c in text)
+    return letters >= 3 and letters >= len(text.replace(" ", "")) / 2 and not AMOUNT_RE.search(text)
+
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= TOLERANCE
+
+
+def parse(lines: List[Line]) -> dict:
+    """Merchant, date, line items, subtotal, tax, total and currency.
+
+    Every field is {"value", "confidence"}, confidence in 0-1 combining how
+    the value was found with tesseract's confidence for that line.
+    """
+    merchant, date_field, currency = _field(), _field(), _field()
+    subtotal, tax, total = _field(), _field(), _field()
+    items = []
+    all_amounts = []
+    totals_started = False
+
+    for index, line in enumerate(lines):
+        text = line.text
+        line_amounts = amounts(text)
+        all_amounts += [(amount, line.confidence) for amount in line_amounts]
+
+        if merchant["value"] is None and index < 5 and _looks_like_merchant(text):
+            merchant = _field(text.strip(" *-#"), line.confidence * WEIGHTS["merchant"])
+
+        if date_field["value"] is None:
+            found = parse_date(text)
+            if found:
+                date_field = _field(found[0].isoformat(), line.confidence * WEIGHTS[found[1]])
+
+        if currency["value"] is None:
+            found = parse_currency(text)
+            if found:
+                currency = _field(found[0], line.confidence * WEIGHTS[found[1]])
+
+        if not line_amounts:
+            continue
+        amount = line_amounts[-1]
+        keyword_confidence = line.confidence * WEIGHTS["keyword"]
+        if SUBTOTAL_RE.search(text):
+            totals_started = True
+            subtotal = _field(amount, keyword_confidence)
+        elif TOTAL_RE.search(text):
+            totals_started = True
+            # The first total wins; later ones are usually tendered/change
+            if total["value"] is None:
+                total = _field(amount, keyword_confidence)
+        elif TAX_RE.search(text):
+            totals_started = True
+            tax = _field(amount, keyword_confidence)
+        elif not totals_started and not PAYMENT_RE.search(text):
+            description = AMOUNT_RE.split(text)[0].strip(" .:-$€£₹¥")
+            quantity = 1
+            match = QUANTITY_RE.match(description)
+            if match:
+                quantity = int(match[1])
+                description = description[match.end():]
+            if description and any(c.isalpha() for c in description):
+                items.append(
+                    {
+                        "description": description,
+                        "quantity": quantity,
+                        "amount": amount,
+                        "confidence": round(line.confidence * WEIGHTS["item"], 2),
+                    }
+                )
+
+    if total["value"] is None and all_amounts:
+        amount, confidence = max(all_amounts)
+        total = _field(amount, confidence * WEIGHTS["largest_amount"])
+
+    # Cross-check the numbers against each other
+    items_sum = round(sum(item["amount"] for item in items), 2)
+    if total["value"] is not None:
+        if subtotal["value"] is not None and tax["value"] is not None and _close(
+            subtotal["value"] + tax["value"], total["value"]
+        ):
+            for field in (subtotal, tax, total):
+                field["confidence"] = min(1.0, round(field["confidence"] + CONSISTENCY_BONUS, 2))
+        elif subtotal["value"] is None and items and _close(items_sum, total["value"]):
+            total["confidence"] = min(1.0, round(total["confidence"] + CONSISTENCY_BONUS, 2))
+    if subtotal["value"] is not None and items and _close(items_sum, subtotal["value"]):
+        for item in items:
+            item["confidence"] = min(1.0, round(item["confidence"] + CONSISTENCY_BONUS, 2))
+
+    return {
+        "merchant": merchant,
+        "date": date_field,
+        "currency": currency,
+        "items": items,
+        "subtotal": subtotal,
+        "tax": tax,
+        "total": total,
+    }
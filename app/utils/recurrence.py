@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional
+from dateutil.relativedelta import relativedelta
+
+# Calendar months per period. Occurrences are always offset from the start
+# date (not from the previous occurrence) so a subscription starting on the
+# 31st lands on Feb 28/29 and goes back to the 31st in March.
+RECURRENCE_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+
+def to_datetime(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, dict) and "$date" in value:
+        raw = value["$date"]
+        if isinstance(raw, dict):
+            raw = int(raw["$numberLong"])
+        return datetime.utcfromtimestamp(raw / 1000)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(
+                tzinfo=None
+            )
+        except ValueError:
+            return None
+    return None
+
+
+def occurrence(start: datetime, recurrence_type: str, n: int) -> datetime:
+    return start + relativedelta(months=n * RECURRENCE_MONTHS[recurrence_type])
+
+
+def next_occurrence(
+    start: datetime, recurrence_type: str, after: datetime, inclusive: bool = True
+) -> Optional[datetime]:
+    """First occurrence on/after `after` (strictly after when not inclusive)."""
+    step = RECURRENCE_MONTHS.get(recurrence_type)
+    if not step or start is None:
+        return None
+    if start > after or (inclusive and start == after):
+        return start
+
+    months = (after.year - start.year) * 12 + (after.month - start.month)
+    n = max(months // step, 0)
+    # The month estimate can be one period off either way around month-ends
+    while n > 0 and occurrence(start, recurrence_type, n) > after:
+        n -= 1
+    while True:
+        due = occurrence(start, recurrence_type, n)
+        if due > after or (inclusive and due == after):
+            return due
+        n += 1
+
+
+def next_due_at(subscription: dict, now: datetime) -> Optional[datetime]:
+    if not subscription.get("isActive"):
+        return None
+    start = to_datetime(subscription.get("startDate"))
+    due = next_occurrence(start, subscription.get("recurrenceType"), now)
+    end = to_datetime(subscription.get("endDate"))
+    if due is None or (end is not None and due > end):
+        return None
+    return due
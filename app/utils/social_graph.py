@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from app.core.config import SOCIAL_GRAPH_REFRESH_SECONDS
+from app.db.mongo import db
+
+collection = db["connections"]
+
+# Below this size ratio a linear merge beats binary-searching the larger list
+GALLOP_RATIO = 8
+
+
+def _intersect(a: array, b: array) -> List[int]:
+    if len(a) > len(b):
+        a, b = b, a
+    out = []
+    if len(a) * GALLOP_RATIO < len(b):
+        lo = 0
+        for x in a:
+            lo = bisect_left(b, x, lo)
+            if lo == len(b):
+                break
+            if b[lo] == x:
+                out.append(x)
+        return out
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            out.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+
+class SocialGraph:
+    """Accepted connections as an adjacency index.
+
+    Users get dense int ids; each user's friends are a sorted array of
+    those ids (4 bytes a friend), so mutual friends are a sorted-set
+    intersection and suggestions a count over friends-of-friends. Built
+    from Mongo at startup, updated by the accept/remove routes and rebuilt
+    every SOCIAL_GRAPH_REFRESH_SECONDS to pick up other workers' changes.
+    """
+
+    def __init__(self, refresh_seconds: float = SOCIAL_GRAPH_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._ids: Dict[ObjectId, int] = {}
+        self._oids: List[ObjectId] = []
+        self._friends: Dict[int, array] = {}
+        self._built_at: Optional[float] = None
+        self._build_seconds = 0.0
+        self._lock = asyncio.Lock()
+        # add/remove calls made while a rebuild is reading the collection,
+        # replayed onto the new index before it is swapped in
+        self._changes: Optional[List[Tuple[str, ObjectId, ObjectId]]] = None
+
+    # ─────── Building ───────
+    async def build(self):
+        started = time.perf_counter()
+        self._changes = []
+        try:
+            ids: Dict[ObjectId, int] = {}
+            oids: List[ObjectId] = []
+            friends: Dict[int, array] = {}
+
+            def intern(oid: ObjectId) -> int:
+                if oid not in ids:
+                    ids[oid] = len(oids)
+                    oids.append(oid)
+                return ids[oid]
+
+            cursor = collection.find(
+                {"status": "accepted"}, {"_id": 0, "requesterId": 1, "recipientId": 1}
+            )
+            async for doc in cursor:
+                a, b = intern(doc["requesterId"]), intern(doc["recipientId"])
+                friends.setdefault(a, array("i")).append(b)
+                friends.setdefault(b, array("i")).append(a)
+            for user, neighbours in friends.items():
+                friends[user] = array("i", sorted(set(neighbours)))
+
+            changes, self._changes = self._changes, None
+            self._ids, self._oids, self._friends = ids, oids, friends
+            for op, a_oid, b_oid in changes:
+                getattr(self, op)(a_oid, b_oid)
+        finally:
+            self._changes = None
+        self._built_at = time.monotonic()
+        self._build_seconds = time.perf_counter() - started
+
+    async def ensure_fresh(self):
+        if self._built_at is not None and time.monotonic() - self._built_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            # Another request may have rebuilt while this one waited
+            if self._built_at is None or time.monotonic() - self._built_at >= self.refresh_seconds:
+                await self.build()
+
+    # ─────── Updates ───────
+    def _intern(self, oid: ObjectId) -> int:
+        if oid not in self._ids:
+            self._ids[oid] = len(self._oids)
+            self._oids.append(oid)
+        return self._ids[oid]
+
+    def add(self, a_oid: ObjectId, b_oid: ObjectId):
+        if self._changes is not None:
+            self._changes.append(("add", a_oid, b_oid))
+        a, b = self._intern(a_oid), self._intern(b_oid)
+        for user, friend in ((a, b), (b, a)):
+            neighbours = self._friends.setdefault(user, array("i"))
+            i = bisect_left(neighbours, friend)
+            if i == len(neighbours) or neighbours[i] != friend:
+                neighbours.insert(i, friend)
+
+    def remove(self, a_oid: ObjectId, b_oid: ObjectId):
+        if self._changes is not None:
+            self._changes.append(("remove", a_oid, b_oid))
+        a, b = self._ids.get(a_oid), self._ids.get(b_oid)
+        if a is None or b is None:
+            return
+        for user, friend in ((a, b), (b, a)):
+            neighbours = self._friends.get(user)
+            if neighbours is None:
+                continue
+            i = bisect_left(neighbours, friend)
+            if i < len(neighbours) and neighbours[i] == friend:
+                del neighbours[i]
+
+    # ─────── Queries ───────
+    def friends(self, oid: ObjectId) -> List[ObjectId]:
+        user = self._ids.get(oid)
+        if user is None:
+            return []
+        return [self._oids[i] for i in self._friends.get(user, ())]
+
+    def mutual(self, a_oid: ObjectId, b_oid: ObjectId) -> List[ObjectId]:
+        a, b = self._ids.get(a_oid), self._ids.get(b_oid)
+        if a is None or b is None:
+            return []
+        common = _intersect(self._friends.get(a, array("i")), self._friends.get(b, array("i")))
+        return [self._oids[i] for i in common]
+
+    def suggestions(
+        self, oid: ObjectId, k: int, exclude: Tuple[ObjectId, ...] = ()
+    ) -> List[Tuple[ObjectId, int]]:
+        """Top `k` friends-of-friends by mutual friend count, with the count.
+
+        Ties go to the user who joined the graph first, so pages are stable.
+        """
+        user = self._ids.get(oid)
+        if user is None:
+            return []
+        friends = self._friends.get(user, array("i"))
+        counts = Counter()
+        for friend in friends:
+            counts.update(self._friends.get(friend, ()))
+
+        skip = set(friends)
+        skip.add(user)
+        skip.update(self._ids[e] for e in exclude if e in self._ids)
+        top = heapq.nlargest(
+            k,
+            ((count, -candidate) for candidate, count in counts.items() if candidate not in skip),
+        )
+        return [(self._oids[-negative_id], count) for count, negative_id in top]
+
+    def stats(self) -> dict:
+        adjacency = sum(sys.getsizeof(neighbours) for neighbours in self._friends.values())
+        index = (
+            sys.getsizeof(self._ids)
+            + sys.getsizeof(self._oids)
+            + sys.getsizeof(self._friends)
+            + sum(sys.getsizeof(oid) for oid in self._oids)
+        )
+        return {
+            "users": len(self._oids),
+            "connections": sum(len(n) for n in self._friends.values()) // 2,
+            "adjacency_bytes": adjacency,
+            "index_bytes": index,
+            "total_bytes": adjacency + index,
+            "build_ms": round(self._build_seconds * 1000, 2),
+            "age_seconds": (
+                round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None
+            ),
+        }
+
+
+graph = SocialGraph()
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Mapping, Optional
+from app.core.config import (
+    STRIPE_API_BASE,
+    STRIPE_MAX_NETWORK_RETRIES,
+    STRIPE_SECRET_KEY,
+    STRIPE_TIMEOUT_SECONDS,
+    STRIPE_WORKERS,
+)
+from app.utils.lazy import lazy_import
+
+# Loaded on the first payments request, not at startup
+stripe = lazy_import("stripe")
+
+# Everything checkout_success reads, fetched with the session in one request
+SESSION_EXPAND = ["subscription", "subscription.items.data.price.product"]
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_configured = False
+_lock = threading.Lock()
+
+
+def _configure():
+    # Module-wide SDK settings, set once instead of on every request. The
+    # requests client keeps one Session per thread, so each pool thread
+    # reuses its keep-alive connection to the API
+    global _configured
+    with _lock:
+        if _configured:
+            return
+        stripe.api_key = STRIPE_SECRET_KEY
+        stripe.api_base = STRIPE_API_BASE
+        stripe.max_network_retries = STRIPE_MAX_NETWORK_RETRIES
+        stripe.default_http_client = stripe.http_client.RequestsClient(
+            timeout=STRIPE_TIMEOUT_SECONDS
+        )
+        _configured = True
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=STRIPE_WORKERS, thread_name_prefix="stripe")
+    return _executor
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run(fn: Callable, *args, **kwargs):
+    """`fn(*args, **kwargs)`, a blocking stripe SDK call, on the Stripe
+    thread pool so the event loop keeps serving other requests."""
+    _configure()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(fn, *args, **kwargs))
+
+
+def to_dict(obj: Any) -> Any:
+    """`obj` with every nested StripeObject turned into a plain dict, for
+    storing in Mongo. The SDK's own to_dict() only converts the top level."""
+    if isinstance(obj, Mapping):
+        return {key: to_dict(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [to_dict(value) for value in obj]
+    return obj
+
+
+async def create_checkout_session(**params):
+    return await run(stripe.checkout.Session.create, **params)
+
+
+async def retrieve_checkout_session(session_id: str):
+    return await run(stripe.checkout.Session.retrieve, session_id, expand=SESSION_EXPAND)
@@ -0,0 +1,118 @@
+import re
+import unicodedata
+from typing import Dict, List
+from bson import ObjectId
+from app.db.mongo import db
+from app.models.user import UserResponse
+
+collection = db["users"]
+
+# Bump when normalize/trigrams change so the backfill job rewrites old users
+SEARCH_VERSION = 1
+# Only the fields UserResponse needs leave the database
+PROJECTION = {field: 1 for field in UserResponse.__fields__ if field != "id"}
+# Fuzzy matching needs this many characters to have trigrams worth comparing
+FUZZY_MIN_LENGTH = 3
+# Share of the query's trigrams a user must have to count as a fuzzy match
+FUZZY_MIN_SCORE = 0.4
+
+
+def normalize(text) -> str:
+    """Lowercase, accents folded and whitespace collapsed: "  José " -> "jose"."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def trigrams(text: str) -> List[str]:
+    # Padded per word so the first letters count twice, as in pg_trgm:
+    # "ann" -> "  a", " an", "ann", "nn "
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return sorted(grams)
+
+
+def search_fields(user: dict) -> dict:
+    """Fields to $set on a user document whenever its names or email change."""
+    first, last = normalize(user.get("first_name")), normalize(user.get("last_name"))
+    email = normalize(user.get("email"))
+    user_name = normalize(user.get("user_name"))
+    names = [name for name in {first, last, f"{first} {last}".strip()} if name]
+    return {
+        "search": {"user_name": user_name, "names": sorted(names), "email": email},
+        # The email's domain would make every gmail user a fuzzy match
+        "searchTrigrams": trigrams(f"{user_name} {first} {last} {email.split('@')[0]}"),
+        "searchVersion": SEARCH_VERSION,
+    }
+
+
+async def ensure_indexes():
+    # The fields are stored normalised, so an anchored regex gets tight
+    # index bounds; a collation-aware index could not serve $regex at all
+    await collection.create_index("search.user_name")
+    await collection.create_index("search.names")
+    await collection.create_index("search.email")
+    await collection.create_index("searchTrigrams")
+    await collection.create_index("searchVersion")
+
+
+async def _fuzzy(query: str, exclude: List[ObjectId], limit: int) -> List[dict]:
+    query_grams = trigrams(query)
+    # A leading gram like "  j" or " jo" is shared by everyone whose name
+    # starts that way, so those only count towards the score. They do not
+    # pick candidates; a typo still leaves inner or word-end grams in common
+    candidate_grams = [gram for gram in query_grams if not gram.startswith(" ")]
+    if not candidate_grams:
+        return []
+    pipeline = [
+        {"$match": {"searchTrigrams": {"$in": candidate_grams}, "_id": {"$nin": exclude}}},
+        {
+            "$addFields": {
+                "_matched": {"$size": {"$setIntersection": ["$searchTrigrams", query_grams]}},
+                "_size": {"$size": "$searchTrigrams"},
+            }
+        },
+        {"$addFields": {"_score": {"$divide": ["$_matched", len(query_grams)]}}},
+        {"$match": {"_score": {"$gte": FUZZY_MIN_SCORE}}},
+        # Best coverage first; among equals, the shorter (closer) user
+        {"$sort": {"_score": -1, "_size": 1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": PROJECTION},
+    ]
+    return await collection.aggregate(pipeline).to_list(length=limit)
+
+
+async def search(query: str, exclude: ObjectId, limit: int) -> List[dict]:
+    """Users matching `query`, best first: exact username or email, then
+    username, name and email prefixes, then trigram fuzzy matches.
+
+    Each tier is its own indexed query and later tiers only run while the
+    result is short of `limit`.
+    """
+    q = normalize(query)
+    if not q:
+        return []
+    prefix = {"$regex": "^" + re.escape(q)}
+    tiers = [
+        ({"$or": [{"search.user_name": q}, {"search.email": q}]}, None),
+        ({"search.user_name": prefix}, "search.user_name"),
+        ({"search.names": prefix}, None),
+        ({"search.email": prefix}, "search.email"),
+    ]
+
+    found: Dict[ObjectId, dict] = {}
+    for match, sort in tiers:
+        if len(found) >= limit:
+            break
+        cursor = collection.find({**match, "_id": {"$nin": [exclude, *found]}}, PROJECTION)
+        if sort:
+            cursor = cursor.sort(sort, 1)
+        async for user in cursor.limit(limit - len(found)):
+            found[user["_id"]] = user
+
+    if len(found) < limit and len(q) >= FUZZY_MIN_LENGTH:
+        for user in await _fuzzy(q, [exclude, *found], limit - len(found)):
+            found[user["_id"]] = user
+    return list(found.values())
@@ -0,0 +1,44 @@
+import asyncio
+import signal
+from app.routes.auth import send_verification_email
+from app.tasks import job_queue, ocr_receipts, telemetry
+from app.tasks.backfill_user_search import backfill_user_search
+from app.tasks.fetch_exchange_rates import fetch_and_store_rates
+from app.tasks.queue_upcoming_subscriptions import (
+    ensure_indexes as ensure_subscription_indexes,
+    queue_upcoming_subscriptions,
+)
+from app.utils import ocr_cache
+
+job_queue.register("fetch_exchange_rates", fetch_and_store_rates, exclusive=True)
+job_queue.register(
+    "queue_upcoming_subscriptions", queue_upcoming_subscriptions, exclusive=True
+)
+job_queue.register("send_verification_email", send_verification_email)
+job_queue.register("process_receipt", ocr_receipts.process_receipt)
+job_queue.register("backfill_user_search", backfill_user_search, exclusive=True)
+
+worker = job_queue.Worker()
+
+
+async def main():
+    # Standalone worker: python -m app.worker
+    await job_queue.ensure_indexes()
+    await ensure_subscription_indexes()
+    await telemetry.ensure_collection()
+    await ocr_receipts.ensure_indexes()
+    await ocr_cache.ensure_indexes()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker.start()
+    await stop.wait()
+    print("Stopping job worker...")
+    await worker.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
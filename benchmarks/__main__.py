@@ -0,0 +1,132 @@
+"""Benchmarks for the CPU-heavy request paths.
+
+    python -m benchmarks run [--suite loans] [--filter 30y] [--output results.json]
+    python -m benchmarks run --compare baseline.json --threshold 10
+    python -m benchmarks compare baseline.json current.json --threshold 10
+    python -m benchmarks memory [--fixtures DIR]
+    python -m benchmarks startup [--runs 5] [--env OCR_ENABLED=false]
+
+`run` prints ops/sec and p50/p99 per case and writes them as JSON; with
+--compare (or the `compare` command) cases whose throughput fell by more
+than --threshold percent are flagged and the exit status is 1. `memory`
+reports the peak memory one receipt request adds to a worker; `startup`
+the import time and baseline memory of a freshly started worker.
+"""
+import argparse
+import os
+import sys
+
+# The app reads this at import time; nothing connects unless --mongo-uri is used
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+from benchmarks import harness  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+MEMORY_OUTPUT = os.path.join("benchmarks", "results", "memory.json")
+STARTUP_OUTPUT = os.path.join("benchmarks", "results", "startup.json")
+
+
+def _suites():
+    from benchmarks import loans, ocr, transactions, users
+
+    return {"loans": loans, "transactions": transactions, "ocr": ocr, "users": users}
+
+
+def run(args) -> int:
+    suites = _suites()
+    selected = args.suite or list(suites)
+    results = []
+    for suite in selected:
+        for case in suites[suite].cases(args):
+            if args.filter and args.filter not in case.name:
+                continue
+            result = harness.measure(case, min_time=args.min_time, min_runs=args.min_runs)
+            results.append(result)
+            print(
+                f"{result['name']}: {result['ops_per_sec']:,.1f} ops/sec, "
+                f"p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms",
+                flush=True,
+            )
+
+    print()
+    harness.print_results(results)
+    harness.save(results, args.output)
+
+    if args.compare:
+        rows = harness.compare(harness.load(args.compare), results, args.threshold)
+        print()
+        harness.print_comparison(rows, args.threshold)
+        return 1 if any(r["regression"] for r in rows) else 0
+    return 0
+
+
+def compare(args) -> int:
+    rows = harness.compare(harness.load(args.baseline), harness.load(args.current), args.threshold)
+    harness.print_comparison(rows, args.threshold)
+    return 1 if any(r["regression"] for r in rows) else 0
+
+
+def memory(args) -> int:
+    from benchmarks import memory as memory_suite
+
+    harness.save(memory_suite.run(args), args.output)
+    return 0
+
+
+def startup(args) -> int:
+    from benchmarks import startup as startup_suite
+
+    results = startup_suite.run(args)
+    print()
+    harness.save(results, args.output)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and save results")
+    run_parser.add_argument("--suite", action="append", choices=["loans", "transactions", "ocr", "users"])
+    run_parser.add_argument("--filter", help="only cases whose name contains this")
+    run_parser.add_argument("--min-time", type=float, default=1.0, help="seconds per case")
+    run_parser.add_argument("--min-runs", type=int, default=5)
+    run_parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        help="transaction dataset sizes (default 1000 10000 100000; add 1000000 for the full run)",
+    )
+    run_parser.add_argument("--mongo-uri", help="use this mongod instead of the in-process fake")
+    run_parser.add_argument("--fixtures", help="directory of receipt photos (default: synthetic)")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    run_parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    compare_parser.set_defaults(handler=compare)
+
+    memory_parser = commands.add_parser("memory", help="peak memory per receipt request")
+    memory_parser.add_argument("--fixtures", help="directory of receipt photos (default: synthetic)")
+    memory_parser.add_argument("--output", default=MEMORY_OUTPUT)
+    memory_parser.set_defaults(handler=memory)
+
+    startup_parser = commands.add_parser("startup", help="worker import time and baseline memory")
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    startup_parser.add_argument(
+        "--env", action="append", metavar="KEY=VALUE", help="e.g. OCR_ENABLED=false"
+    )
+    startup_parser.add_argument("--output", default=STARTUP_OUTPUT)
+    startup_parser.set_defaults(handler=startup)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
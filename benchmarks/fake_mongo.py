@@ -0,0 +1,97 @@
+"""Just enough of the motor collection API to run route handlers in-process.
+
+Supports equality and $gt/$gte/$lt/$lte/$in filters, inclusion projections,
+find().sort()/limit() with async iteration, and find_one(sort=...). Matching
+is a plain Python scan, which is also what the handlers do with the cursor
+afterwards, so results are comparable between sizes but not with a real,
+indexed mongod.
+"""
+from typing import Dict, List, Optional
+
+
+def _match_value(value, condition) -> bool:
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        for op, operand in condition.items():
+            if op == "$in":
+                ok = value in operand
+            elif value is None:
+                ok = False
+            elif op == "$gt":
+                ok = value > operand
+            elif op == "$gte":
+                ok = value >= operand
+            elif op == "$lt":
+                ok = value < operand
+            elif op == "$lte":
+                ok = value <= operand
+            else:
+                raise NotImplementedError(op)
+            if not ok:
+                return False
+        return True
+    return value == condition
+
+
+def matches(doc: dict, query: dict) -> bool:
+    return all(_match_value(doc.get(key), condition) for key, condition in query.items())
+
+
+class FakeCursor:
+    def __init__(self, docs: List[dict], query: dict, projection: Optional[dict] = None):
+        self._docs = docs
+        self._query = query
+        self._projection = projection
+        self._sort = None
+        self._limit = 0
+
+    def sort(self, key, direction: int = 1):
+        self._sort = key if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def _results(self) -> List[dict]:
+        results = [doc for doc in self._docs if matches(doc, self._query)]
+        for key, direction in reversed(self._sort or []):
+            results.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        results = results[: self._limit] if self._limit else results
+        if self._projection:
+            fields = ["_id", *(k for k, v in self._projection.items() if v and k != "_id")]
+            results = [{k: doc[k] for k in fields if k in doc} for doc in results]
+        return results
+
+    async def to_list(self, length: Optional[int] = None):
+        results = self._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs: Optional[List[dict]] = None):
+        self.docs = docs or []
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None):
+        return FakeCursor(self.docs, query or {}, projection)
+
+    async def find_one(self, query: Optional[dict] = None, sort=None):
+        cursor = self.find(query)
+        if sort:
+            cursor.sort(sort)
+        results = await cursor.to_list(1)
+        return results[0] if results else None
+
+
+class FakeDatabase:
+    def __init__(self):
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self._collections.setdefault(name, FakeCollection())
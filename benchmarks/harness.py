@@ -0,0 +1,135 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.tasks.telemetry import percentile
+
+
+@dataclass
+class Case:
+    """One benchmark: `fn` is timed, `setup` runs before every call untimed."""
+
+    suite: str
+    name: str
+    fn: Callable[[], object]
+    params: Dict = field(default_factory=dict)
+    setup: Optional[Callable[[], None]] = None
+
+
+def measure(case: Case, min_time: float = 1.0, min_runs: int = 5, max_runs: int = 100000) -> dict:
+    if case.setup:
+        case.setup()
+    case.fn()  # warm-up: imports, first-call caches, page faults
+
+    samples: List[float] = []
+    elapsed = 0.0
+    while len(samples) < max_runs and (len(samples) < min_runs or elapsed < min_time):
+        if case.setup:
+            case.setup()
+        started = time.perf_counter()
+        case.fn()
+        duration = time.perf_counter() - started
+        samples.append(duration * 1000)
+        elapsed += duration
+
+    return {
+        "suite": case.suite,
+        "name": case.name,
+        "params": case.params,
+        "runs": len(samples),
+        "ops_per_sec": round(len(samples) / elapsed, 2),
+        "mean_ms": round(elapsed * 1000 / len(samples), 4),
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def metadata() -> dict:
+    import numpy
+
+    return {
+        "createdAt": datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save(results: List[dict], path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    print(f"Saved {len(results)} results to {path}")
+
+
+def load(path: str) -> List[dict]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(baseline: List[dict], current: List[dict], threshold_pct: float) -> List[dict]:
+    """Per-case change against `baseline`; a case regresses when its
+    throughput drops by more than `threshold_pct` percent."""
+    before = {(r["suite"], r["name"]): r for r in baseline}
+    rows = []
+    for result in current:
+        old = before.get((result["suite"], result["name"]))
+        if old is None:
+            continue
+        change = (result["ops_per_sec"] - old["ops_per_sec"]) / old["ops_per_sec"] * 100
+        rows.append(
+            {
+                "suite": result["suite"],
+                "name": result["name"],
+                "baseline_ops_per_sec": old["ops_per_sec"],
+                "ops_per_sec": result["ops_per_sec"],
+                "change_pct": round(change, 1),
+                "p99_change_pct": round((result["p99_ms"] - old["p99_ms"]) / old["p99_ms"] * 100, 1),
+                "regression": change < -threshold_pct,
+            }
+        )
+    return rows
+
+
+def print_results(results: List[dict]):
+    width = max((len(r["name"]) for r in results), default=10)
+    print(f"{'case':<{width}}  {'ops/sec':>12}  {'p50 ms':>10}  {'p99 ms':>10}  {'runs':>6}")
+    for r in results:
+        print(
+            f"{r['name']:<{width}}  {r['ops_per_sec']:>12,.1f}  "
+            f"{r['p50_ms']:>10.3f}  {r['p99_ms']:>10.3f}  {r['runs']:>6}"
+        )
+
+
+def print_comparison(rows: List[dict], threshold_pct: float):
+    width = max((len(r["name"]) for r in rows), default=10)
+    print(f"{'case':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}  {'p99':>8}")
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ""
+        print(
+            f"{r['name']:<{width}}  {r['baseline_ops_per_sec']:>12,.1f}  "
+            f"{r['ops_per_sec']:>12,.1f}  {r['change_pct']:>+7.1f}%  "
+            f"{r['p99_change_pct']:>+7.1f}%{flag}"
+        )
+    regressions = sum(r["regression"] for r in rows)
+    print(f"{regressions} of {len(rows)} cases regressed by more than {threshold_pct}%")
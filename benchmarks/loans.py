@@ -0,0 +1,66 @@
+"""calculate_schedule over a grid of tenures, prepayment and revision counts.
+
+The amortization cache is cleared before every call, so each run measures
+the engine plus response building rather than a cache hit.
+"""
+from datetime import date
+from itertools import product
+from typing import Iterator
+
+from app.routes import loans
+from benchmarks.harness import Case
+
+TENURE_YEARS = (5, 15, 30)
+PREPAYMENT_COUNTS = (0, 12, 120)
+REVISION_COUNTS = (0, 4, 16)
+
+
+def loan_request(tenure_years: int, prepayments: int, revisions: int) -> loans.LoanRequest:
+    months = tenure_years * 12
+    # Spread events over the first half of the tenure so all of them land
+    # before payoff, even with heavy prepayment
+    window = max(months // 2, 1)
+    repayments = [
+        loans.Repayment(month=1 + i * window // prepayments, amount=25000)
+        for i in range(prepayments)
+    ]
+    interest_revision = [
+        loans.InterestRevision(month=2 + i * window // revisions, interest=8.5 + (i % 3) * 0.25)
+        for i in range(revisions)
+    ]
+    return loans.LoanRequest(
+        amount=5000000,
+        interest=8.5,
+        tenure_in_years=tenure_years,
+        adjust="tenure",
+        repayments=repayments,
+        interest_revision=interest_revision,
+        start_date=date(2024, 1, 1),
+    )
+
+
+def cases(args) -> Iterator[Case]:
+    for tenure_years, prepayments, revisions in product(
+        TENURE_YEARS, PREPAYMENT_COUNTS, REVISION_COUNTS
+    ):
+        data = loan_request(tenure_years, prepayments, revisions)
+        params = {
+            "tenure_years": tenure_years,
+            "prepayments": prepayments,
+            "revisions": revisions,
+        }
+        label = f"{tenure_years}y/{prepayments}p/{revisions}r"
+        yield Case(
+            "loans",
+            f"calculate_schedule[{label}]",
+            lambda data=data: loans.calculate_schedule(data),
+            params,
+            setup=loans._cache.clear,
+        )
+        yield Case(
+            "loans",
+            f"columnar[{label}]",
+            lambda data=data: loans.to_columns(data, loans.run_amortization(data)),
+            params,
+            setup=loans._cache.clear,
+        )
@@ -0,0 +1,72 @@
+"""Peak memory of one receipt request, per stage of the OCR path.
+
+    python -m benchmarks memory [--fixtures DIR]
+
+Every case runs in a fresh process, so memory freed by an earlier case
+cannot hide a later peak. The peak is the kernel's resident high-water
+mark (VmHWM), reset just before the case runs, minus the resident size
+at that point: what one request adds to a worker. Linux only.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from app.utils.preprocess import DEFAULT_CONFIG, decode, preprocess
+from benchmarks.receipts import fixtures
+
+
+def _decode_full(image_bytes: bytes):
+    # What decoding cost before reduced-size JPEG decoding
+    return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+CASES: Dict[str, Callable[[bytes], object]] = {
+    "decode_full": _decode_full,
+    "decode": lambda image_bytes: decode(image_bytes, DEFAULT_CONFIG),
+    "preprocess": lambda image_bytes: preprocess(image_bytes, DEFAULT_CONFIG),
+}
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not in /proc/self/status")
+
+
+def _peak_kb(case: str, image_bytes: bytes) -> int:
+    """Runs in a fresh process."""
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # resets VmHWM to the current RSS
+    before = _status_kb("VmRSS")
+    result = CASES[case](image_bytes)
+    peak = _status_kb("VmHWM")
+    del result
+    return peak - before
+
+
+def measure(case: str, image_bytes: bytes) -> int:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_peak_kb, case, image_bytes).result()
+
+
+def run(args) -> List[dict]:
+    results = []
+    for name, image_bytes in fixtures(args.fixtures):
+        for case in CASES:
+            peak_kb = measure(case, image_bytes)
+            results.append(
+                {
+                    "suite": "memory",
+                    "name": f"{case}[{name}]",
+                    "params": {"fixture": name, "bytes": len(image_bytes)},
+                    "peak_mb": round(peak_kb / 1024, 1),
+                }
+            )
+            print(f"{case}[{name}]: {peak_kb / 1024:,.1f} MB", flush=True)
+    return results
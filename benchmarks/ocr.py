@@ -0,0 +1,56 @@
+"""Receipt OCR latency with and without the OpenCV preprocessing stages.
+
+Runs in-process (no pool) so only decode, preprocessing and tesseract are
+timed. Each stage is also timed on its own; the OCR cases are skipped when
+no tesseract binary is available.
+"""
+import shutil
+from typing import Iterator
+
+from app.core.config import TESSERACT_CMD
+from app.utils import ocr
+from app.utils.preprocess import DEFAULT_CONFIG, PreprocessConfig, preprocess
+from benchmarks.harness import Case
+from benchmarks.receipts import fixtures
+
+TIMEOUT_SECONDS = 120
+RAW = PreprocessConfig(stages=())
+
+
+def cases(args) -> Iterator[Case]:
+    has_tesseract = shutil.which(TESSERACT_CMD) is not None
+    if not has_tesseract:
+        print("tesseract not found; benchmarking preprocessing only")
+
+    for name, image_bytes in fixtures(args.fixtures):
+        params = {"fixture": name, "bytes": len(image_bytes)}
+        yield Case(
+            "ocr",
+            f"preprocess[{name}]",
+            lambda image_bytes=image_bytes: preprocess(image_bytes, DEFAULT_CONFIG),
+            params,
+        )
+        # Each stage on top of the ones before it, to show where time goes
+        for i, stage in enumerate(DEFAULT_CONFIG.stages):
+            if stage == "grayscale":
+                continue
+            config = PreprocessConfig(stages=DEFAULT_CONFIG.stages[: i + 1])
+            yield Case(
+                "ocr",
+                f"preprocess_to_{stage}[{name}]",
+                lambda image_bytes=image_bytes, config=config: preprocess(image_bytes, config),
+                params,
+            )
+        if has_tesseract:
+            yield Case(
+                "ocr",
+                f"ocr_raw[{name}]",
+                lambda image_bytes=image_bytes: ocr.recognize(TIMEOUT_SECONDS, image_bytes, RAW),
+                params,
+            )
+            yield Case(
+                "ocr",
+                f"ocr_preprocessed[{name}]",
+                lambda image_bytes=image_bytes: ocr.recognize(TIMEOUT_SECONDS, image_bytes),
+                params,
+            )
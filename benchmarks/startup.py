@@ -0,0 +1,95 @@
+"""Cold start of one API worker: import time and baseline memory.
+
+    python -m benchmarks startup [--runs 5] [--top 15] [--env OCR_ENABLED=false]
+
+Each run imports app.main in a fresh interpreter under `-X importtime`, as
+a uvicorn worker does when it boots, and records the total import time,
+the slowest modules and the resident memory afterwards. HEAVY_MODULES are
+reported as loaded when startup executed them instead of leaving them to
+first use.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+HEAVY_MODULES = ("cv2", "PIL.Image", "pytesseract", "stripe", "google.oauth2.id_token")
+
+SCRIPT = f"""
+import json, resource, sys
+import app.main
+loaded = [
+    name for name in {HEAVY_MODULES!r}
+    if name in sys.modules and type(sys.modules[name]).__name__ != "_LazyModule"
+]
+print(json.dumps({{"rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "loaded": loaded}}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds per module from `-X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def run_once(env: Dict[str, str]) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **env},
+        check=True,
+    )
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"modules": parse_importtime(proc.stderr), **report}
+
+
+def run(args) -> List[dict]:
+    env = dict(item.split("=", 1) for item in args.env or [])
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    import_ms = [r["modules"]["app.main"] / 1000 for r in runs]
+    rss_mb = [r["rss_kb"] / 1024 for r in runs]
+    loaded = sorted({name for r in runs for name in r["loaded"]})
+    params = {"env": env, "runs": args.runs}
+    results = [
+        {
+            "suite": "startup",
+            "name": "import_app_main",
+            "params": params,
+            "p50_ms": round(statistics.median(import_ms), 1),
+            "min_ms": round(min(import_ms), 1),
+            "rss_mb": round(statistics.median(rss_mb), 1),
+            "heavy_modules_loaded": loaded,
+        }
+    ]
+
+    # Slowest modules by cumulative time, median over the runs
+    names = set.intersection(*(set(r["modules"]) for r in runs))
+    slowest = sorted(
+        ((statistics.median(r["modules"][n] for r in runs) / 1000, n) for n in names),
+        reverse=True,
+    )[1 : args.top + 1]  # [0] is app.main itself
+    for ms, name in slowest:
+        results.append(
+            {"suite": "startup", "name": f"import[{name}]", "params": params, "p50_ms": round(ms, 1)}
+        )
+
+    summary = results[0]
+    print(
+        f"import app.main: p50 {summary['p50_ms']:.1f} ms, min {summary['min_ms']:.1f} ms, "
+        f"RSS {summary['rss_mb']:.1f} MB"
+    )
+    print(f"heavy modules loaded at startup: {', '.join(loaded) or 'none'}")
+    print()
+    print(f"{'module (cumulative)':<50}  {'p50 ms':>8}")
+    for ms, name in slowest:
+        print(f"{name:<50}  {ms:>8.1f}")
+    return results
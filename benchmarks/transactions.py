@@ -0,0 +1,114 @@
+"""Transaction summary endpoints over synthetic datasets.
+
+Runs against the in-process fake by default, or a real mongod with
+--mongo-uri (data goes to a throwaway `finance_app_bench` database).
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from bson import ObjectId
+
+from app.routes import transactions
+from benchmarks.fake_mongo import FakeDatabase
+from benchmarks.harness import Case
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+RATES = {"usd": 1.0, "aed": 3.6725, "inr": 83.2, "eur": 0.92, "gbp": 0.79, "jpy": 151.4}
+START = datetime(2023, 1, 1)
+SPAN_DAYS = 730
+INSERT_CHUNK = 10000
+
+
+def synthetic_transactions(size: int, user_id: ObjectId, seed: int = 0) -> List[dict]:
+    """`size` transactions, 90% owned by `user_id`, over two years."""
+    rng = random.Random(seed)
+    others = [ObjectId() for _ in range(10)]
+    categories = [ObjectId() for _ in range(20)]
+    currencies = list(RATES) + ["xyz"]  # one unknown currency, skipped by the handlers
+    docs = []
+    for _ in range(size):
+        created = START + timedelta(seconds=rng.randrange(SPAN_DAYS * 86400))
+        docs.append(
+            {
+                "userId": user_id if rng.random() < 0.9 else rng.choice(others),
+                "title": "txn",
+                "amount": round(rng.uniform(1, 5000), 2),
+                "currency": rng.choice(currencies).upper(),
+                "type": "expense" if rng.random() < 0.7 else "income",
+                "category": rng.choice(categories),
+                "status": "completed" if rng.random() < 0.85 else "pending",
+                "date": created,
+                "createdAt": created,
+                "updatedAt": created,
+            }
+        )
+    return docs
+
+
+def _rates_doc() -> dict:
+    return {"base": "usd", "rates": RATES, "fetched_at": datetime.utcnow()}
+
+
+async def _load_fake(docs: List[dict]):
+    db = FakeDatabase()
+    db["transactions"].docs = docs
+    db["exchange_rates"].docs = [_rates_doc()]
+    return db
+
+
+async def _load_mongo(uri: str, docs: List[dict]):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    db = AsyncIOMotorClient(uri)["finance_app_bench"]
+    await db["transactions"].drop()
+    await db["exchange_rates"].drop()
+    for i in range(0, len(docs), INSERT_CHUNK):
+        await db["transactions"].insert_many(docs[i : i + INSERT_CHUNK])
+    await db["exchange_rates"].insert_one(_rates_doc())
+    await db["transactions"].create_index([("userId", 1), ("createdAt", 1)])
+    return db
+
+
+def cases(args) -> Iterator[Case]:
+    loop = asyncio.new_event_loop()
+    user = {"_id": ObjectId()}
+    last_quarter = {
+        "from_date": (START + timedelta(days=SPAN_DAYS - 90)).isoformat(),
+        "to_date": (START + timedelta(days=SPAN_DAYS)).isoformat(),
+    }
+    handlers = {
+        "expense_summary_by_category": lambda: transactions.get_expense_summary_by_category(
+            current_user=user
+        ),
+        "overall_expense": lambda: transactions.get_overall_expense(filters={}, current_user=user),
+        "overall_expense_last_quarter": lambda: transactions.get_overall_expense(
+            filters=dict(last_quarter), current_user=user
+        ),
+        "balance_summary": lambda: transactions.get_balance_summary(filters={}, current_user=user),
+    }
+
+    original = transactions.db, transactions.collection
+    try:
+        for size in args.sizes or DEFAULT_SIZES:
+            docs = synthetic_transactions(size, user["_id"])
+            if args.mongo_uri:
+                db = loop.run_until_complete(_load_mongo(args.mongo_uri, docs))
+            else:
+                db = loop.run_until_complete(_load_fake(docs))
+            # The handlers read these module globals at call time
+            transactions.db, transactions.collection = db, db["transactions"]
+
+            for name, handler in handlers.items():
+                yield Case(
+                    "transactions",
+                    f"{name}[{size}]",
+                    lambda handler=handler: loop.run_until_complete(handler()),
+                    {"size": size, "backend": "mongo" if args.mongo_uri else "fake"},
+                )
+            del docs, db
+    finally:
+        transactions.db, transactions.collection = original
+        loop.close()
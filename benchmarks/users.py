@@ -0,0 +1,95 @@
+"""User listing: the CPU of one `GET /users` page.
+
+Each case runs the handler and, unless it returned a Response, FastAPI's
+serialize_response with the route's response_model, which is what a worker
+spends per request apart from the HTTP layer. Runs against the in-process
+fake by default, or a real mongod with --mongo-uri (data goes to a throwaway
+`finance_app_bench` database).
+"""
+import asyncio
+import random
+from typing import Iterator, List
+
+from bson import ObjectId
+from fastapi import Response
+from fastapi.routing import serialize_response
+
+from app.routes import users
+from app.utils.user_search import search_fields
+from benchmarks.fake_mongo import FakeDatabase
+from benchmarks.harness import Case
+
+USER_COUNT = 1000
+PAGE_SIZES = (100,)
+# The route's require_admin dependency has already run by the time the handler does
+ADMIN = {"_id": ObjectId(), "is_admin": True}
+
+
+def synthetic_users(size: int, seed: int = 0) -> List[dict]:
+    """Full user documents, secrets and search fields included, as stored."""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(size):
+        user = {
+            "_id": ObjectId(),
+            "first_name": rng.choice(["Ana", "John", "José", "Mary", "Wei", "Priya"]),
+            "last_name": rng.choice(["Smith", "Álvarez", "Chen", "Patel", "Johnson"]),
+            "user_name": f"user{i}",
+            "email": f"user{i}@example.com",
+            "phone": f"+1555{i:07d}",
+            "date_of_birth": "1990-01-01",
+            "profile_image": "",
+            "is_phone_verified": rng.random() < 0.5,
+            "is_email_verified": True,
+            "hashed_password": "$2b$12$" + "x" * 53,
+            "email_verification_code": f"{rng.randrange(10**6):06d}",
+        }
+        user.update(search_fields(user))
+        docs.append(user)
+    return docs
+
+
+async def _load_mongo(uri: str, docs: List[dict]):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    db = AsyncIOMotorClient(uri)["finance_app_bench"]
+    await db["users"].drop()
+    await db["users"].insert_many(docs)
+    return db
+
+
+def cases(args) -> Iterator[Case]:
+    loop = asyncio.new_event_loop()
+    route = next(r for r in users.router.routes if r.path == "" and "GET" in r.methods)
+
+    async def request(limit: int, cursor):
+        content = await users.get_users(limit=limit, cursor=cursor, current_user=ADMIN)
+        if isinstance(content, Response):
+            return content.body  # FastAPI sends these as they are
+        return await serialize_response(field=route.response_field, response_content=content)
+
+    original = users.collection
+    try:
+        docs = synthetic_users(USER_COUNT)
+        if args.mongo_uri:
+            db = loop.run_until_complete(_load_mongo(args.mongo_uri, docs))
+        else:
+            db = FakeDatabase()
+            db["users"].docs = docs
+        # The handler reads this module global at call time
+        users.collection = db["users"]
+
+        middle = str(docs[USER_COUNT // 2]["_id"])
+        for limit in PAGE_SIZES:
+            for name, cursor in (("first_page", None), ("middle_page", middle)):
+                yield Case(
+                    "users",
+                    f"list_users_{name}[{limit}]",
+                    lambda limit=limit, cursor=cursor: loop.run_until_complete(
+                        request(limit, cursor)
+                    ),
+                    {"users": USER_COUNT, "limit": limit, "backend": "mongo" if args.mongo_uri else "fake"},
+                )
+    finally:
+        users.collection = original
+        loop.close()
@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+# The app reads these at import time; tests never connect to Mongo
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import motor.motor_asyncio  # noqa: E402
+import pytest  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+
+class FakeGridFSBucket:
+    """In memory: motor's bucket only accepts a real database."""
+
+    def __init__(self, db, bucket_name: str = "fs"):
+        self.files = {}
+
+    async def upload_from_stream(self, filename, source, metadata=None):
+        file_id = ObjectId()
+        self.files[file_id] = bytes(source)
+        return file_id
+
+    async def open_download_stream(self, file_id):
+        data = self.files[file_id]
+
+        class Stream:
+            async def read(self):
+                return data
+
+        return Stream()
+
+
+motor.motor_asyncio.AsyncIOMotorGridFSBucket = FakeGridFSBucket
+
+import app.db.mongo as mongo  # noqa: E402
+
+# Swapped in before any app module binds its `collection = db[...]`
+mongo.db = AsyncMongoMockClient()["finance_app_test"]
+
+
+@pytest.fixture
+def db():
+    yield mongo.db
+    for name in asyncio.run(mongo.db.list_collection_names()):
+        asyncio.run(mongo.db.drop_collection(name))
@@ -0,0 +1,166 @@
+"""The NumPy engine against the month-by-month loop it replaced.
+
+`reference_amortize` is the original calculate_schedule loop with the
+pydantic models and dates stripped out. Zero rates go through the same
+_emi fix as the engine (principal / months instead of 0 / 0).
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.utils.amortization import AmortizationError, amortize
+
+
+class LoopError(ValueError):
+    pass
+
+
+def _emi(principal, rate, months):
+    if months <= 0 or principal <= 0:
+        return 0
+    if rate == 0:
+        return principal / months
+    factor = (1 + rate) ** months
+    return principal * rate * factor / (factor - 1)
+
+
+def reference_amortize(
+    amount, interest, tenure_months, adjust, repayments, interest_revision, adjusted_emi_schedule
+):
+    monthly_rate = interest / (12 * 100)
+    remaining = amount
+    rate_changes = {m: r for m, r in interest_revision}
+    emi_changes = {m: e for m, e in sorted(adjusted_emi_schedule, key=lambda x: x[0])}
+    emi = emi_changes.get(1, _emi(remaining, monthly_rate, tenure_months))
+
+    total_interest_paid = 0.0
+    total_amount_paid = 0.0
+    rows = []
+    current_rate = interest
+    month = 1
+    max_months = max(tenure_months * 3, 1500)
+
+    while remaining > 0 and month <= max_months:
+        if month in rate_changes:
+            current_rate = rate_changes[month]
+            monthly_rate = current_rate / (12 * 100)
+            if adjust == "emi":
+                emi = _emi(remaining, monthly_rate, tenure_months - month + 1)
+
+        if month in emi_changes:
+            emi = emi_changes[month]
+
+        interest_amt = remaining * monthly_rate
+        principal = emi - interest_amt
+        if principal < 0:
+            raise LoopError(month)
+
+        prepayment = 0.0
+        for r_month, r_amount, recurring in repayments:
+            if recurring and month >= r_month:
+                prepayment += r_amount
+            elif not recurring and month == r_month:
+                prepayment += r_amount
+
+        if principal + prepayment > remaining:
+            prepayment = max(remaining - principal, 0)
+
+        remaining -= principal + prepayment
+        total_interest_paid += interest_amt
+        total_amount_paid += emi + prepayment
+
+        if remaining <= 0:
+            break
+
+        rows.append((month, emi, current_rate, principal, interest_amt, prepayment, remaining))
+
+        if adjust == "emi" and prepayment > 0 and remaining > 0:
+            emi = _emi(remaining, monthly_rate, max(tenure_months - month, 1))
+
+        month += 1
+
+    return rows, total_amount_paid, total_interest_paid
+
+
+def _rate(rng: random.Random) -> float:
+    return 0.0 if rng.random() < 0.15 else round(rng.uniform(0.5, 15), 2)
+
+
+def random_loan(rng: random.Random) -> dict:
+    tenure = rng.choice([1, 2, 6, 12, 60, 120, 240, 360, rng.randint(1, 480)])
+    amount = round(rng.uniform(1000, 2_000_000), 2)
+    month = lambda: rng.randint(1, tenure + 12)
+    return {
+        "amount": amount,
+        "interest": _rate(rng),
+        "tenure_months": tenure,
+        "adjust": rng.choice(["tenure", "emi"]),
+        "repayments": [
+            (month(), round(rng.uniform(10, amount / 10), 2), rng.random() < 0.3)
+            for _ in range(rng.choice([0, 0, 1, 2, 5]))
+        ],
+        "interest_revision": [(month(), _rate(rng)) for _ in range(rng.choice([0, 0, 1, 3]))],
+        "adjusted_emi_schedule": [
+            (month(), round(rng.uniform(amount / tenure / 2, amount / tenure * 2), 2))
+            for _ in range(rng.choice([0, 0, 0, 1, 2]))
+        ],
+    }
+
+
+def assert_matches_reference(loan: dict):
+    try:
+        expected = reference_amortize(**loan)
+    except LoopError:
+        with pytest.raises(AmortizationError):
+            amortize(**loan)
+        return
+
+    result = amortize(**loan)
+    rows, total_amount_paid, total_interest_paid = expected
+    columns = np.column_stack(
+        [
+            result.month,
+            result.emi,
+            result.interest_rate,
+            result.principal,
+            result.interest,
+            result.prepayment,
+            result.remaining,
+        ]
+    )
+    assert columns.shape == (len(rows), 7)
+    if rows:
+        np.testing.assert_array_equal(columns, np.array(rows, dtype=float))
+    assert result.total_amount_paid == total_amount_paid
+    assert result.total_interest_paid == total_interest_paid
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference_on_random_loans(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        assert_matches_reference(random_loan(rng))
+
+
+@pytest.mark.parametrize(
+    "loan",
+    [
+        # Zero rate throughout, with and without prepayments
+        dict(amount=120000, interest=0, tenure_months=120, adjust="tenure"),
+        dict(amount=120000, interest=0, tenure_months=120, adjust="emi", repayments=[(10, 5000, False)]),
+        dict(amount=120000, interest=0, tenure_months=120, adjust="tenure", repayments=[(3, 100, True)]),
+        # Revised to and from zero
+        dict(amount=500000, interest=9, tenure_months=240, adjust="emi", interest_revision=[(24, 0)]),
+        dict(amount=500000, interest=0, tenure_months=240, adjust="emi", interest_revision=[(12, 7.5)]),
+        dict(amount=500000, interest=8, tenure_months=240, adjust="tenure", interest_revision=[(60, 0)]),
+        # One-month and prepaid-in-full loans
+        dict(amount=1000, interest=12, tenure_months=1, adjust="tenure"),
+        dict(amount=100000, interest=10, tenure_months=60, adjust="tenure", repayments=[(1, 100000, False)]),
+        # EMI set below the interest: both raise
+        dict(amount=1000000, interest=12, tenure_months=120, adjust="tenure", adjusted_emi_schedule=[(5, 100)]),
+    ],
+)
+def test_matches_reference_on_edge_cases(loan):
+    loan = {"repayments": [], "interest_revision": [], "adjusted_emi_schedule": [], **loan}
+    assert_matches_reference(loan)
@@ -0,0 +1,95 @@
+import asyncio
+
+from pymongo.errors import DuplicateKeyError
+
+from app.tasks import job_queue
+
+
+def test_dedupe_reuses_active_job_until_it_finishes(db):
+    async def scenario():
+        await job_queue.ensure_indexes()
+        first = await job_queue.enqueue("task", dedupe_key="k")
+        assert await job_queue.enqueue("task", dedupe_key="k") == first
+
+        job = await job_queue.claim("default")
+        assert job["_id"] == first
+        assert await job_queue.enqueue("task", dedupe_key="k") == first  # running
+
+        await job_queue.complete(job)
+        assert await job_queue.enqueue("task", dedupe_key="k") != first
+        assert await job_queue.collection.count_documents({}) == 2
+
+    asyncio.run(scenario())
+
+
+def _race(monkeypatch, after_insert=None):
+    """Make the first upsert lose to another worker's enqueue: the other job
+    is inserted, then our upsert fails on the unique index as it would in
+    MongoDB. Returns the other job's id and the number of upserts made."""
+    upsert = job_queue.collection.find_one_and_update
+    race = {"calls": 0}
+
+    async def losing_upsert(*args, **kwargs):
+        race["calls"] += 1
+        if race["calls"] == 1:
+            race["winner"] = (
+                await job_queue.collection.insert_one(
+                    {"task": "task", "status": job_queue.QUEUED, "activeDedupeKey": "k"}
+                )
+            ).inserted_id
+            if after_insert:
+                await after_insert(race["winner"])
+            raise DuplicateKeyError("E11000 duplicate key error, index: activeDedupeKey_1")
+        return await upsert(*args, **kwargs)
+
+    monkeypatch.setattr(job_queue.collection, "find_one_and_update", losing_upsert)
+    return race
+
+
+def test_concurrent_enqueue_returns_the_winning_job(db, monkeypatch):
+    async def scenario():
+        await job_queue.ensure_indexes()
+        race = _race(monkeypatch)
+        assert await job_queue.enqueue("task", dedupe_key="k") == race["winner"]
+        assert race["calls"] == 1  # answered by re-reading, not by another upsert
+        assert await job_queue.collection.count_documents({"activeDedupeKey": "k"}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_enqueue_retries_when_the_winner_already_finished(db, monkeypatch):
+    async def finish(job_id):
+        await job_queue.collection.update_one(
+            {"_id": job_id}, {"$set": {"status": job_queue.DONE}, "$unset": {"activeDedupeKey": ""}}
+        )
+
+    async def scenario():
+        await job_queue.ensure_indexes()
+        race = _race(monkeypatch, after_insert=finish)
+        job_id = await job_queue.enqueue("task", dedupe_key="k")
+        assert job_id != race["winner"]
+        assert race["calls"] == 2
+        assert (await job_queue.collection.find_one({"activeDedupeKey": "k"}))["_id"] == job_id
+
+    asyncio.run(scenario())
+
+
+def test_heartbeat_survives_extend_errors(db, monkeypatch, capsys):
+    calls = []
+
+    async def flaky_extend(job, visibility_seconds):
+        calls.append(job["_id"])
+        if len(calls) == 1:
+            raise RuntimeError("primary stepped down")
+
+    async def scenario():
+        monkeypatch.setattr(job_queue, "extend", flaky_extend)
+        worker = job_queue.Worker(visibility_seconds=0.03)
+        heartbeat = asyncio.create_task(worker._keep_visible({"_id": 1, "task": "task"}))
+        await asyncio.sleep(0.1)
+        assert not heartbeat.done()
+        heartbeat.cancel()
+
+    asyncio.run(scenario())
+    assert len(calls) >= 2
+    assert "primary stepped down" in capsys.readouterr().out
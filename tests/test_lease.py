@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.core.lease import Lease, LeaderElector, run_exclusive, SKIPPED
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_lease_is_exclusive_until_released(db):
+    async def scenario():
+        a, b = Lease("test", owner="a"), Lease("test", owner="b")
+        assert await a.acquire()
+        assert not await b.acquire()
+        token = a.token
+        await a.release()
+        assert await b.acquire()
+        assert b.token == token + 1
+
+    asyncio.run(scenario())
+
+
+def test_stale_holder_cannot_renew_after_takeover(db):
+    async def scenario():
+        a, b = Lease("test", ttl_seconds=1, owner="a"), Lease("test", ttl_seconds=1, owner="b")
+        assert await a.acquire()
+        await asyncio.sleep(1.1)  # a stalls past its expiry
+        assert await b.acquire()
+        assert b.token > a.token
+        assert not await a.renew()
+        assert not a.held
+        await a.release()  # must not drop b's lease
+        assert not await Lease("test", owner="c").acquire()
+
+    asyncio.run(scenario())
+
+
+def test_run_exclusive_skips_overlapping_run(db):
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(0.2)
+            return "done"
+
+        first = asyncio.create_task(run_exclusive("job", slow))
+        await started.wait()
+        assert await run_exclusive("job", slow) is SKIPPED
+        assert await first == "done"
+        assert await run_exclusive("job", slow) == "done"
+
+    asyncio.run(scenario())
+
+
+def test_one_leader_and_takeover_in_process(db):
+    async def scenario():
+        electors = [LeaderElector("scheduler", ttl_seconds=1, owner=f"w{i}") for i in range(3)]
+        for elector in electors:
+            elector.start()
+        for _ in range(15):
+            await asyncio.sleep(0.1)
+            assert sum(e.is_leader for e in electors) <= 1
+        (leader,) = [e for e in electors if e.is_leader]
+        token = leader.lease.token
+
+        # Crash the leader: it stops renewing and never releases
+        leader._task.cancel()
+        others = [e for e in electors if e is not leader]
+        deadline = time.monotonic() + 3
+        while not any(e.is_leader for e in others) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        (successor,) = [e for e in others if e.is_leader]
+        assert successor.lease.token > token
+
+        for elector in others:
+            await elector.stop()
+
+    asyncio.run(scenario())
+
+
+# ─────── Across processes ───────
+CHILD = """
+import asyncio, json, sys
+from app.core.lease import LeaderElector
+
+async def main():
+    elector = LeaderElector(sys.argv[1], ttl_seconds=2)
+    elector.start()
+    while True:
+        print(json.dumps({"leader": elector.is_leader, "token": elector.lease.token}), flush=True)
+        await asyncio.sleep(0.2)
+
+asyncio.run(main())
+"""
+
+
+class _Child:
+    def __init__(self, name: str, uri: str):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-c", CHILD, name],
+            cwd=ROOT,
+            env={**os.environ, "MONGODB_URI": uri},
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.status = {"leader": False, "token": None}
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            if line.startswith("{"):
+                self.status = json.loads(line)
+
+
+def _wait_for(predicate, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+@pytest.mark.skipif(
+    not os.getenv("MONGODB_TEST_URI"), reason="set MONGODB_TEST_URI to a mongod to run"
+)
+def test_one_leader_and_takeover_across_processes():
+    uri = os.environ["MONGODB_TEST_URI"]
+    name = f"test:{uuid.uuid4().hex}"
+    children = [_Child(name, uri) for _ in range(3)]
+    try:
+        leaders = lambda: [c for c in children if c.status["leader"]]
+        assert _wait_for(lambda: len(leaders()) == 1, timeout=10)
+        for _ in range(20):
+            time.sleep(0.1)
+            assert len(leaders()) == 1
+        (leader,) = leaders()
+        token = leader.status["token"]
+
+        leader.proc.send_signal(signal.SIGKILL)
+        others = [c for c in children if c is not leader]
+        assert _wait_for(lambda: any(c.status["leader"] for c in others), timeout=10)
+        assert sum(c.status["leader"] for c in others) == 1
+        assert max(c.status["token"] or 0 for c in others) > token
+    finally:
+        for child in children:
+            child.proc.kill()
+            child.proc.wait()
+        from pymongo import MongoClient
+
+        with MongoClient(uri) as client:
+            client["finance_app"]["leases"].delete_one({"_id": name})
@@ -0,0 +1,64 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import loans
+from app.utils.amortization import AmortizationError
+
+app = FastAPI()
+app.include_router(loans.router, prefix="/loans")
+client = TestClient(app)
+
+LOAN = {"amount": 500000, "interest": 9, "tenure_in_months": 240, "adjust": "tenure"}
+
+
+def solve(**body):
+    return client.post("/loans/solve", json={"loan": LOAN, "prepayment": "one_off", **body})
+
+
+def test_solves_off_the_event_loop(monkeypatch):
+    on_loop = []
+    amortize = loans.amortize
+
+    def recording_amortize(**kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return amortize(**kwargs)
+
+    monkeypatch.setattr(loans, "amortize", recording_amortize)
+    response = solve(target_tenure_months=120)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["solution"]["final_tenure_months"] <= 120
+    assert body["iterations"] > 0
+    assert on_loop and not any(on_loop)
+
+
+def test_probe_failure_is_422(monkeypatch):
+    amortize = loans.amortize
+
+    def failing_probe(repayments, **kwargs):
+        if repayments:
+            raise AmortizationError("EMI 10.00 too low to cover interest 20.00 at month 3")
+        return amortize(repayments=repayments, **kwargs)
+
+    monkeypatch.setattr(loans, "amortize", failing_probe)
+    response = solve(target_interest_saving_pct=20)
+    assert response.status_code == 422
+    assert "too low to cover interest" in response.json()["detail"]
+
+
+def test_invalid_loan_is_still_400():
+    response = client.post(
+        "/loans/solve",
+        json={
+            "loan": {**LOAN, "adjusted_emi_schedule": [{"month": 1, "emi": 10}]},
+            "prepayment": "one_off",
+            "target_tenure_months": 120,
+        },
+    )
+    assert response.status_code == 400
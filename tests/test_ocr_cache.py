@@ -0,0 +1,80 @@
+import asyncio
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.utils import ocr, ocr_cache
+from app.utils.lru import LRUCache
+
+
+def receipt(date: str, subtotal: str, total: str) -> bytes:
+    """Same layout every time; only the date and amounts change."""
+    img = Image.new("L", (600, 1400), 255)
+    draw = ImageDraw.Draw(img)
+    lines = ["CORNER GROCERY", "12 Main St", date, "", "Milk 2L        3.49", "Bread          2.99"]
+    lines += ["", f"Subtotal   {subtotal}", "Tax            0.52", f"TOTAL      {total}"]
+    for i, line in enumerate(lines):
+        draw.text((40, 60 + i * 40), line, fill=0)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def runs(db, monkeypatch):
+    """OCR stand-in that records each image it is asked to read."""
+    seen = []
+
+    async def fake_run(fn, image_bytes):
+        seen.append(image_bytes)
+        return {"text": f"receipt {len(seen)}", "receipt": {"total": len(seen)}}
+
+    monkeypatch.setattr(ocr.pool, "run", fake_run)
+    monkeypatch.setattr(ocr_cache, "_cache", LRUCache(8))
+    return seen
+
+
+def test_same_layout_receipts_are_read_separately(runs):
+    a = receipt("2024-03-01", "6.48", "7.00")
+    b = receipt("2024-03-09", "9.12", "9.64")
+
+    async def scenario():
+        return await ocr_cache.recognize(a), await ocr_cache.recognize(b)
+
+    first, second = asyncio.run(scenario())
+    assert len(runs) == 2
+    assert first["cache"] is None and second["cache"] is None
+    assert first["receipt"] != second["receipt"]
+
+
+def test_same_file_is_answered_from_memory_then_mongo(runs, monkeypatch):
+    image = receipt("2024-03-01", "6.48", "7.00")
+
+    async def scenario():
+        fresh = await ocr_cache.recognize(image)
+        memory = await ocr_cache.recognize(image)
+        monkeypatch.setattr(ocr_cache, "_cache", LRUCache(8))  # another worker
+        mongo = await ocr_cache.recognize(image)
+        return fresh, memory, mongo
+
+    fresh, memory, mongo = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert (fresh["cache"], memory["cache"], mongo["cache"]) == (None, "memory", "mongo")
+    assert fresh["receipt"] == memory["receipt"] == mongo["receipt"]
+
+
+def test_mongo_outage_falls_through_to_ocr(runs, monkeypatch, capsys):
+    async def unreachable(*args, **kwargs):
+        raise ServerSelectionTimeoutError("mongo:27017: timed out")
+
+    monkeypatch.setattr(ocr_cache.collection, "find_one", unreachable)
+    monkeypatch.setattr(ocr_cache.collection, "replace_one", unreachable)
+    misses = ocr_cache.stats()["misses"]
+
+    result = asyncio.run(ocr_cache.recognize(receipt("2024-03-01", "6.48", "7.00")))
+    assert len(runs) == 1
+    assert result["cache"] is None and result["receipt"] == {"total": 1}
+    assert ocr_cache.stats()["misses"] == misses + 1
+    assert "timed out" in capsys.readouterr().out
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.jwt import create_access_token
+from app.routes import payments
+from app.utils import stripe_client
+
+app = FastAPI()
+app.include_router(payments.router, prefix="/payments")
+client = TestClient(app)
+
+USER_ID = ObjectId()
+PERIOD_START, PERIOD_END = 1_700_000_000, 1_702_592_000
+
+
+def checkout_session(session_id: str) -> dict:
+    """A completed subscription checkout, subscription, price and product expanded."""
+    product = {"id": "prod_1", "object": "product", "name": "Pro"}
+    price = {
+        "id": "price_1", "object": "price", "product": product, "unit_amount": 999,
+        "currency": "usd", "nickname": None, "recurring": {"interval": "month"},
+    }
+    subscription = {
+        "id": "sub_1", "object": "subscription", "status": "active",
+        "current_period_start": PERIOD_START, "current_period_end": PERIOD_END,
+        "items": {"object": "list", "data": [{"id": "si_1", "object": "subscription_item", "price": price}]},
+    }
+    return {
+        "id": session_id, "object": "checkout.session", "status": "complete",
+        "payment_status": "paid", "mode": "subscription", "customer": "cus_1",
+        "customer_email": "ana@example.com", "client_reference_id": str(USER_ID),
+        "subscription": subscription,
+    }
+
+
+class StripeStandIn(BaseHTTPRequestHandler):
+    """Answers checkout session retrievals the way api.stripe.com does."""
+
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.requests.append((url.path, parse_qs(url.query)))
+        body = json.dumps(checkout_session(url.path.rsplit("/", 1)[-1])).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stripe_api(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StripeStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StripeStandIn.requests = []
+    monkeypatch.setattr(payments, "STRIPE_SECRET_KEY", "sk_test_123")
+    monkeypatch.setattr(stripe_client, "STRIPE_SECRET_KEY", "sk_test_123")
+    monkeypatch.setattr(stripe_client, "STRIPE_API_BASE", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(stripe_client, "STRIPE_MAX_NETWORK_RETRIES", 0)
+    monkeypatch.setattr(stripe_client, "_configured", False)
+    yield StripeStandIn.requests
+    stripe_client.shutdown()
+    server.shutdown()
+    server.server_close()
+    stripe_client._configured = False
+
+
+@pytest.fixture
+def ana(db):
+    user = {"_id": USER_ID, "email": "ana@example.com", "user_name": "ana"}
+    asyncio.run(db["users"].insert_one(user))
+    return {"Authorization": f"Bearer {create_access_token({'sub': user['email']})}"}
+
+
+def test_checkout_success_retrieves_once_and_persists_the_plan(stripe_api, ana, db):
+    response = client.post("/payments/checkout_success", json={"sessionId": "cs_test_1"}, headers=ana)
+    assert response.status_code == 200
+    assert response.json()["subscription"] == "sub_1"
+
+    # One request for the session, with everything it reads expanded
+    assert len(stripe_api) == 1
+    path, query = stripe_api[0]
+    assert path == "/v1/checkout/sessions/cs_test_1"
+    expand = [values[0] for key, values in sorted(query.items()) if key.startswith("expand[")]
+    assert expand == stripe_client.SESSION_EXPAND
+
+    customer = asyncio.run(db["stripe_customers"].find_one({"user_id": USER_ID}))
+    assert (customer["tier"], customer["amount"], customer["currency"]) == ("Pro", 9.99, "usd")
+    assert (customer["interval"], customer["is_recurring"]) == ("month", True)
+    assert customer["subscription_id"] == "sub_1" and customer["status"] == "active"
+
+    user = asyncio.run(db["users"].find_one({"_id": USER_ID}))
+    assert (user["customer_id"], user["tier"]) == ("cus_1", "Pro")
+
+    txn = asyncio.run(db["stripe_transactions"].find_one({"session_id": "cs_test_1"}))
+    assert txn["session"]["subscription"] == "sub_1"
+    assert txn["subscription"]["items"]["data"][0]["price"]["product"]["name"] == "Pro"
+
+
+def test_stored_stripe_objects_are_plain_dicts():
+    session = stripe_client.stripe.convert_to_stripe_object(checkout_session("cs_test_2"))
+    plain = stripe_client.to_dict(session["subscription"])
+
+    def assert_plain(value):
+        if isinstance(value, dict):
+            assert type(value) is dict
+            for item in value.values():
+                assert_plain(item)
+        elif isinstance(value, list):
+            for item in value:
+                assert_plain(item)
+
+    assert_plain(plain)
+    assert plain["items"]["data"][0]["price"]["product"] == {"id": "prod_1", "object": "product", "name": "Pro"}
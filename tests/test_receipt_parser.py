@@ -0,0 +1,131 @@
+import pytest
+
+from app.tasks.ocr_receipts import NoTotalError, draft_transaction
+from app.utils.receipt_parser import Line, amounts, parse, parse_currency, parse_date
+
+
+def receipt(*texts: str, confidence: float = 0.8):
+    return parse([Line(text, confidence) for text in texts])
+
+
+def test_subtotal_tax_and_total_lines():
+    parsed = receipt(
+        "CORNER GROCERY",
+        "Milk 2L 3.50",
+        "Bread 2.50",
+        "Subtotal 6.00",
+        "VAT 5% 0.30",
+        "TOTAL 6.30",
+        "Cash 10.00",
+        "Change 3.70",
+    )
+    assert parsed["subtotal"]["value"] == 6.00
+    assert parsed["tax"]["value"] == 0.30
+    assert parsed["total"]["value"] == 6.30
+
+
+@pytest.mark.parametrize(
+    "line",
+    ["TOTAL (incl. VAT) 105.00", "Total incl. tax 105.00", "Grand Total inc GST 105.00"],
+)
+def test_totals_that_mention_tax_are_totals(line):
+    parsed = receipt("Subtotal 100.00", "VAT 5.00", line)
+    assert parsed["total"]["value"] == 105.00
+    assert parsed["tax"]["value"] == 5.00
+    # Found by keyword (0.8 * 0.95) and confirmed by subtotal + tax
+    assert parsed["total"]["confidence"] == 0.86
+
+
+def test_first_total_wins_over_tendered_amounts():
+    parsed = receipt("Coffee 4.00", "Total 4.00", "Total tendered 5.00")
+    assert parsed["total"]["value"] == 4.00
+
+
+def test_largest_amount_is_the_fallback_total():
+    parsed = receipt("Coffee 4.00", "Cake 6.50")
+    assert parsed["total"] == {"value": 6.50, "confidence": 0.4}
+
+
+def test_line_items_stop_at_the_totals():
+    parsed = receipt("SHOP", "2 x Apples 3.00", "Bananas 1.20", "Subtotal 4.20", "Cash 5.00")
+    assert [(i["description"], i["quantity"], i["amount"]) for i in parsed["items"]] == [
+        ("Apples", 2, 3.00),
+        ("Bananas", 1, 1.20),
+    ]
+
+
+def test_items_matching_the_subtotal_are_boosted():
+    matching = receipt("Tea 2.00", "Scone 3.00", "Subtotal 5.00")
+    off = receipt("Tea 2.00", "Scone 3.00", "Subtotal 9.00")
+    assert [i["confidence"] for i in matching["items"]] == [0.74, 0.74]
+    assert [i["confidence"] for i in off["items"]] == [0.64, 0.64]
+
+
+def test_total_matching_the_items_is_boosted():
+    assert receipt("Tea 2.00", "Scone 3.00", "Total 5.00")["total"]["confidence"] == 0.86
+    assert receipt("Tea 2.00", "Scone 3.00", "Total 7.00")["total"]["confidence"] == 0.76
+
+
+def test_inconsistent_totals_are_not_boosted():
+    parsed = receipt("Subtotal 100.00", "VAT 5.00", "Total 110.00")
+    assert [parsed[f]["confidence"] for f in ("subtotal", "tax", "total")] == [0.76] * 3
+
+
+def test_merchant_is_an_early_text_line():
+    parsed = receipt("** CORNER GROCERY **", "12 Main St", "Total 1.00")
+    assert parsed["merchant"] == {"value": "CORNER GROCERY", "confidence": 0.56}
+
+
+@pytest.mark.parametrize(
+    "text, value, kind",
+    [
+        ("2024-03-09 14:02", "2024-03-09", "iso_date"),
+        ("9 Mar 2024", "2024-03-09", "named_date"),
+        ("March 9th, 2024", "2024-03-09", "named_date"),
+        ("25/03/2024", "2024-03-25", "numeric_date"),
+        ("03/25/24", "2024-03-25", "numeric_date"),
+        ("09/03/2024", "2024-03-09", "ambiguous_date"),
+    ],
+)
+def test_dates(text, value, kind):
+    found, found_kind = parse_date(text)
+    assert (found.isoformat(), found_kind) == (value, kind)
+
+
+def test_dates_are_not_amounts():
+    assert amounts("12.03.2024 Total 1,234.56") == [1234.56]
+    assert amounts("1.234,56") == [1234.56]
+
+
+@pytest.mark.parametrize(
+    "text, code, kind",
+    [
+        ("Total AED 12.00", "AED", "currency_code"),
+        ("Dhs 12.00", "AED", "currency_code"),
+        ("€ 12,00", "EUR", "currency_symbol"),
+        ("$12.00", "USD", "currency_symbol"),
+    ],
+)
+def test_currency(text, code, kind):
+    assert parse_currency(text) == (code, kind)
+
+
+def test_parsed_date_and_currency_carry_line_confidence():
+    parsed = receipt("SHOP", "2024-03-09", "Total USD 1.00")
+    assert parsed["date"] == {"value": "2024-03-09", "confidence": 0.76}
+    assert parsed["currency"] == {"value": "USD", "confidence": 0.76}
+
+
+def test_draft_transaction_uses_the_parsed_fields():
+    parsed = receipt("CORNER GROCERY", "9 Mar 2024", "Subtotal 100.00", "VAT 5.00", "TOTAL (incl. VAT) AED 105.00")
+    draft = draft_transaction(parsed, "user-1", "groceries")
+    assert (draft.title, draft.amount, draft.currency, draft.category) == (
+        "CORNER GROCERY", 105.00, "AED", "groceries",
+    )
+    assert draft.date.date().isoformat() == "2024-03-09"
+    assert draft.type == "expense"
+
+
+def test_draft_transaction_needs_a_total():
+    with pytest.raises(NoTotalError):
+        draft_transaction(receipt("CORNER GROCERY", "Thank you"), "user-1", "groceries")
@@ -0,0 +1,79 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.core.jwt import create_access_token
+from app.routes import utils
+from app.tasks import ocr_receipts
+
+app = FastAPI()
+app.include_router(utils.router, prefix="/utils")
+client = TestClient(app)
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (60, 40), "white").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def users(db):
+    alice = {"_id": ObjectId(), "email": "alice@example.com", "user_name": "alice"}
+    bob = {"_id": ObjectId(), "email": "bob@example.com", "user_name": "bob"}
+    asyncio.run(db["users"].insert_many([alice, bob]))
+    auth = lambda user: {"Authorization": f"Bearer {create_access_token({'sub': user['email']})}"}
+    return SimpleNamespace(alice=auth(alice), bob=auth(bob), alice_id=alice["_id"])
+
+
+def _submit(headers=None):
+    return client.post(
+        "/utils/receipts",
+        files={"image": ("r.png", _png(), "image/png")},
+        headers=headers or {},
+    )
+
+
+def test_submit_requires_sign_in(users):
+    assert _submit().status_code == 403
+
+
+def test_only_the_uploader_can_read_a_receipt(users):
+    response = _submit(users.alice)
+    assert response.status_code == 202
+    receipt_id = response.json()["id"]
+
+    stored = asyncio.run(ocr_receipts.collection.find_one({"_id": ObjectId(receipt_id)}))
+    assert stored["userId"] == users.alice_id
+    assert stored["category"] is None  # no draft transaction without create_transaction
+
+    own = client.get(f"/utils/receipts/{receipt_id}", headers=users.alice)
+    assert own.status_code == 200
+    assert own.json()["id"] == receipt_id
+    assert "userId" not in own.json()
+
+    assert client.get(f"/utils/receipts/{receipt_id}", headers=users.bob).status_code == 404
+    assert client.get(f"/utils/receipts/{receipt_id}").status_code == 403
+
+
+def test_only_the_uploader_can_stream_events(users):
+    receipt_id = _submit(users.alice).json()["id"]
+    asyncio.run(
+        ocr_receipts.collection.update_one(
+            {"_id": ObjectId(receipt_id)}, {"$set": {"status": ocr_receipts.DONE}}
+        )
+    )
+    url = f"/utils/receipts/{receipt_id}/events"
+    assert client.get(url, headers=users.bob).status_code == 404
+    assert client.get(url).status_code == 403
+
+    own = client.get(url, headers=users.alice)
+    assert own.status_code == 200
+    assert "event: status" in own.text
+    assert ocr_receipts.DONE in own.text
@@ -0,0 +1,145 @@
+import asyncio
+from collections import defaultdict, deque
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.jwt import create_access_token
+from app.core.lease import SKIPPED, WORKER_ID
+from app.routes import admin
+from app.tasks import telemetry
+
+app = FastAPI()
+app.include_router(admin.router, prefix="/admin")
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def local_state(monkeypatch):
+    monkeypatch.setattr(telemetry, "_durations", defaultdict(lambda: deque(maxlen=10)))
+    monkeypatch.setattr(telemetry, "_last_run", {})
+    monkeypatch.setattr(telemetry, "_failure_streak", defaultdict(int))
+
+
+def _runs(db):
+    return asyncio.run(db["job_runs"].find({}, {"_id": 0}).to_list(length=None))
+
+
+def test_record_run_stores_a_successful_run(db):
+    async def job():
+        return {"items_processed": 42}
+
+    assert asyncio.run(telemetry.record_run("send_digest", job)) == {"items_processed": 42}
+    [run] = _runs(db)
+    assert set(run) == {
+        "job", "worker", "startedAt", "finishedAt", "durationMs", "outcome", "itemsProcessed", "error",
+    }
+    assert (run["job"], run["worker"], run["outcome"]) == ("send_digest", WORKER_ID, "success")
+    assert run["itemsProcessed"] == 42 and run["error"] is None
+    assert isinstance(run["startedAt"], datetime) and run["finishedAt"] >= run["startedAt"]
+    assert run["durationMs"] >= 0
+
+
+def test_record_run_stores_failures_and_reraises(db):
+    async def job():
+        raise RuntimeError("smtp down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(telemetry.record_run("send_digest", job))
+    runs = _runs(db)
+    assert [run["outcome"] for run in runs] == ["failure", "failure"]
+    assert runs[0]["error"]["type"] == "RuntimeError"
+    assert runs[0]["error"]["message"] == "smtp down"
+    assert "smtp down" in runs[0]["error"]["traceback"]
+    assert telemetry.local_stats()["send_digest"]["failure_streak"] == 2
+
+
+def test_record_run_marks_skipped_runs(db):
+    async def job():
+        return SKIPPED
+
+    asyncio.run(telemetry.record_run("rebuild_graph", job))
+    assert _runs(db)[0]["outcome"] == "skipped"
+    assert "rebuild_graph" not in telemetry.local_stats()
+
+
+def test_record_run_survives_a_failed_insert(db, monkeypatch, capsys):
+    async def unavailable(doc):
+        raise RuntimeError("not primary")
+
+    async def job():
+        return 3
+
+    monkeypatch.setattr(telemetry.collection, "insert_one", unavailable)
+    assert asyncio.run(telemetry.record_run("send_digest", job)) == 3
+    assert "not primary" in capsys.readouterr().out
+
+
+def _run(outcome: str, ms: float) -> dict:
+    return {"job": "j", "outcome": outcome, "durationMs": ms}
+
+
+def test_summarize_counts_newest_first():
+    runs = [
+        _run("failure", 40),
+        _run("skipped", 1),
+        _run("failure", 30),
+        _run("success", 20),
+        _run("failure", 10),
+    ]
+    stats = telemetry.summarize(runs)
+    assert stats["last_run"] == runs[0]
+    assert (stats["runs"], stats["failures"], stats["skipped"]) == (4, 3, 1)
+    assert stats["failure_streak"] == 2  # the skip does not break the streak
+    assert (stats["p50_ms"], stats["p95_ms"]) == (30, 40)
+
+
+def test_summarize_with_no_runs():
+    assert telemetry.summarize([]) == {
+        "last_run": None, "runs": 0, "failures": 0, "skipped": 0,
+        "failure_streak": 0, "p50_ms": None, "p95_ms": None,
+    }
+
+
+@pytest.fixture
+def accounts(db):
+    users = {
+        name: {"_id": ObjectId(), "email": f"{name}@example.com", **extra}
+        for name, extra in (("member", {}), ("flagged", {"is_admin": True}), ("listed", {}))
+    }
+    asyncio.run(db["users"].insert_many(list(users.values())))
+    return {
+        name: {"Authorization": f"Bearer {create_access_token({'sub': user['email']})}"}
+        for name, user in users.items()
+    }
+
+
+def test_admin_jobs_is_for_admins_only(accounts, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_EMAILS", {"listed@example.com"})
+    assert client.get("/admin/jobs").status_code == 403
+    assert client.get("/admin/jobs", headers=accounts["member"]).status_code == 403
+    assert client.get("/admin/jobs", headers=accounts["flagged"]).status_code == 200
+    assert client.get("/admin/jobs", headers=accounts["listed"]).status_code == 200
+
+
+def test_admin_jobs_reports_recorded_runs(accounts, db):
+    async def job():
+        return 5
+
+    async def failing():
+        raise ValueError("bad payload")
+
+    asyncio.run(telemetry.record_run("send_digest", job))
+    with pytest.raises(ValueError):
+        asyncio.run(telemetry.record_run("send_digest", failing))
+
+    response = client.get("/admin/jobs", headers=accounts["flagged"])
+    assert response.status_code == 200
+    stats = response.json()["jobs"]["send_digest"]
+    assert (stats["runs"], stats["failures"], stats["failure_streak"]) == (2, 1, 1)
+    assert stats["last_run"]["outcome"] == "failure"
+    assert response.json()["local"]["send_digest"]["runs"] == 2
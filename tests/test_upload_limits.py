@@ -0,0 +1,118 @@
+import asyncio
+import io
+import resource
+import struct
+import tracemalloc
+import zlib
+
+import numpy as np
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from app.routes import utils
+from app.utils.preprocess import DEFAULT_CONFIG, ImageTooLarge, PreprocessConfig, cv2, decode
+
+# 144 MP of 8-bit grey: about 140 KB on the wire, 144 MB once decoded
+BOMB_SIDE = 12000
+DECODED_BYTES = BOMB_SIDE * BOMB_SIDE
+
+# Pillow warns past its own, higher, default limit before ours applies
+pytestmark = pytest.mark.filterwarnings("ignore::PIL.Image.DecompressionBombWarning")
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+
+def png_bomb(side: int = BOMB_SIDE) -> bytes:
+    """A valid all-black greyscale PNG, compressed a row at a time."""
+    compressor = zlib.compressobj(9)
+    row = b"\x00" * (side + 1)  # filter byte + pixels
+    idat = b"".join(compressor.compress(row) for _ in range(side)) + compressor.flush()
+    header = struct.pack(">IIBBBBB", side, side, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", header) + _chunk(b"IDAT", idat) + _chunk(b"IEND", b"")
+
+
+@pytest.fixture(scope="module")
+def bomb() -> bytes:
+    return png_bomb()
+
+
+def _upload(data: bytes) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(data), size=len(data), filename="r.png",
+        headers=Headers({"content-type": "image/png"}),
+    )
+
+
+def _bounded(fn):
+    """Run fn and return (exception, traced peak, growth of the RSS high-water mark)."""
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    tracemalloc.start()
+    try:
+        fn()
+    except Exception as e:
+        error = e
+    else:
+        error = None
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return error, peak, rss_after - rss_before
+
+
+def test_read_image_rejects_a_decompression_bomb(bomb):
+    error, peak, rss_growth = _bounded(lambda: asyncio.run(utils._read_image(_upload(bomb))))
+    assert isinstance(error, HTTPException) and error.status_code == 413
+    assert "megapixel" in error.detail
+    # Neither the pixels nor a second copy of the body were allocated
+    assert peak < len(bomb) + 1024 * 1024
+    assert rss_growth < DECODED_BYTES // 4
+
+
+def test_decode_rejects_a_decompression_bomb(bomb):
+    error, peak, rss_growth = _bounded(lambda: decode(bomb, DEFAULT_CONFIG))
+    assert isinstance(error, ImageTooLarge)
+    assert peak < 1024 * 1024
+    assert rss_growth < DECODED_BYTES // 4
+
+
+def test_read_image_rejects_an_oversized_body(monkeypatch):
+    monkeypatch.setattr(utils, "OCR_MAX_UPLOAD_BYTES", 1024)
+    upload = _upload(png_bomb(64) + b"\x00" * 4096)
+    upload.size = None  # e.g. a chunked request; the streaming check must catch it
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(utils._read_image(upload))
+    assert e.value.status_code == 413
+
+
+def photo_jpeg(width: int = 4000, height: int = 3000) -> bytes:
+    """A 12 MP colour photo of a receipt-like page: text lines on paper."""
+    img = np.full((height, width, 3), 200, np.uint8)
+    for y in range(100, height, 60):
+        img[y : y + 20, 200 : width - 200] = 30
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    assert ok
+    return encoded.tobytes()
+
+
+def test_large_jpeg_is_decoded_at_reduced_size_within_bounded_memory():
+    photo = photo_jpeg()
+    full_grey_bytes = 4000 * 3000
+    result = {}
+
+    error, peak, _ = _bounded(lambda: result.update(img=decode(photo, DEFAULT_CONFIG)))
+    assert error is None
+    height, width = result["img"].shape[:2]
+    # Scaled by libjpeg while decoding: as small as decode_min_side allows
+    assert DEFAULT_CONFIG.decode_min_side <= min(height, width) < 3000
+    assert (width, height) == (2000, 1500)
+    # The full-size image is never materialised, not even briefly
+    assert peak < full_grey_bytes // 2
+
+    # The same bound catches a decode at full size
+    error, peak, _ = _bounded(lambda: decode(photo, PreprocessConfig(decode_min_side=10**6)))
+    assert error is None and peak >= full_grey_bytes
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.utils import user_search
+
+
+class _Users:
+    """The users collection, with $setIntersection (missing from mongomock)
+    rewritten as the equivalent $filter, and each pipeline recorded."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.pipelines = []
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return self.collection.aggregate(_without_set_intersection(pipeline))
+
+
+def _without_set_intersection(value):
+    if isinstance(value, list):
+        return [_without_set_intersection(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "$setIntersection" in value:
+        field, values = value["$setIntersection"]
+        return {"$filter": {"input": field, "cond": {"$in": ["$$this", values]}}}
+    return {k: _without_set_intersection(v) for k, v in value.items()}
+
+
+NAMES = [
+    ("johnny", "John", "Smith"),
+    ("jack", "Jack", "Black"),
+    ("jade", "Jade", "Jeon"),
+    ("jordan", "Jordan", "Jay"),
+    ("scarlett", "Scarlett", "Young"),
+    ("jose", "José", "Álvarez"),
+]
+
+
+@pytest.fixture
+def users(db, monkeypatch):
+    docs = []
+    for user_name, first, last in NAMES:
+        user = {
+            "_id": ObjectId(), "user_name": user_name, "first_name": first,
+            "last_name": last, "email": f"{user_name}@gmail.com",
+        }
+        user.update(user_search.search_fields(user))
+        docs.append(user)
+    asyncio.run(db["users"].insert_many(docs))
+    spy = _Users(db["users"])
+    monkeypatch.setattr(user_search, "collection", spy)
+    return spy
+
+
+def _search(query: str):
+    found = asyncio.run(user_search.search(query, ObjectId(), 10))
+    return [user["user_name"] for user in found]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [("jonhny", "johnny"), ("scarlet", "scarlett"), ("alvarex", "jose")],
+)
+def test_typos_still_find_the_user(users, query, expected):
+    assert _search(query)[0] == expected
+
+
+def test_leading_grams_do_not_select_candidates(users):
+    _search("jqzxw")
+    candidates = users.pipelines[-1][0]["$match"]["searchTrigrams"]["$in"]
+    assert candidates and not any(gram.startswith(" ") for gram in candidates)
+    # Everyone above starts with j; nobody shares anything else
+    assert _search("jqzxw") == []
+
+
+def test_email_domain_alone_matches_nobody(users):
+    assert _search("gmail") == []
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.jwt import create_access_token
+from app.routes import users
+from app.utils import pagination
+
+app = FastAPI()
+app.include_router(users.router, prefix="/users")
+client = TestClient(app)
+
+
+def _auth(user: dict) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user['email']})}"}
+
+
+@pytest.fixture
+def people(db):
+    docs = [
+        {
+            "_id": ObjectId(), "user_name": f"user{i}", "email": f"user{i}@example.com",
+            "hashed_password": "secret", "is_admin": i == 0,
+        }
+        for i in range(5)
+    ]
+    asyncio.run(db["users"].insert_many(docs))
+    return docs
+
+
+def test_listing_requires_sign_in(people):
+    assert client.get("/users").status_code == 403
+
+
+def test_listing_is_for_admins_only(people):
+    assert client.get("/users", headers=_auth(people[1])).status_code == 403
+
+
+def test_admin_pages_through_every_user(people):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/users", params=params, headers=_auth(people[0]))
+        assert response.status_code == 200
+        body = response.json()
+        assert all("hashed_password" not in user and "is_admin" not in user for user in body)
+        seen += [user["id"] for user in body]
+        pages += 1
+        cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+        assert cursor == body[-1]["id"]
+    assert pages == 3
+    assert seen == [str(doc["_id"]) for doc in people]